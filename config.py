@@ -5,6 +5,28 @@ BASE_DIR = os.path.dirname(__file__)
 DATA_DIR = os.path.join(BASE_DIR, "data")
 
 INTENT_THRESHOLD_DEFAULT: float = 0.25
+INTENT_ENGINE_DEFAULT: str = "postings"
+INTENT_MODE_DEFAULT: str = "centroid"
+INTENT_KNN_K_DEFAULT: int = 15
+INTENT_ARTIFACT_PATH_DEFAULT: str = os.path.join(BASE_DIR, ".cache", "intent_model.bin")
+INTENT_ARTIFACT_ENABLED_DEFAULT: bool = True
+INTENT_TOKENIZE_WORKERS_DEFAULT: int = 0
+INTENT_CENTROID_TOP_K_DEFAULT: int = 0
+INTENT_CENTROID_MIN_WEIGHT_DEFAULT: float = 0.0
+INTENT_SAMPLE_RETENTION_DEFAULT: str = "keep"
+SEGMENT_CACHE_SIZE_DEFAULT: int = 4096
+TOKENIZER_BACKEND_DEFAULT: str = "underthesea"
+NLP_WARMUP_DEFAULT: bool = True
+NER_MODE_DEFAULT: str = "always"
+NER_INTENTS_DEFAULT: List[str] = []
+NER_WORKERS_DEFAULT: int = 1
+NER_BATCH_SIZE_DEFAULT: int = 8
+NER_CACHE_SIZE_DEFAULT: int = 1024
+ENTITY_PLAN_MODE_DEFAULT: str = "full"
+NER_TIMEOUT_MS_DEFAULT: int = 0
+PIPELINE_MODE_DEFAULT: str = "sequential"
+PIPELINE_WORKERS_DEFAULT: int = 2
+NLU_RELOAD_INTERVAL_DEFAULT: float = 0.0
 CONTEXT_HISTORY_LIMIT_DEFAULT: int = 10
 
 SERVER_HOST_DEFAULT: str = "0.0.0.0"
@@ -32,6 +54,99 @@ def get_intent_threshold() -> float:
     return float(os.getenv("INTENT_THRESHOLD", INTENT_THRESHOLD_DEFAULT))
 
 
+def get_intent_engine() -> str:
+    return os.getenv("INTENT_ENGINE", INTENT_ENGINE_DEFAULT).strip().lower()
+
+
+def get_intent_mode() -> str:
+    return os.getenv("INTENT_MODE", INTENT_MODE_DEFAULT).strip().lower()
+
+
+def get_intent_knn_k() -> int:
+    return int(os.getenv("INTENT_KNN_K", INTENT_KNN_K_DEFAULT))
+
+
+def get_intent_artifact_path() -> str:
+    return os.getenv("INTENT_ARTIFACT_PATH", INTENT_ARTIFACT_PATH_DEFAULT)
+
+
+def get_intent_artifact_enabled() -> bool:
+    enabled_str = os.getenv("INTENT_ARTIFACT_ENABLED", str(INTENT_ARTIFACT_ENABLED_DEFAULT)).lower()
+    return enabled_str in ("true", "1", "yes", "on")
+
+
+def get_intent_tokenize_workers() -> int:
+    return int(os.getenv("INTENT_TOKENIZE_WORKERS", INTENT_TOKENIZE_WORKERS_DEFAULT))
+
+
+def get_intent_centroid_top_k() -> int:
+    return int(os.getenv("INTENT_CENTROID_TOP_K", INTENT_CENTROID_TOP_K_DEFAULT))
+
+
+def get_intent_centroid_min_weight() -> float:
+    return float(os.getenv("INTENT_CENTROID_MIN_WEIGHT", INTENT_CENTROID_MIN_WEIGHT_DEFAULT))
+
+
+def get_intent_sample_retention() -> str:
+    return os.getenv("INTENT_SAMPLE_RETENTION", INTENT_SAMPLE_RETENTION_DEFAULT).strip().lower()
+
+
+def get_segment_cache_size() -> int:
+    return int(os.getenv("SEGMENT_CACHE_SIZE", SEGMENT_CACHE_SIZE_DEFAULT))
+
+
+def get_tokenizer_backend() -> str:
+    return os.getenv("TOKENIZER_BACKEND", TOKENIZER_BACKEND_DEFAULT).strip().lower()
+
+
+def get_nlp_warmup() -> bool:
+    warmup_str = os.getenv("NLP_WARMUP", str(NLP_WARMUP_DEFAULT)).lower()
+    return warmup_str in ("true", "1", "yes", "on")
+
+
+def get_ner_mode() -> str:
+    return os.getenv("NER_MODE", NER_MODE_DEFAULT).strip().lower()
+
+
+def get_ner_intents() -> List[str]:
+    intents_str = os.getenv("NER_INTENTS", None)
+    if intents_str:
+        return [intent.strip() for intent in intents_str.split(",") if intent.strip()]
+    return NER_INTENTS_DEFAULT
+
+
+def get_ner_workers() -> int:
+    return int(os.getenv("NER_WORKERS", NER_WORKERS_DEFAULT))
+
+
+def get_ner_batch_size() -> int:
+    return int(os.getenv("NER_BATCH_SIZE", NER_BATCH_SIZE_DEFAULT))
+
+
+def get_ner_cache_size() -> int:
+    return int(os.getenv("NER_CACHE_SIZE", NER_CACHE_SIZE_DEFAULT))
+
+
+def get_entity_plan_mode() -> str:
+    return os.getenv("ENTITY_PLAN_MODE", ENTITY_PLAN_MODE_DEFAULT).strip().lower()
+
+
+def get_ner_timeout_ms() -> int:
+    return int(os.getenv("NER_TIMEOUT_MS", NER_TIMEOUT_MS_DEFAULT))
+
+
+def get_pipeline_mode() -> str:
+    return os.getenv("PIPELINE_MODE", PIPELINE_MODE_DEFAULT).strip().lower()
+
+
+def get_pipeline_workers() -> int:
+    return int(os.getenv("PIPELINE_WORKERS", PIPELINE_WORKERS_DEFAULT))
+
+
+def get_nlu_reload_interval() -> float:
+    return float(os.getenv("NLU_RELOAD_INTERVAL", NLU_RELOAD_INTERVAL_DEFAULT))
+
+
 def get_context_history_limit() -> int:
     return int(os.getenv("CONTEXT_HISTORY_LIMIT", CONTEXT_HISTORY_LIMIT_DEFAULT))
 
@@ -5,15 +5,17 @@ warnings.filterwarnings("ignore", category=SyntaxWarning)
 import logging
 import os
 import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from collections import defaultdict
 from time import time
 
 from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
-from config import get_cors_origins, get_cors_allow_credentials, get_log_level
+from config import get_cors_origins, get_cors_allow_credentials, get_log_level, get_nlp_warmup
 from constants import Validation, ErrorMessage, SuccessMessage
 from exceptions import ChatbotException, APIException, NLPException, DataException
 from models import AdvancedChatRequest, ContextRequest, create_success_response
@@ -34,7 +36,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="HUCE Chatbot API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warmup khi server khởi động, không phải lúc import: import main (test, công cụ) không nạp model NER
+    if get_nlp_warmup():
+        timings = await run_in_threadpool(nlp.warmup)
+        import_ms = sum(v for k, v in timings.items() if k.endswith("_import_ms"))
+        load_ms = sum(v for k, v in timings.items() if k.endswith("_model_load_ms"))
+        logger.info("Warmup NLP: import %.1f ms, nạp model %.1f ms (%s)", import_ms, load_ms, timings)
+    yield
+
+
+app = FastAPI(title="HUCE Chatbot API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -161,6 +175,7 @@ async def health_check():
                 "nlp": nlp_status,
                 "data": data_status,
             },
+            "nlp_stats": nlp.get_stats() if nlp else {},
             "version": "1.0.0"
         }
     except Exception as e:
@@ -207,7 +222,8 @@ async def advanced_chat(req: AdvancedChatRequest):
         use_context = req.use_context if req.use_context is not None else True
 
         current_context = nlp.get_context(session_id) if use_context else {}
-        result = nlp.handle_message(req.message, current_context)
+        # Tokenize/NER chạy đồng bộ: đẩy sang threadpool để không chặn event loop
+        result = await run_in_threadpool(nlp.handle_message, req.message, current_context)
         analysis, response = result["analysis"], result["response"]
 
         logger.info(
@@ -0,0 +1,80 @@
+from collections import deque
+from typing import Dict, Iterator, List, Sequence, Set, Tuple
+
+
+class AhoCorasick:
+    def __init__(self, patterns: Sequence[str]) -> None:
+        self.patterns = list(patterns)
+        self.lengths = [len(p) for p in self.patterns]
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        # Id các pattern kết thúc tại mỗi trạng thái, đã gộp theo chuỗi fail
+        self.out: List[Tuple[int, ...]] = [()]
+
+        own: List[List[int]] = [[]]
+        for pid, pat in enumerate(self.patterns):
+            if not pat:
+                continue
+            state = 0
+            for ch in pat:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                    own.append([])
+                state = nxt
+            own[state].append(pid)
+
+        queue = deque(self.goto[0].values())
+        for state in queue:
+            self.out[state] = tuple(own[state])
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = tuple(own[nxt]) + self.out[self.fail[nxt]]
+                queue.append(nxt)
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        # (vị trí kết thúc, id pattern) theo thứ tự quét trái sang phải
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pid in out[state]:
+                yield end, pid
+
+    def iter_token_matches(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        # (đầu, cuối, id pattern) chỉ với cụm nằm trọn giữa các dấu cách: văn bản và pattern
+        # đã chuẩn hóa nên token luôn cách nhau đúng một dấu cách
+        n, lengths = len(text), self.lengths
+        for end, pid in self.iter_matches(text):
+            if end < n and text[end] != " ":
+                continue
+            start = end - lengths[pid]
+            if start and text[start - 1] != " ":
+                continue
+            yield start, end, pid
+
+    def matched_ids(self, text: str) -> List[int]:
+        goto, fail, out = self.goto, self.fail, self.out
+        found: Set[int] = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return sorted(found)
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+ARTIFACT_MAGIC = b"HUCEINTM"
+ARTIFACT_VERSION = 3
+
+_PREAMBLE = struct.Struct("<8sII")
+
+
+def compute_data_key(paths: Iterable[str], extra: str = "") -> str:
+    h = hashlib.sha256()
+    h.update(f"v{ARTIFACT_VERSION}|{extra}".encode("utf-8"))
+    for path in paths:
+        h.update(b"\0" + os.path.basename(path).encode("utf-8") + b"\0")
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+    return h.hexdigest()
+
+
+def _aligned(arrays: List[array]) -> List[array]:
+    # Chèn một uint32 đệm trước mảng float64 để nó bắt đầu ở biên 8 byte (header đã căn 8 byte)
+    out: List[array] = []
+    offset = 0
+    for arr in arrays:
+        if arr.itemsize == 8 and offset % 8:
+            out.append(array("I", [0]))
+            offset += 4
+        out.append(arr)
+        offset += arr.itemsize * len(arr)
+    return out
+
+
+def write_artifact(
+        path: str,
+        key: str,
+        idf: Mapping[str, float],
+        centroids: Mapping[str, Mapping[str, float]],
+        df: Optional[Mapping[str, int]] = None,
+        n_docs: int = 0,
+        centroid_sums: Optional[Mapping[str, Mapping[str, float]]] = None,
+) -> None:
+    vocab = sorted(idf)
+    term_ids = {t: i for i, t in enumerate(vocab)}
+    intents = list(centroids.keys())
+
+    # Trọng số lưu float64 để model nạp lại chấm điểm y hệt model vừa huấn luyện
+    idf_arr = array("d", (idf[t] for t in vocab))
+    indptr = array("I", [0])
+    indices = array("I")
+    data = array("d")
+    for intent in intents:
+        row = sorted((term_ids[t], w) for t, w in centroids[intent].items() if t in term_ids)
+        indices.extend(i for i, _ in row)
+        data.extend(w for _, w in row)
+        indptr.append(len(indices))
+
+    # DF, số câu và tổng vector chưa chuẩn hóa: model nạp từ artifact vẫn cập nhật tăng dần được
+    arrays: List[array] = [idf_arr, indptr, indices, data]
+    trainable = False
+    if df is not None and centroid_sums is not None:
+        trainable = True
+        sums_indptr = array("I", [0])
+        sums_indices = array("I")
+        sums_data = array("d")
+        for intent in intents:
+            row = sorted((term_ids[t], w) for t, w in centroid_sums.get(intent, {}).items() if t in term_ids)
+            sums_indices.extend(i for i, _ in row)
+            sums_data.extend(w for _, w in row)
+            sums_indptr.append(len(sums_indices))
+        arrays += [array("I", (df.get(t, 0) for t in vocab)), sums_indptr, sums_indices, sums_data]
+
+    header = json.dumps(
+        {
+            "key": key, "byteorder": sys.byteorder, "intents": intents, "vocab": vocab,
+            "trainable": trainable, "n_docs": n_docs,
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+    header += b" " * (-(_PREAMBLE.size + len(header)) % 8)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(ARTIFACT_MAGIC, ARTIFACT_VERSION, len(header)))
+        f.write(header)
+        for arr in _aligned(arrays):
+            arr.tofile(f)
+    os.replace(tmp_path, path)
+
+
+class CompiledIntentModel:
+    # Bộ đệm nhị phân của model đã huấn luyện: đọc cả file một lần rồi dựng lại dict cho IntentDetector,
+    # không cần tách từ lại intent.csv. Dữ liệu không được giữ lại sau khi dựng model
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._buf = buf = memoryview(f.read())
+
+        magic, version, header_len = _PREAMBLE.unpack_from(buf, 0)
+        if magic != ARTIFACT_MAGIC or version != ARTIFACT_VERSION:
+            self.close()
+            raise ValueError(f"Artifact không hợp lệ: {path}")
+
+        self._offset = _PREAMBLE.size
+        header = json.loads(bytes(buf[self._offset:self._offset + header_len]).decode("utf-8"))
+        if header.get("byteorder") != sys.byteorder:
+            self.close()
+            raise ValueError(f"Artifact khác byteorder: {path}")
+        self._offset += header_len
+
+        self.key: str = header["key"]
+        self.intents: List[str] = header["intents"]
+        self.vocab: List[str] = header["vocab"]
+
+        n_terms, n_rows = len(self.vocab), len(self.intents) + 1
+        self.idf = self._take(8, n_terms).cast("d")
+        self.indptr = self._take(4, n_rows).cast("I")
+        nnz = self.indptr[-1] if n_rows else 0
+        self.indices = self._take(4, nnz).cast("I")
+        self.data = self._take(8, nnz).cast("d")
+
+        self.n_docs: int = header.get("n_docs", 0)
+        self.trainable: bool = bool(header.get("trainable"))
+        if self.trainable:
+            self.df = self._take(4, n_terms).cast("I")
+            self.sums_indptr = self._take(4, n_rows).cast("I")
+            sums_nnz = self.sums_indptr[-1]
+            self.sums_indices = self._take(4, sums_nnz).cast("I")
+            self.sums_data = self._take(8, sums_nnz).cast("d")
+
+    def _take(self, size: int, count: int) -> memoryview:
+        # Mảng kế tiếp gồm count phần tử size byte, căn theo size
+        offset = self._offset + (-self._offset % size)
+        end = offset + size * count
+        if end > len(self._buf):
+            self.close()
+            raise ValueError(f"Artifact bị cắt cụt: {self.path}")
+        self._offset = end
+        return self._buf[offset:end]
+
+    def idf_dict(self) -> Dict[str, float]:
+        return dict(zip(self.vocab, self.idf.tolist()))
+
+    def centroid_dicts(self) -> Dict[str, Dict[str, float]]:
+        vocab = self.vocab
+        indices = self.indices.tolist()
+        data = self.data.tolist()
+        centroids: Dict[str, Dict[str, float]] = {}
+        for row, intent in enumerate(self.intents):
+            start, end = self.indptr[row], self.indptr[row + 1]
+            centroids[intent] = {vocab[indices[j]]: data[j] for j in range(start, end)}
+        return centroids
+
+    def training_state(self) -> Optional[Tuple[List[int], int, Dict[str, Dict[int, float]]]]:
+        # Id term theo thứ tự vocab của artifact, trùng với Vocabulary dựng từ idf_dict()
+        if not self.trainable:
+            return None
+        indices = self.sums_indices.tolist()
+        data = self.sums_data.tolist()
+        sums: Dict[str, Dict[int, float]] = {}
+        for row, intent in enumerate(self.intents):
+            start, end = self.sums_indptr[row], self.sums_indptr[row + 1]
+            sums[intent] = {indices[j]: data[j] for j in range(start, end)}
+        return self.df.tolist(), self.n_docs, sums
+
+    def close(self) -> None:
+        for name in ("idf", "indptr", "indices", "data", "df", "sums_indptr", "sums_indices", "sums_data"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        buf = self.__dict__.pop("_buf", None)
+        if buf is not None:
+            buf.release()
+
+
+def load_artifact(path: str, key: str) -> Optional[CompiledIntentModel]:
+    if not os.path.isfile(path):
+        return None
+    try:
+        model = CompiledIntentModel(path)
+    except (OSError, ValueError, TypeError, KeyError, struct.error):
+        return None
+    if model.key != key:
+        model.close()
+        return None
+    return model
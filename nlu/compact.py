@@ -0,0 +1,120 @@
+import bisect
+import heapq
+import math
+from array import array
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+from .vocab import Vocabulary
+
+
+def prune_centroid(centroid: Dict, top_k: int = 0, min_weight: float = 0.0) -> Dict:
+    if top_k <= 0 and min_weight <= 0.0:
+        return centroid
+
+    kept = [(t, w) for t, w in centroid.items() if w >= min_weight]
+    if 0 < top_k < len(kept):
+        kept = heapq.nlargest(top_k, kept, key=lambda item: item[1])
+    if len(kept) == len(centroid):
+        return centroid
+
+    # Chuẩn hóa lại để điểm cosine giữa các intent vẫn so sánh được
+    norm = math.sqrt(sum(w * w for _, w in kept)) or 1.0
+    return {t: w / norm for t, w in kept}
+
+
+class CompactCentroids(Mapping):
+    def __init__(self, centroids: Mapping[str, Dict[str, float]], vocab: Optional[Vocabulary] = None) -> None:
+        # Dùng chung id với vocab của IntentDetector để chấm điểm thẳng trên vector id của câu hỏi
+        if vocab is not None:
+            self.terms: List[str] = vocab.terms
+            self.term_ids: Dict[str, int] = vocab.term_ids
+        else:
+            self.terms = sorted({t for c in centroids.values() for t in c})
+            self.term_ids = {t: i for i, t in enumerate(self.terms)}
+        self.intents: List[str] = list(centroids.keys())
+
+        # Mỗi intent: term id tăng dần (để bisect) và trọng số float32 song song
+        self.ids: List[array] = []
+        self.weights: List[array] = []
+        for intent in self.intents:
+            row = sorted((self.term_ids[t], w) for t, w in centroids[intent].items())
+            self.ids.append(array("I", (i for i, _ in row)))
+            self.weights.append(array("f", (w for _, w in row)))
+        self._rows = {intent: i for i, intent in enumerate(self.intents)}
+
+    def __getitem__(self, intent: str) -> Dict[str, float]:
+        row = self._rows[intent]
+        terms = self.terms
+        return {terms[i]: w for i, w in zip(self.ids[row], self.weights[row].tolist())}
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.intents)
+
+    def __len__(self) -> int:
+        return len(self.intents)
+
+    def scores(self, q_vec: Dict[str, float]) -> List[Tuple[str, float]]:
+        term_ids = self.term_ids
+        return self.scores_ids({term_ids[t]: qw for t, qw in q_vec.items() if t in term_ids})
+
+    def scores_ids(self, q_vec: Dict[int, float]) -> List[Tuple[str, float]]:
+        query = sorted(q_vec.items())
+        results: List[Tuple[str, float]] = []
+        for intent, ids, weights in zip(self.intents, self.ids, self.weights):
+            s = 0.0
+            lo, n = 0, len(ids)
+            for tid, qw in query:
+                lo = bisect.bisect_left(ids, tid, lo, n)
+                if lo == n:
+                    break
+                if ids[lo] == tid:
+                    s += qw * weights[lo]
+            results.append((intent, s))
+        return results
+
+    def nnz(self) -> int:
+        return sum(len(ids) for ids in self.ids)
+
+    def nbytes(self) -> int:
+        return sum(ids.itemsize * len(ids) + ws.itemsize * len(ws) for ids, ws in zip(self.ids, self.weights))
+
+
+class CompactSamples:
+    def __init__(self, intent_samples: Mapping[str, Mapping[Tuple[str, ...], int]]) -> None:
+        term_ids: Dict[str, int] = {}
+        self.intents: List[str] = list(intent_samples.keys())
+
+        # Mỗi intent: token id nối liền, offsets theo câu và số lần lặp của từng câu
+        self.offsets: List[array] = []
+        self.token_ids: List[array] = []
+        self.counts: List[array] = []
+        for intent in self.intents:
+            offsets, ids, counts = array("I", [0]), array("I"), array("I")
+            for toks, count in intent_samples[intent].items():
+                ids.extend(term_ids.setdefault(t, len(term_ids)) for t in toks)
+                offsets.append(len(ids))
+                counts.append(count)
+            self.offsets.append(offsets)
+            self.token_ids.append(ids)
+            self.counts.append(counts)
+        self.terms: List[str] = list(term_ids)
+
+    def to_weighted(self) -> Dict[str, Dict[Tuple[str, ...], int]]:
+        terms = self.terms
+        result: Dict[str, Dict[Tuple[str, ...], int]] = {}
+        for intent, offsets, ids, counts in zip(self.intents, self.offsets, self.token_ids, self.counts):
+            samples = result[intent] = {}
+            for row, count in enumerate(counts):
+                toks = tuple(terms[i] for i in ids[offsets[row]:offsets[row + 1]])
+                samples[toks] = count
+        return result
+
+    def __len__(self) -> int:
+        return sum(sum(counts) for counts in self.counts)
+
+    def nbytes(self) -> int:
+        return sum(
+            arr.itemsize * len(arr)
+            for group in (self.offsets, self.token_ids, self.counts)
+            for arr in group
+        )
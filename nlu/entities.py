@@ -1,14 +1,90 @@
 import csv
 import json
+import logging
 import os
-from typing import Any, Dict, List, Set, Tuple, Optional
-
-from .preprocess import normalize_text
-
-try:
-    from underthesea import ner as uts_ner  # type: ignore
-except ImportError:
-    uts_ner = None  # type: ignore
+import threading
+import time
+from bisect import bisect_right
+from concurrent.futures import Executor, Future, TimeoutError as FutureTimeout
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Set, Tuple, Optional
+
+from .aho_corasick import AhoCorasick
+from .message import MessageLike, as_message
+from .ner_pool import NerWorkerPool
+from .preprocess import normalize_text, rewrite_synonyms
+from .synonyms import SynonymMatch, SynonymTrie
+from .textnorm import fold_ascii
+from .underthesea_loader import get_ner
+
+logger = logging.getLogger(__name__)
+
+NER_ALWAYS = "always"
+NER_NO_MAJOR = "no_major"
+NER_INTENTS = "intents"
+NER_NEVER = "never"
+NER_MODES = (NER_ALWAYS, NER_NO_MAJOR, NER_INTENTS, NER_NEVER)
+
+# Đã có một trong các nhãn này từ pattern/từ điển thì NER (LOC/ORG) gần như không thêm được gì
+NER_GATE_LABELS = frozenset({"MA_NGANH", "TEN_NGANH", "CHUYEN_NGANH", "MA_XET_TUYEN", "DON_VI_LIEN_HE"})
+
+# Nhãn ngành mà handle_intent_query đọc làm major_info
+_MAJOR_LABELS = frozenset({"MA_NGANH", "TEN_NGANH", "CHUYEN_NGANH"})
+
+ENTITY_PLAN_FULL = "full"
+ENTITY_PLAN_INTENT = "intent"
+ENTITY_PLAN_MODES = (ENTITY_PLAN_FULL, ENTITY_PLAN_INTENT)
+
+# File trong data_dir mà từ điển entity đọc (cùng với file pattern entity.json)
+ENTITY_DATA_FILES = (
+    "majors.csv",
+    "admission_methods.csv",
+    "tuition.csv",
+    "scholarships.csv",
+    "admission_scores.csv",
+    "admission_targets.csv",
+    "admissions_schedule.csv",
+    "contact_info.csv",
+    "cefr_conversion.csv",
+    "subject_combinations.csv",
+    "admission_conditions.csv",
+)
+
+# Ngành và năm luôn được trích xuất: handle_intent_query đọc cả hai với mọi intent và context giữ lại ngành
+_BASE_LABELS = frozenset({"MA_NGANH", "TEN_NGANH", "CHUYEN_NGANH", "MA_XET_TUYEN", "NAM_HOC"})
+
+# Nhãn mà handler của từng intent thực sự dùng; intent không có ở đây (kể cả fallback) trích xuất đầy đủ
+ENTITY_PLANS: Dict[str, FrozenSet[str]] = {
+    **dict.fromkeys(
+        ("hoi_diem_chuan", "hoi_hoc_phi", "hoi_chi_tieu", "hoi_dieu_kien", "hoi_nganh_hoc", "hoi_phuong_thuc",
+         "hoi_to_hop_mon", "hoi_khoi_thi", "hoi_hoc_bong", "hoi_kenh_nop_ho_so"),
+        _BASE_LABELS,
+    ),
+    "hoi_thoi_gian_dk": _BASE_LABELS | {"PHUONG_THUC_XET_TUYEN"},
+}
+
+ENTITY_LABEL_ALIAS: Dict[str, str] = {
+    "NAM_TUYEN_SINH": "NAM_HOC",
+    "NAM": "NAM_HOC",
+    "PHUONG_THUC_TUYEN_SINH": "PHUONG_THUC_XET_TUYEN",
+    "CHUNG_CHI": "CHUNG_CHI_UU_TIEN",
+    "TO_HOP": "TO_HOP_MON",
+    "KHOI_THI": "TO_HOP_MON",
+}
+
+
+def _canonical_label(label: str, norm_text: str) -> str:
+    label = ENTITY_LABEL_ALIAS.get(label, label)
+    if "điểm chuẩn" in norm_text:
+        return "DIEM_CHUAN"
+    return label
+
+
+def _pattern_label(label: str, norm_pat: str) -> str:
+    if "điểm sàn" in norm_pat:
+        label = "DIEM_SAN"
+    elif "điểm chuẩn" in norm_pat:
+        label = "DIEM_CHUAN"
+    return _canonical_label(label, norm_pat)
 
 
 def _load_entity_patterns(path: str) -> List[Tuple[str, str]]:
@@ -30,7 +106,88 @@ def _load_entity_patterns(path: str) -> List[Tuple[str, str]]:
     return patterns
 
 
+def _span(norm_text: str, start: int, end: int) -> Dict[str, int]:
+    # Vị trí ký tự và token (âm tiết) trong câu đã chuẩn hóa, end không tính
+    token_start = norm_text.count(" ", 0, start)
+    return {
+        "start": start,
+        "end": end,
+        "token_start": token_start,
+        "token_end": token_start + norm_text.count(" ", start, end) + 1,
+    }
+
+
+def _locate(norm_text: str, phrase: str) -> Mapping[str, Optional[int]]:
+    start = f" {norm_text} ".find(f" {phrase} ") if phrase else -1
+    if start < 0:
+        return {"start": None, "end": None, "token_start": None, "token_end": None}
+    return _span(norm_text, start, start + len(phrase))
+
+
+def _token_char_starts(tokens: List[str]) -> List[int]:
+    starts, pos = [], 0
+    for tok in tokens:
+        starts.append(pos)
+        pos += len(tok) + 1
+    starts.append(pos)
+    return starts
+
+
+def _spelling_key(text: str) -> str:
+    # Bỏ dấu và coi i/y như nhau: "quản lí" và "quản lý" là một tên
+    return fold_ascii(text).replace("y", "i")
+
+
+def _resolve_overlaps(entities: List[Dict[str, Any]], norm_text: str) -> List[Dict[str, Any]]:
+    # Giữ span dài nhất (bằng nhau thì span đứng trước); cùng đúng một span thì giữ mọi nhãn.
+    # Tên ngành nằm trọn trong span dài hơn vẫn giữ khi khớp nguyên văn ("kiến trúc" trong "kiến trúc kde"),
+    # hoặc khi là dạng chuẩn của alias đứng đầu một tên chỉ khác cách viết: handler tra dữ liệu theo tên đó
+    order = sorted(
+        range(len(entities)),
+        key=lambda i: (entities[i]["start"] - entities[i]["end"], entities[i]["start"]),
+    )
+    kept: List[Tuple[int, int]] = []
+    keep = [False] * len(entities)
+    for i in order:
+        ent = entities[i]
+        start, end = ent["start"], ent["end"]
+        overlaps = [
+            (k_start, k_end) for k_start, k_end in kept
+            if start < k_end and k_start < end and (k_start, k_end) != (start, end)
+        ]
+        nested = all(k_start <= start and end <= k_end for k_start, k_end in overlaps)
+        if overlaps and nested and ent["label"] in _MAJOR_LABELS:
+            if norm_text[start:end] == ent["text"] or all(
+                k_start == start and _spelling_key(norm_text[k_start:k_end]) == _spelling_key(ent["text"])
+                for k_start, k_end in overlaps
+            ):
+                overlaps = []
+        if not overlaps:
+            kept.append((start, end))
+            keep[i] = True
+    return [ent for ent, k in zip(entities, keep) if k]
+
+
+class EntityPlan:
+    # Automaton riêng cho một tập nhãn; id khớp được đổi về chỉ số trong bảng đầy đủ
+    def __init__(
+            self,
+            labels: Optional[FrozenSet[str]],
+            entity_patterns: List[Tuple[str, str]],
+            dict_phrases: List[Tuple[str, str]],
+    ) -> None:
+        self.labels = labels
+        self.pattern_ids = [i for i, (label, _) in enumerate(entity_patterns) if labels is None or label in labels]
+        self.dict_ids = [i for i, (label, _) in enumerate(dict_phrases) if labels is None or label in labels]
+        self.pattern_matcher = AhoCorasick([entity_patterns[i][1] for i in self.pattern_ids])
+        self.dict_matcher = AhoCorasick([dict_phrases[i][1] for i in self.dict_ids])
+
+    def __len__(self) -> int:
+        return len(self.pattern_ids) + len(self.dict_ids)
+
+
 def _extract_by_ner(text: str) -> List[Dict[str, Any]]:
+    uts_ner = get_ner()
     if uts_ner is None:
         return []
 
@@ -77,23 +234,134 @@ def _extract_by_ner(text: str) -> List[Dict[str, Any]]:
 
 
 class EntityExtractor:
-    def __init__(self, data_dir: str, patterns_path: str, synonym_map: Optional[Dict[str, str]] = None) -> None:
+    def __init__(
+            self,
+            data_dir: str,
+            patterns_path: str,
+            synonym_map: Optional[Mapping[str, str]] = None,
+            ner_mode: str = NER_ALWAYS,
+            ner_intents: Iterable[str] = (),
+            ner_workers: int = 0,
+            ner_batch_size: int = 8,
+            ner_cache_size: int = 1024,
+            plan_mode: str = ENTITY_PLAN_FULL,
+            ner_pool: Optional[NerWorkerPool] = None,
+    ) -> None:
         self.data_dir = data_dir
-        self.synonym_map = synonym_map or {}
-
-        self.entity_patterns: List[Tuple[str, str]] = _load_entity_patterns(
-            patterns_path
+        self.plan_mode = self._resolve_plan_mode(plan_mode)
+        self.ner_mode = self._resolve_ner_mode(ner_mode)
+        self.ner_intents = frozenset(ner_intents)
+        self._ner_counters: Dict[str, float] = dict.fromkeys(
+            ("requests", "ner_runs", "ner_skipped", "ner_timeouts", "ner_entities", "ner_contributed", "ner_ms"), 0
+        )
+        self._ner_lock = threading.Lock()
+        # Pool NER không phụ thuộc từ điển: bản dựng lại khi hot reload dùng tiếp pool cũ
+        self.ner_pool: Optional[NerWorkerPool] = ner_pool or (
+            NerWorkerPool(self._call_ner, ner_workers, ner_batch_size, ner_cache_size)
+            if ner_workers > 0 and self.ner_mode != NER_NEVER else None
+        )
+        # Dùng chung trie với pipeline để message chỉ phải thay đồng nghĩa một lần
+        self.synonym_map: SynonymTrie = (
+            synonym_map if isinstance(synonym_map, SynonymTrie) else SynonymTrie(synonym_map)
         )
 
-        self.dict_phrases: List[Tuple[str, str]] = self._load_dictionary_phrases()
+        # Nhãn cuối cùng được tính sẵn khi nạp: mỗi cặp (nhãn, cụm) cũng là khóa khử trùng lặp
+        self.entity_patterns: List[Tuple[str, str]] = [
+            (_pattern_label(label, pat), pat) for label, pat in _load_entity_patterns(patterns_path)
+        ]
 
-        self.entity_label_alias: Dict[str, str] = {
-            "NAM_TUYEN_SINH": "NAM_HOC",
-            "NAM": "NAM_HOC",
-            "PHUONG_THUC_TUYEN_SINH": "PHUONG_THUC_XET_TUYEN",
-            "CHUNG_CHI": "CHUNG_CHI_UU_TIEN",
-            "TO_HOP": "TO_HOP_MON",
-            "KHOI_THI": "TO_HOP_MON",
+        self.dict_phrases: List[Tuple[str, str]] = self._load_dictionary_phrases()
+        # Một automaton cho mỗi nguồn: quét câu một lượt thay vì thử `in` với từng cụm
+        self.full_plan = EntityPlan(None, self.entity_patterns, self.dict_phrases)
+        self.pattern_matcher = self.full_plan.pattern_matcher
+        self.dict_matcher = self.full_plan.dict_matcher
+        # Các intent cùng tập nhãn dùng chung một kế hoạch
+        plans_by_labels: Dict[FrozenSet[str], EntityPlan] = {}
+        self.plans: Dict[str, EntityPlan] = {}
+        if self.plan_mode == ENTITY_PLAN_INTENT:
+            for intent, labels in ENTITY_PLANS.items():
+                if labels not in plans_by_labels:
+                    plans_by_labels[labels] = EntityPlan(labels, self.entity_patterns, self.dict_phrases)
+                self.plans[intent] = plans_by_labels[labels]
+
+        self.entity_label_alias: Dict[str, str] = ENTITY_LABEL_ALIAS
+
+    @staticmethod
+    def _resolve_ner_mode(mode: str) -> str:
+        mode = (mode or NER_ALWAYS).strip().lower()
+        if mode not in NER_MODES:
+            logger.warning("NER mode không hợp lệ: %s, dùng '%s'", mode, NER_ALWAYS)
+            return NER_ALWAYS
+        return mode
+
+    @staticmethod
+    def _resolve_plan_mode(mode: str) -> str:
+        mode = (mode or ENTITY_PLAN_FULL).strip().lower()
+        if mode not in ENTITY_PLAN_MODES:
+            logger.warning("Entity plan mode không hợp lệ: %s, dùng '%s'", mode, ENTITY_PLAN_FULL)
+            return ENTITY_PLAN_FULL
+        return mode
+
+    def plan_for(self, intent: Optional[str]) -> EntityPlan:
+        return self.plans.get(intent or "", self.full_plan)
+
+    @staticmethod
+    def _call_ner(text: str) -> List[Dict[str, Any]]:
+        return _extract_by_ner(text)
+
+    def submit_ner(self, text: MessageLike, executor: Optional[Executor] = None) -> Optional[Future]:
+        # Chạy NER trước khi biết intent để song song với các bước khác; không có pool/executor thì None
+        msg = as_message(text, self.synonym_map)
+        if self.ner_mode == NER_NEVER:
+            return None
+        if self.ner_pool is not None:
+            return self.ner_pool.submit(msg.normalized, msg.raw)
+        if executor is not None:
+            return executor.submit(self._call_ner, msg.raw)
+        return None
+
+    def _should_run_ner(self, found: List[Dict[str, Any]], intent: Optional[str]) -> bool:
+        if self.ner_mode == NER_ALWAYS:
+            return True
+        if self.ner_mode == NER_NO_MAJOR:
+            return not any(e["label"] in NER_GATE_LABELS for e in found)
+        if self.ner_mode == NER_INTENTS:
+            return intent in self.ner_intents
+        return False
+
+    def _record_ner(
+            self, ran: bool, elapsed_ms: float, returned: int, contributed: int, timed_out: bool = False
+    ) -> None:
+        with self._ner_lock:
+            counters = self._ner_counters
+            counters["requests"] += 1
+            if ran:
+                counters["ner_runs"] += 1
+                counters["ner_timeouts"] += timed_out
+                counters["ner_ms"] += elapsed_ms
+                counters["ner_entities"] += returned
+                counters["ner_contributed"] += contributed
+            else:
+                counters["ner_skipped"] += 1
+
+    def ner_stats(self) -> Dict[str, Any]:
+        with self._ner_lock:
+            counters = dict(self._ner_counters)
+        runs = counters["ner_runs"]
+        return {
+            "mode": self.ner_mode,
+            "requests": counters["requests"],
+            "runs": runs,
+            "skipped": counters["ner_skipped"],
+            # Số lần NER quá hạn và câu trả lời chỉ dùng entity từ pattern/từ điển
+            "timeouts": counters["ner_timeouts"],
+            "run_rate": runs / counters["requests"] if counters["requests"] else 0.0,
+            # Số entity NER trả về và số entity có span không chồng lên kết quả pattern/từ điển
+            "entities": counters["ner_entities"],
+            "contributed": counters["ner_contributed"],
+            "avg_ms": round(counters["ner_ms"] / runs, 2) if runs else 0.0,
+            "total_ms": round(counters["ner_ms"], 1),
+            "pool": self.ner_pool.stats() if self.ner_pool is not None else None,
         }
 
     def _load_dictionary_phrases(self) -> List[Tuple[str, str]]:
@@ -364,86 +632,141 @@ class EntityExtractor:
         for lbl, phr in phrases:
             if not lbl or not phr:
                 continue
-            key = (lbl, phr)
+            key = (_canonical_label(lbl, phr), phr)
             if key in seen:
                 continue
             seen.add(key)
             cleaned.append(key)
         return cleaned
 
-    def _extract_by_patterns(self, norm_text: str) -> List[Dict[str, Any]]:
+    def _extract_by_patterns(self, norm_text: str, plan: Optional[EntityPlan] = None) -> List[Dict[str, Any]]:
+        plan = plan or self.full_plan
         found: List[Dict[str, Any]] = []
-        for label, pat in self.entity_patterns:
-            if pat and pat in norm_text:
-                norm_pat = normalize_text(pat)
-                fixed_label = label
-
-                if "điểm sàn" in norm_pat:
-                    fixed_label = "DIEM_SAN"
-                elif "điểm chuẩn" in norm_pat:
-                    fixed_label = "DIEM_CHUAN"
-
-                found.append({"label": fixed_label, "text": pat, "source": "pattern"})
+        hits = sorted(plan.pattern_matcher.iter_token_matches(norm_text), key=lambda h: (h[2], h[0]))
+        for start, end, pid in hits:
+            label, pat = self.entity_patterns[plan.pattern_ids[pid]]
+            found.append({"label": label, "text": pat, "source": "pattern", **_span(norm_text, start, end)})
         return found
 
-    def _extract_by_dictionaries(self, norm_text: str) -> List[Dict[str, Any]]:
+    def _extract_by_dictionaries(
+            self,
+            norm_text: str,
+            synonyms: Optional[Tuple[List[str], List[SynonymMatch]]] = None,
+            plan: Optional[EntityPlan] = None,
+    ) -> List[Dict[str, Any]]:
+        plan = plan or self.full_plan
         found: List[Dict[str, Any]] = []
+        seen: Set[Tuple[str, str]] = set()
 
-        for label, phrase in self.dict_phrases:
-            if phrase and phrase in norm_text:
-                found.append({"label": label, "text": phrase, "source": "dictionary"})
-
-        tokens = norm_text.split()
-        expanded_tokens = []
-
-        for token in tokens:
-            canonical = self.synonym_map.get(token, token)
-            expanded_tokens.append(canonical)
-
-        expanded_text = " ".join(expanded_tokens)
-
-        if expanded_text != norm_text:
-            for label, phrase in self.dict_phrases:
-                if phrase and phrase in expanded_text:
-                    already_found = any(
-                        e["label"] == label and e["text"] == phrase
-                        for e in found
-                    )
-                    if not already_found:
-                        found.append({"label": label, "text": phrase, "source": "dictionary"})
+        hits = sorted(plan.dict_matcher.iter_token_matches(norm_text), key=lambda h: (h[2], h[0]))
+        for start, end, pid in hits:
+            label, phrase = self.dict_phrases[plan.dict_ids[pid]]
+            seen.add((label, phrase))
+            found.append({"label": label, "text": phrase, "source": "dictionary", **_span(norm_text, start, end)})
+
+        if synonyms is None:
+            tokens = norm_text.split()
+            synonyms = tokens, rewrite_synonyms(tokens, self.synonym_map)[1]
+        tokens, matches = synonyms
+
+        if not matches:
+            return found
+
+        # Quét automaton một lần trên cả chuỗi đã thay đồng nghĩa; mỗi token của chuỗi đó nhớ
+        # khoảng token gốc để cụm lấy qua đồng nghĩa mang span của alias trong câu
+        rewritten: List[str] = []
+        origin: List[Tuple[int, int]] = []
+        by_start = {match[0]: match for match in matches}
+        i = 0
+        while i < len(tokens):
+            _, end, canonical = by_start.get(i, (i, i + 1, tokens[i]))
+            rewritten.append(canonical)
+            origin.append((i, end))
+            i = end
+        rewritten_starts = _token_char_starts(rewritten)
+        starts = _token_char_starts(tokens)
+
+        hits = sorted(plan.dict_matcher.iter_token_matches(" ".join(rewritten)), key=lambda h: (h[2], h[0]))
+        for start, end, pid in hits:
+            key = self.dict_phrases[plan.dict_ids[pid]]
+            if key in seen:
+                continue
+            seen.add(key)
+            first = bisect_right(rewritten_starts, start) - 1
+            last = bisect_right(rewritten_starts, end - 1) - 1
+            span = _span(norm_text, starts[origin[first][0]], starts[origin[last][1]] - 1)
+            found.append({"label": key[0], "text": key[1], "source": "dictionary", **span})
 
         return found
 
-    def extract(self, text: str) -> List[Dict[str, Any]]:
-        norm = normalize_text(text)
-
-        results: List[Dict[str, Any]] = []
-        results.extend(self._extract_by_patterns(norm))
-        results.extend(self._extract_by_dictionaries(norm))
-        results.extend(_extract_by_ner(text))
+    def extract(
+            self,
+            text: MessageLike,
+            intent: Optional[str] = None,
+            ner_future: Optional[Future] = None,
+            ner_timeout: Optional[float] = None,
+            executor: Optional[Executor] = None,
+    ) -> List[Dict[str, Any]]:
+        msg = as_message(text, self.synonym_map)
+        norm = msg.normalized
+
+        synonyms = None
+        if msg.synonym_map is self.synonym_map and " ".join(msg.tokens) == norm:
+            synonyms = msg.tokens, msg.synonym_rewrite[1]
+
+        # Intent đã được nhận diện trước: chỉ quét các nhãn mà handler của intent đó cần
+        plan = self.plan_for(intent)
+        results = _resolve_overlaps(
+            self._extract_by_patterns(norm, plan) + self._extract_by_dictionaries(norm, synonyms, plan), norm
+        )
+        ran_ner = self._should_run_ner(results, intent)
+        ner_found: List[Dict[str, Any]] = []
+        elapsed_ms = 0.0
+        timed_out = False
+        if ran_ner:
+            started = time.perf_counter()
+            if ner_future is None:
+                ner_future = self.submit_ner(msg, executor)
+            if ner_future is None:
+                ner_found = _extract_by_ner(msg.raw)
+            else:
+                try:
+                    ner_found = list(ner_future.result(ner_timeout))
+                except FutureTimeout:
+                    # Quá hạn: trả kết quả pattern/từ điển và hủy lượt NER chưa chạy để việc bỏ dở
+                    # không dồn lại trong hàng đợi; lượt đang chạy vẫn xong và vào cache cho lần sau
+                    ner_future.cancel()
+                    timed_out = True
+                    logger.debug("NER quá hạn %.0f ms, chỉ dùng entity từ điển", (ner_timeout or 0) * 1000)
+            elapsed_ms = (time.perf_counter() - started) * 1000
 
         seen: Set[Tuple[str, str]] = set()
         dedup: List[Dict[str, Any]] = []
 
+        # Pattern và cụm từ điển đã mang nhãn chuẩn và dạng chuẩn hóa từ lúc nạp
         for ent in results:
-            raw_label = (ent.get("label") or "").strip()
+            key = (ent["label"], ent["text"])
+            if key not in seen:
+                seen.add(key)
+                dedup.append(ent)
+
+        for ent in ner_found:
             raw_text = ent.get("text") or ""
             norm_t = normalize_text(raw_text)
-
-            canon_label = self.entity_label_alias.get(raw_label, raw_label)
-
-            if "điểm chuẩn" in norm_t:
-                canon_label = "DIEM_CHUAN"
-
-            key = (canon_label, norm_t)
+            key = (_canonical_label((ent.get("label") or "").strip(), norm_t), norm_t)
             if key not in seen:
                 seen.add(key)
-                dedup.append(
-                    {
-                        "label": canon_label,
-                        "text": raw_text,
-                        "source": ent.get("source"),
-                    }
-                )
-
+                # NER không trả vị trí: tìm cụm trong câu đã chuẩn hóa, không thấy thì để None
+                dedup.append({"label": key[0], "text": raw_text, "source": "ner", **_locate(norm, norm_t)})
+
+        # NER chỉ được tính là đóng góp khi span không chồng lên entity nào của pattern/từ điển
+        matched = [(e["start"], e["end"]) for e in dedup if e["source"] != "ner"]
+        contributed = sum(
+            1 for e in dedup
+            if e["source"] == "ner"
+            and (e["start"] is None or not any(e["start"] < end and start < e["end"] for start, end in matched))
+        )
+        self._record_ner(ran_ner, elapsed_ms, len(ner_found), contributed, timed_out)
+        if ran_ner:
+            logger.debug("NER: %d entity, thêm mới %d, %.1f ms", len(ner_found), contributed, elapsed_ms)
         return dedup
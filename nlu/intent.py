@@ -1,46 +1,89 @@
+import copy
+import logging
 import math
-from typing import Dict, List, Tuple
+import threading
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
 
-from .preprocess import tokenize_and_map
+from .artifact import CompiledIntentModel
+from .compact import CompactCentroids, CompactSamples, prune_centroid
+from .knn import DEFAULT_KNN_K, KnnIntentIndex
+from .message import MessageLike, NormalizedMessage
+from .preprocess import VI_STOPWORDS, drop_stopwords, rewrite_synonyms, tokenize_and_map
+from .sparse_index import SparseCentroidIndex, sparse_available
+from .tokenizer import TrieSegmenter
+from .vocab import Vocabulary
+
+logger = logging.getLogger(__name__)
 
 DEFAULT_INTENT_THRESHOLD = 0.3
+BATCH_CHUNK_SIZE = 256
+
+ENGINE_DICT = "dict"
+ENGINE_POSTINGS = "postings"
+ENGINE_SPARSE = "sparse"
+ENGINE_COMPACT = "compact"
+INTENT_ENGINES = (ENGINE_DICT, ENGINE_POSTINGS, ENGINE_SPARSE, ENGINE_COMPACT)
 
+MODE_CENTROID = "centroid"
+MODE_KNN = "knn"
+INTENT_MODES = (MODE_CENTROID, MODE_KNN)
 
-def _compute_idf(samples: List[List[str]]) -> Dict[str, float]:
-    df: Dict[str, int] = {}
-    n_docs = len(samples)
+WeightedSamples = Dict[Tuple[str, ...], int]
 
+
+def weigh_samples(samples: Union[WeightedSamples, Iterable[Sequence[str]]]) -> WeightedSamples:
+    if isinstance(samples, dict):
+        return samples
+    counts: WeightedSamples = {}
     for toks in samples:
-        seen = set(toks)
-        for t in seen:
-            df[t] = df.get(t, 0) + 1
+        key = tuple(toks)
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+IdVector = Dict[int, float]
+
+
+def _count_df(samples: Iterable[Tuple[Tuple[int, ...], int]], df: List[int]) -> int:
+    n_docs = 0
+    for ids, count in samples:
+        n_docs += count
+        for i in set(ids):
+            df[i] += count
+    return n_docs
 
-    idf: Dict[str, float] = {}
-    for t, c in df.items():
-        idf[t] = math.log((1 + n_docs) / (1 + c)) + 1.0
-    return idf
 
+def _idf_from_df(df: Sequence[int], n_docs: int) -> List[float]:
+    return [math.log((1 + n_docs) / (1 + c)) + 1.0 for c in df]
 
-def _tf(toks: List[str]) -> Dict[str, float]:
-    counts: Dict[str, int] = {}
-    for t in toks:
-        counts[t] = counts.get(t, 0) + 1
 
-    total = float(len(toks)) or 1.0
-    return {t: c / total for t, c in counts.items()}
+def _tfidf(ids: Sequence[int], total: int, idf: Sequence[float]) -> IdVector:
+    counts: Dict[int, int] = {}
+    for i in ids:
+        counts[i] = counts.get(i, 0) + 1
 
+    denom = float(total) or 1.0
+    vec = {i: c / denom * idf[i] for i, c in counts.items()}
+    norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+    return {i: v / norm for i, v in vec.items()}
 
-def _centroid(vecs: List[Dict[str, float]]) -> Dict[str, float]:
-    agg: Dict[str, float] = {}
-    for v in vecs:
+
+def _named(vec: IdVector, terms: Sequence[str]) -> Dict[str, float]:
+    return {terms[i]: w for i, w in vec.items()}
+
+
+def _accumulate(agg: IdVector, vecs: List[IdVector], counts: Sequence[int]) -> None:
+    for v, count in zip(vecs, counts):
         for k, val in v.items():
-            agg[k] = agg.get(k, 0.0) + val
+            agg[k] = agg.get(k, 0.0) + val * count
+
 
+def _normalized(agg: IdVector) -> IdVector:
     norm = math.sqrt(sum(v * v for v in agg.values())) or 1.0
     return {k: v / norm for k, v in agg.items()}
 
 
-def _cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
+def _cosine(a: IdVector, b: IdVector) -> float:
     if len(a) > len(b):
         a, b = b, a
 
@@ -55,49 +98,278 @@ def _cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
 class IntentDetector:
     def __init__(
             self,
-            intent_samples: Dict[str, List[List[str]]],
+            intent_samples: Mapping[str, Union[WeightedSamples, List[List[str]]]],
             intent_keyword_backoff: Dict[str, str],
             threshold: float = DEFAULT_INTENT_THRESHOLD,
+            engine: str = ENGINE_POSTINGS,
+            mode: str = MODE_CENTROID,
+            knn_k: int = DEFAULT_KNN_K,
+            compiled: Optional[CompiledIntentModel] = None,
+            centroid_top_k: int = 0,
+            centroid_min_weight: float = 0.0,
     ) -> None:
-        self.intent_samples = intent_samples
+        self.intent_samples: Dict[str, WeightedSamples] = {
+            intent: weigh_samples(samples) for intent, samples in intent_samples.items()
+        }
         self.threshold = threshold
+        self.engine = self._resolve_engine(engine)
+        self.mode = self._resolve_mode(mode)
+        self.knn_k = max(1, int(knn_k))
+        self.centroid_top_k = max(0, int(centroid_top_k))
+        self.centroid_min_weight = max(0.0, float(centroid_min_weight))
 
+        self.vocab = Vocabulary(stopwords=VI_STOPWORDS)
         self.idf: Dict[str, float] = {}
-        self.intent_centroids: Dict[str, Dict[str, float]] = {}
-        self._build_intent_centroids()
+        self.intent_centroids: Mapping[str, Dict[str, float]] = {}
+        self.intent_names: List[str] = []
+        self.postings: Dict[int, List[Tuple[int, float]]] = {}
+        self._idf_ids: List[float] = []
+        self._id_centroids: Dict[str, IdVector] = {}
+        self._sparse_index: Optional[SparseCentroidIndex] = None
+        self._compact_centroids: Optional[CompactCentroids] = None
+        self._knn_index: Optional[KnnIntentIndex] = None
 
-    def _tfidf_vec(self, toks: List[str]) -> Dict[str, float]:
-        tf = _tf(toks)
-        vec = {t: tf[t] * self.idf.get(t, 0.0) for t in tf}
-        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
-        return {t: v / norm for t, v in vec.items()}
+        self._df: List[int] = []
+        self._n_docs = 0
+        self._centroid_sums: Dict[str, IdVector] = {}
+        self._compact_samples: Optional[CompactSamples] = None
+        self._update_lock = threading.Lock()
 
-    def _build_intent_centroids(self) -> None:
-        all_samples: List[List[str]] = []
-        for samples in self.intent_samples.values():
-            all_samples.extend(samples)
+        if compiled is not None and self.mode == MODE_CENTROID:
+            idf = compiled.idf_dict()
+            vocab = Vocabulary(idf, VI_STOPWORDS)
+            self._set_model(vocab, list(idf.values()), compiled.centroid_dicts())
+            state = compiled.training_state()
+            if state is not None:
+                self._df, self._n_docs, self._centroid_sums = state
+        else:
+            self._build_intent_centroids()
 
-        self.idf = _compute_idf(all_samples) if all_samples else {}
+    def copy(self) -> "IntentDetector":
+        # Bản sao để cập nhật rồi hoán đổi: add_samples thay container thay vì sửa tại chỗ
+        clone = copy.copy(self)
+        clone._update_lock = threading.Lock()
+        if self._knn_index is not None:
+            clone._knn_index = self._knn_index.copy()
+        return clone
 
-        centroids: Dict[str, Dict[str, float]] = {}
-        for intent, samples in self.intent_samples.items():
-            vecs = [self._tfidf_vec(s) for s in samples]
-            centroids[intent] = _centroid(vecs) if vecs else {}
+    def training_state(self) -> Optional[Tuple[Dict[str, int], int, Dict[str, Dict[str, float]]]]:
+        # Trạng thái để ghi vào artifact cùng model: DF, số câu, tổng vector từng intent
+        if not self._centroid_sums:
+            return None
+        terms = self.vocab.terms
+        df = {terms[i]: c for i, c in enumerate(self._df)}
+        return df, self._n_docs, {intent: _named(agg, terms) for intent, agg in self._centroid_sums.items()}
 
+    @property
+    def trainable(self) -> bool:
+        return (
+            bool(self._centroid_sums)
+            or self._compact_samples is not None
+            or not self.intent_centroids
+        )
+
+    @staticmethod
+    def _resolve_engine(engine: str) -> str:
+        engine = (engine or ENGINE_POSTINGS).strip().lower()
+        if engine not in INTENT_ENGINES:
+            logger.warning("Intent engine không hợp lệ: %s, dùng '%s'", engine, ENGINE_POSTINGS)
+            return ENGINE_POSTINGS
+        if engine == ENGINE_SPARSE and not sparse_available():
+            logger.warning("Thiếu numpy/scipy cho intent engine '%s', dùng '%s'", engine, ENGINE_POSTINGS)
+            return ENGINE_POSTINGS
+        return engine
+
+    @staticmethod
+    def _resolve_mode(mode: str) -> str:
+        mode = (mode or MODE_CENTROID).strip().lower()
+        if mode not in INTENT_MODES:
+            logger.warning("Intent mode không hợp lệ: %s, dùng '%s'", mode, MODE_CENTROID)
+            return MODE_CENTROID
+        return mode
+
+    def _query_vec(self, toks: Sequence[str]) -> IdVector:
+        # Đọc vocab trước idf: _set_model gán _idf_ids trước vocab nên id của vocab đã đọc luôn có trong bảng idf
+        vocab = self.vocab
+        ids, total = vocab.encode(toks)
+        return _tfidf(ids, total, self._idf_ids)
+
+    def _tfidf_vec(self, toks: Sequence[str]) -> Dict[str, float]:
+        return _named(self._query_vec(toks), self.vocab.terms)
+
+    def _prune(self, centroid: IdVector) -> IdVector:
+        return prune_centroid(centroid, self.centroid_top_k, self.centroid_min_weight)
+
+    def _set_model(self, vocab: Vocabulary, idf: List[float], centroids: Mapping[str, Dict[str, float]]) -> None:
+        # Bảng idf mới (dài hơn hoặc bằng) phải có trước vocab mới, xem _query_vec
+        self._idf_ids = idf
+        self.idf = dict(zip(vocab.terms, idf))
+        self.vocab = vocab
         self.intent_centroids = centroids
+        self._build_indexes()
 
-    def detect(
-            self, text: str, synonym_map: Dict[str, str], normalize_for_kw_fn
-    ) -> Tuple[str, float]:
-        q_tokens = tokenize_and_map(text, synonym_map)
-        q_vec = self._tfidf_vec(q_tokens)
+    def _build_intent_centroids(self) -> None:
+        vocab = Vocabulary(stopwords=VI_STOPWORDS)
+        encoded = {
+            intent: {vocab.intern_all(toks): count for toks, count in samples.items()}
+            for intent, samples in self.intent_samples.items()
+        }
+        df = [0] * len(vocab)
+        n_docs = _count_df((item for samples in encoded.values() for item in samples.items()), df)
+        idf = _idf_from_df(df, n_docs)
+
+        sums: Dict[str, IdVector] = {}
+        centroids: Dict[str, Dict[str, float]] = {}
+        knn_samples: List[Tuple[int, Dict[str, float]]] = []
+        for idx, (intent, samples) in enumerate(encoded.items()):
+            vecs = [_tfidf(ids, len(ids), idf) for ids in samples]
+            sums[intent] = {}
+            _accumulate(sums[intent], vecs, list(samples.values()))
+            centroids[intent] = _named(self._prune(_normalized(sums[intent])), vocab.terms) if vecs else {}
+            if self.mode == MODE_KNN:
+                for v, count in zip(vecs, samples.values()):
+                    knn_samples.extend([(idx, _named(v, vocab.terms))] * count)
+
+        self._df, self._n_docs = df, n_docs
+        self._centroid_sums = sums
+        self._set_model(vocab, idf, centroids)
+        self._knn_index = (
+            KnnIntentIndex(self.intent_names, knn_samples) if self.mode == MODE_KNN else None
+        )
+
+    def add_samples(
+            self,
+            intent: str,
+            utterances: Sequence[str],
+            synonym_map: Optional[Mapping[str, str]] = None,
+            segmenter: Optional[TrieSegmenter] = None,
+    ) -> int:
+        if not self.trainable:
+            raise RuntimeError("Intent model được nạp từ artifact, cần huấn luyện lại trước khi cập nhật")
 
+        token_lists = (tokenize_and_map(u, synonym_map or {}, segmenter=segmenter) for u in utterances)
+        new_samples = weigh_samples(toks for toks in token_lists if toks)
+        if not new_samples:
+            return 0
+
+        with self._update_lock:
+            self._rehydrate()
+            # Bản sao vocab: request đang chạy vẫn đọc bản cũ, id cũ giữ nguyên nên dùng chung được
+            vocab = self.vocab.copy()
+            encoded = {vocab.intern_all(toks): count for toks, count in new_samples.items()}
+            df = self._df + [0] * (len(vocab) - len(self._df))
+            n_docs = self._n_docs + _count_df(encoded.items(), df)
+            idf = _idf_from_df(df, n_docs)
+
+            # Các centroid khác giữ trọng số theo IDF cũ; gọi retrain() để tính lại toàn bộ
+            vecs = [_tfidf(ids, len(ids), idf) for ids in encoded]
+            agg = dict(self._centroid_sums.get(intent, {}))
+            _accumulate(agg, vecs, list(encoded.values()))
+
+            samples = dict(self.intent_samples.get(intent, {}))
+            for toks, count in new_samples.items():
+                samples[toks] = samples.get(toks, 0) + count
+
+            centroids = dict(self.intent_centroids)
+            centroids[intent] = _named(self._prune(_normalized(agg)), vocab.terms)
+            self._df, self._n_docs = df, n_docs
+            self._centroid_sums = {**self._centroid_sums, intent: agg}
+            self.intent_samples = {**self.intent_samples, intent: samples}
+            self._set_model(vocab, idf, centroids)
+
+            if self._knn_index is not None:
+                idx = self.intent_names.index(intent)
+                for v, count in zip(vecs, encoded.values()):
+                    for _ in range(count):
+                        self._knn_index.add(idx, _named(v, vocab.terms))
+
+        return sum(new_samples.values())
+
+    def retrain(self) -> None:
+        with self._update_lock:
+            if self._compact_samples is not None:
+                self._rehydrate()
+            else:
+                self._build_intent_centroids()
+
+    def release_samples(self, compact: bool = False) -> None:
+        with self._update_lock:
+            if compact and self.intent_samples:
+                self._compact_samples = CompactSamples(self.intent_samples)
+            self.intent_samples = {}
+            self._centroid_sums = {}
+            self._df = []
+
+    def _rehydrate(self) -> None:
+        if self._compact_samples is None:
+            return
+        self.intent_samples = self._compact_samples.to_weighted()
+        self._compact_samples = None
+        self._build_intent_centroids()
+
+    def _build_indexes(self) -> None:
+        centroids = self.intent_centroids
+        intent_names = list(centroids.keys())
+        term_ids = self.vocab.term_ids
+
+        postings: Dict[int, List[Tuple[int, float]]] = {}
+        id_centroids: Dict[str, IdVector] = {}
+        compact = None
+        if self.engine == ENGINE_COMPACT:
+            if isinstance(centroids, CompactCentroids):
+                compact = centroids
+            else:
+                compact = CompactCentroids(centroids, self.vocab)
+            centroids = self.intent_centroids = compact
+        elif self.engine == ENGINE_POSTINGS:
+            for idx, intent in enumerate(intent_names):
+                for t, w in centroids[intent].items():
+                    postings.setdefault(term_ids[t], []).append((idx, w))
+        elif self.engine == ENGINE_DICT:
+            id_centroids = {
+                intent: {term_ids[t]: w for t, w in centroid.items()}
+                for intent, centroid in centroids.items()
+            }
+
+        self._sparse_index = None
+        if self.engine == ENGINE_SPARSE:
+            # Engine sparse chỉ giữ ma trận CSR; intent_centroids là view đọc từ ma trận
+            self._sparse_index = self.intent_centroids = SparseCentroidIndex(self.idf, centroids)
+        self._compact_centroids = compact
+        self.intent_names = intent_names
+        self.postings = postings
+        self._id_centroids = id_centroids
+        if self._knn_index is not None:
+            self._knn_index.intent_names = intent_names
+
+    def _score_intents(self, q_tokens: List[str]) -> Iterable[Tuple[str, float]]:
+        if self._knn_index is not None:
+            return self._knn_index.vote(self._tfidf_vec(q_tokens), self.knn_k).items()
+
+        if self._sparse_index is not None:
+            scores = self._sparse_index.scores(drop_stopwords(q_tokens))
+            return zip(self._sparse_index.intents, scores.tolist())
+
+        q_vec = self._query_vec(q_tokens)
+        if self._compact_centroids is not None:
+            return self._compact_centroids.scores_ids(q_vec)
+
+        if self.engine == ENGINE_POSTINGS:
+            acc: Dict[int, float] = {}
+            for t, qw in q_vec.items():
+                for idx, w in self.postings.get(t, ()):
+                    acc[idx] = acc.get(idx, 0.0) + qw * w
+            return ((self.intent_names[idx], score) for idx, score in sorted(acc.items()))
+
+        return (
+            (intent, _cosine(q_vec, centroid))
+            for intent, centroid in self._id_centroids.items()
+        )
+
+    def _pick_best(self, scores: Iterable[Tuple[str, float]]) -> Tuple[str, float]:
         best_intent = ""
         best_score = 0.0
-        for intent, centroid in self.intent_centroids.items():
-            score = (
-                    _cosine(q_vec, centroid)
-            )
+        for intent, score in scores:
             if score > best_score:
                 best_score = score
                 best_intent = intent
@@ -105,3 +377,48 @@ class IntentDetector:
         if best_intent and best_score >= self.threshold:
             return best_intent, best_score
         return "fallback", best_score
+
+    @staticmethod
+    def _query_tokens(
+            text: MessageLike, synonym_map: Mapping[str, str], segmenter: Optional[TrieSegmenter] = None
+    ) -> List[str]:
+        # Stopword được lọc khi mã hóa id (Vocabulary.codes), không cần lọc trước
+        if isinstance(text, NormalizedMessage):
+            if text.synonym_map is synonym_map:
+                return text.synonym_rewrite[0]
+            return rewrite_synonyms(text.tokens, synonym_map)[0]
+        return tokenize_and_map(text, synonym_map, segmenter=segmenter)
+
+    def detect(
+            self,
+            text: MessageLike,
+            synonym_map: Mapping[str, str],
+            normalize_for_kw_fn,
+            segmenter: Optional[TrieSegmenter] = None,
+    ) -> Tuple[str, float]:
+        q_tokens = self._query_tokens(text, synonym_map, segmenter)
+        return self._pick_best(self._score_intents(q_tokens))
+
+    def detect_many(
+            self,
+            texts: Sequence[str],
+            synonym_map: Mapping[str, str],
+            normalize_for_kw_fn,
+            segmenter: Optional[TrieSegmenter] = None,
+    ) -> List[Tuple[str, float]]:
+        unique: Dict[str, int] = {}
+        for text in texts:
+            unique.setdefault(text, len(unique))
+        token_lists = [tokenize_and_map(text, synonym_map, segmenter=segmenter) for text in unique]
+
+        if self._sparse_index is not None and self._knn_index is None:
+            results: List[Tuple[str, float]] = []
+            intents = self._sparse_index.intents
+            for start in range(0, len(token_lists), BATCH_CHUNK_SIZE):
+                chunk = token_lists[start:start + BATCH_CHUNK_SIZE]
+                matrix = self._sparse_index.scores_many(chunk)
+                results.extend(self._pick_best(zip(intents, col)) for col in matrix.T.tolist())
+        else:
+            results = [self._pick_best(self._score_intents(toks)) for toks in token_lists]
+
+        return [results[unique[text]] for text in texts]
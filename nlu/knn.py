@@ -0,0 +1,116 @@
+import bisect
+import heapq
+import math
+from typing import Dict, List, Tuple
+
+DEFAULT_KNN_K = 15
+SEED_TERMS = 3
+
+
+class KnnIntentIndex:
+    def __init__(self, intent_names: List[str], samples: List[Tuple[int, Dict[str, float]]]) -> None:
+        self.intent_names = intent_names
+        self.doc_intents: List[int] = []
+        self.doc_vecs: List[Dict[str, float]] = []
+
+        postings: Dict[str, List[Tuple[float, int]]] = {}
+        for intent_idx, vec in samples:
+            if not vec:
+                continue
+            doc_id = len(self.doc_vecs)
+            self.doc_intents.append(intent_idx)
+            self.doc_vecs.append(vec)
+            for t, w in vec.items():
+                postings.setdefault(t, []).append((-w, doc_id))
+
+        # Mỗi postings sắp theo trọng số giảm dần: (doc_ids, -weights) để bisect
+        self.postings: Dict[str, Tuple[List[int], List[float]]] = {}
+        for t, plist in postings.items():
+            plist.sort()
+            self.postings[t] = ([d for _, d in plist], [nw for nw, _ in plist])
+
+    def add(self, intent_idx: int, vec: Dict[str, float]) -> None:
+        if not vec:
+            return
+        doc_id = len(self.doc_vecs)
+        self.doc_vecs.append(vec)
+        self.doc_intents.append(intent_idx)
+        for t, w in vec.items():
+            doc_ids, neg_weights = self.postings.get(t, ([], []))
+            pos = bisect.bisect_right(neg_weights, -w)
+            self.postings[t] = (
+                doc_ids[:pos] + [doc_id] + doc_ids[pos:],
+                neg_weights[:pos] + [-w] + neg_weights[pos:],
+            )
+
+    def copy(self) -> "KnnIntentIndex":
+        # add() chỉ nối list và thay tuple postings nên sao chép nông là đủ
+        clone = KnnIntentIndex(list(self.intent_names), [])
+        clone.doc_intents = list(self.doc_intents)
+        clone.doc_vecs = list(self.doc_vecs)
+        clone.postings = dict(self.postings)
+        return clone
+
+    def __len__(self) -> int:
+        return len(self.doc_vecs)
+
+    def search(self, q_vec: Dict[str, float], k: int = DEFAULT_KNN_K) -> List[Tuple[int, float]]:
+        terms = sorted(
+            ((-self.postings[t][1][0] * qw, t, qw) for t, qw in q_vec.items() if t in self.postings),
+            reverse=True,
+        )
+
+        # Chấm điểm đầy đủ vài ứng viên đầu postings để có sẵn cận dưới cho điểm thứ k
+        seeds = {d for _, t, _ in terms[:SEED_TERMS] for d in self.postings[t][0][:k]}
+        seed_scores = [self._dot(q_vec, d) for d in seeds]
+        floor = heapq.nlargest(k, seed_scores)[-1] if len(seed_scores) >= k else 0.0
+
+        # Vector tài liệu có chuẩn 1: phần điểm từ các term chưa duyệt không vượt quá
+        # min(tổng cận trên từng term, ||q_chưa_duyệt||)
+        rest_ub = sum(ub for ub, _, _ in terms)
+        rest_sq = sum(qw * qw for _, _, qw in terms)
+
+        acc: Dict[int, float] = {}
+        for ub, t, qw in terms:
+            rest_ub -= ub
+            rest_sq = max(rest_sq - qw * qw, 0.0)
+            rest = min(rest_ub, math.sqrt(rest_sq))
+            doc_ids, neg_weights = self.postings[t]
+            if len(acc) >= k:
+                floor = max(floor, heapq.nlargest(k, acc.values())[-1])
+
+            # MaxScore: tài liệu mới ở term này đạt tối đa qw * w + rest điểm, nên chỉ nhận
+            # tài liệu mới có w >= min_w; phần đuôi chỉ cập nhật ứng viên sẵn có
+            min_w = (floor - rest) / qw if floor > rest else 0.0
+            cut = bisect.bisect_right(neg_weights, -min_w) if min_w > 0.0 else len(doc_ids)
+            for i in range(cut):
+                doc_id = doc_ids[i]
+                acc[doc_id] = acc.get(doc_id, 0.0) - qw * neg_weights[i]
+            if cut == len(doc_ids):
+                continue
+
+            if cut == 0:
+                acc = {d: s for d, s in acc.items() if s + ub + rest >= floor}
+            if len(doc_ids) - cut <= len(acc):
+                for i in range(cut, len(doc_ids)):
+                    doc_id = doc_ids[i]
+                    if doc_id in acc:
+                        acc[doc_id] -= qw * neg_weights[i]
+            else:
+                for doc_id in acc:
+                    w = self.doc_vecs[doc_id].get(t)
+                    if w is not None and w < min_w:
+                        acc[doc_id] += qw * w
+
+        return heapq.nlargest(k, acc.items(), key=lambda item: item[1])
+
+    def _dot(self, q_vec: Dict[str, float], doc_id: int) -> float:
+        vec = self.doc_vecs[doc_id]
+        return sum(qw * vec.get(t, 0.0) for t, qw in q_vec.items())
+
+    def vote(self, q_vec: Dict[str, float], k: int = DEFAULT_KNN_K) -> Dict[str, float]:
+        votes: Dict[str, float] = {}
+        for doc_id, score in self.search(q_vec, k):
+            intent = self.intent_names[self.doc_intents[doc_id]]
+            votes[intent] = votes.get(intent, 0.0) + score
+        return {intent: v / k for intent, v in votes.items()}
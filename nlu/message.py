@@ -0,0 +1,70 @@
+from functools import cached_property
+from typing import List, Mapping, Optional, Tuple, Union
+
+from .preprocess import drop_stopwords, rewrite_synonyms, segment
+from .synonyms import SynonymMatch
+from .textnorm import fold_ascii, normalize_text
+from .tokenizer import TrieSegmenter
+
+
+class NormalizedMessage:
+    def __init__(
+            self,
+            raw: str,
+            synonym_map: Optional[Mapping[str, str]] = None,
+            segmenter: Optional[TrieSegmenter] = None,
+    ) -> None:
+        self.raw = raw if isinstance(raw, str) else (str(raw) if raw is not None else "")
+        self.synonym_map = synonym_map if synonym_map is not None else {}
+        self.segmenter = segmenter
+
+    def __bool__(self) -> bool:
+        return bool(self.raw)
+
+    def __str__(self) -> str:
+        return self.raw
+
+    def __repr__(self) -> str:
+        return f"NormalizedMessage({self.raw!r})"
+
+    @cached_property
+    def lower(self) -> str:
+        return self.raw.lower()
+
+    @cached_property
+    def upper(self) -> str:
+        return self.raw.upper()
+
+    @cached_property
+    def normalized(self) -> str:
+        return normalize_text(self.raw)
+
+    @cached_property
+    def folded(self) -> str:
+        return fold_ascii(self.raw)
+
+    @cached_property
+    def tokens(self) -> List[str]:
+        return segment(self.normalized, segmenter=self.segmenter)
+
+    @cached_property
+    def synonym_rewrite(self) -> Tuple[List[str], List[SynonymMatch]]:
+        # Một lượt thay đồng nghĩa dùng chung cho intent (mapped_tokens) và entity (từ điển)
+        return rewrite_synonyms(self.tokens, self.synonym_map)
+
+    @cached_property
+    def mapped_tokens(self) -> List[str]:
+        return drop_stopwords(self.synonym_rewrite[0])
+
+
+MessageLike = Union[str, NormalizedMessage]
+
+
+def as_message(
+        text: MessageLike,
+        synonym_map: Optional[Mapping[str, str]] = None,
+        segmenter: Optional[TrieSegmenter] = None,
+) -> NormalizedMessage:
+    if isinstance(text, NormalizedMessage):
+        return text
+    return NormalizedMessage(text, synonym_map, segmenter)
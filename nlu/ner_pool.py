@@ -0,0 +1,182 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .lru import LRUCache
+
+logger = logging.getLogger(__name__)
+
+NerResult = List[Dict[str, Any]]
+LATENCY_WINDOW = 1024
+
+_STOP = None
+
+
+class NerWorkerPool:
+    def __init__(
+            self,
+            ner_fn: Callable[[str], NerResult],
+            workers: int = 1,
+            batch_size: int = 8,
+            cache_size: int = 1024,
+    ) -> None:
+        self._ner_fn = ner_fn
+        self.workers = max(1, int(workers))
+        self.batch_size = max(1, int(batch_size))
+        self.cache = LRUCache(cache_size)
+
+        self._queue: "queue.Queue[Optional[Tuple[str, str, float]]]" = queue.Queue()
+        # Future của từng request đang chờ theo khóa: request trùng câu dùng chung một lần gọi NER,
+        # request đã thôi chờ (hủy future) không giữ câu trong hàng đợi
+        self._pending: Dict[str, List[Future]] = {}
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._latencies_ms: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._counters: Dict[str, int] = dict.fromkeys(
+            ("submitted", "cache_hits", "coalesced", "dropped", "batches", "batched", "errors"), 0
+        )
+        self._max_queue_depth = 0
+
+    def _ensure_started(self) -> None:
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"ner-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, key: str, text: str) -> Future:
+        cached = self.cache.get(key)
+        with self._lock:
+            self._counters["submitted"] += 1
+            if cached is not None:
+                self._counters["cache_hits"] += 1
+                future: Future = Future()
+                future.set_result(cached)
+                return future
+
+            future = Future()
+            waiters = self._pending.get(key)
+            if waiters is not None:
+                self._counters["coalesced"] += 1
+                waiters.append(future)
+                return future
+
+            self._pending[key] = [future]
+            self._ensure_started()
+            self._queue.put((key, text, time.perf_counter()))
+            self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+        return future
+
+    def extract(self, key: str, text: str, timeout: Optional[float] = None) -> NerResult:
+        return list(self.submit(key, text).result(timeout))
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.put(_STOP)
+                return
+
+            # Gom các câu đang chờ thành một lô để xử lý trong cùng một lượt
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.put(_STOP)
+                    break
+                batch.append(item)
+            self._process(batch)
+
+    def _process(self, batch: List[Tuple[str, str, float]]) -> None:
+        with self._lock:
+            self._counters["batches"] += 1
+            self._counters["batched"] += len(batch)
+
+        for key, text, enqueued in batch:
+            with self._lock:
+                # Mọi request của câu này đã quá hạn và hủy: bỏ qua thay vì chạy NER cho không ai
+                if all(f.cancelled() for f in self._pending.get(key, ())):
+                    self._pending.pop(key, None)
+                    self._counters["dropped"] += 1
+                    continue
+
+            error: Optional[Exception] = None
+            result: NerResult = []
+            try:
+                result = self._ner_fn(text)
+                self.cache.put(key, result)
+            except Exception as e:  # luồng worker không được chết, lỗi trả về cho request
+                logger.warning("NER worker lỗi: %s", e)
+                error = e
+
+            with self._lock:
+                waiters = self._pending.pop(key, [])
+                self._latencies_ms.append((time.perf_counter() - enqueued) * 1000)
+                if error is not None:
+                    self._counters["errors"] += 1
+
+            for future in waiters:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        with self._lock:
+            threads, self._threads = self._threads, []
+        if not threads:
+            return
+        self._queue.put(_STOP)
+        for thread in threads:
+            thread.join(timeout)
+        # Bỏ tín hiệu dừng còn lại để pool có thể khởi động lại; câu chưa kịp chạy trả lỗi
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                with self._lock:
+                    waiters = self._pending.pop(item[0], [])
+                for future in waiters:
+                    if future.set_running_or_notify_cancel():
+                        future.set_exception(RuntimeError("NER worker pool đã dừng"))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            latencies = sorted(self._latencies_ms)
+            in_flight = len(self._pending)
+            max_depth = self._max_queue_depth
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 2)
+
+        return {
+            "workers": self.workers,
+            "batch_size": self.batch_size,
+            "queue_depth": self._queue.qsize(),
+            "max_queue_depth": max_depth,
+            "in_flight": in_flight,
+            **counters,
+            "avg_batch_size": round(counters["batched"] / counters["batches"], 2) if counters["batches"] else 0.0,
+            "latency_ms": {
+                "avg": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": percentile(1.0),
+            },
+            "cache": self.cache.stats(),
+        }
@@ -1,17 +1,12 @@
 import csv
+import logging
+import multiprocessing
 import os
-from typing import List, Dict, Tuple, Any, Optional
-
-try:
-    from underthesea import word_tokenize
-except ImportError:
-    def word_tokenize(text: str):
-        return text.split()
-
-try:
-    from underthesea import ner as uts_ner
-except ImportError:
-    uts_ner = None
+import time
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Tuple, Any, Iterable, Mapping, Optional, Sequence, Set
 
 try:
     from .preprocess import normalize_text as ext_normalize_text
@@ -21,18 +16,63 @@ except ImportError:
     ext_tokenize_and_map = None
 
 try:
-    from .intent import IntentDetector
+    from .intent import IntentDetector, MODE_CENTROID
+    from .artifact import compute_data_key, load_artifact, write_artifact
+    from .preprocess import TOKENIZER_BACKEND, VI_STOPWORDS, get_trie_segmenter
+    from .tokenizer import BACKEND_TRIE, BACKEND_UNDERTHESEA, LEXICON_FILE, TrieSegmenter, build_trie_segmenter
 except ImportError:
     IntentDetector = None
 
+from .message import MessageLike, NormalizedMessage, as_message
+from .reload import DataWatcher
+from .synonyms import SYNONYM_MATCHING, SynonymTrie
+from .underthesea_loader import load_timings, warmup as warmup_underthesea
+
 try:
-    from .entities import EntityExtractor
+    from .entities import ENTITY_DATA_FILES, NER_ALWAYS, NER_NEVER, EntityExtractor
 except ImportError:
     EntityExtractor = None
+    ENTITY_DATA_FILES = ()  # type: ignore
+
+from config import (
+    DATA_DIR,
+    get_intent_threshold,
+    get_intent_engine,
+    get_intent_mode,
+    get_intent_knn_k,
+    get_intent_artifact_path,
+    get_intent_artifact_enabled,
+    get_intent_tokenize_workers,
+    get_intent_centroid_top_k,
+    get_intent_centroid_min_weight,
+    get_intent_sample_retention,
+    get_entity_plan_mode,
+    get_ner_batch_size,
+    get_ner_cache_size,
+    get_ner_intents,
+    get_ner_mode,
+    get_ner_timeout_ms,
+    get_ner_workers,
+    get_pipeline_mode,
+    get_pipeline_workers,
+)
+
+logger = logging.getLogger(__name__)
 
-from config import DATA_DIR, get_intent_threshold
+# Giống nlu.intent.WeightedSamples; khai báo ở đây vì import intent phía trên là tùy chọn
+WeightedSamples = Dict[Tuple[str, ...], int]
 
 DEFAULT_INTENT_THRESHOLD = get_intent_threshold()
+PARALLEL_TOKENIZE_MIN_ROWS = 500
+
+SAMPLE_RETENTION_KEEP = "keep"
+SAMPLE_RETENTION_COMPACT = "compact"
+SAMPLE_RETENTION_DROP = "drop"
+SAMPLE_RETENTIONS = (SAMPLE_RETENTION_KEEP, SAMPLE_RETENTION_COMPACT, SAMPLE_RETENTION_DROP)
+
+PIPELINE_SEQUENTIAL = "sequential"
+PIPELINE_CONCURRENT = "concurrent"
+PIPELINE_MODES = (PIPELINE_SEQUENTIAL, PIPELINE_CONCURRENT)
 
 
 def _normalize_text(text) -> str:
@@ -43,6 +83,33 @@ def _normalize_text(text) -> str:
     return text.lower().strip()
 
 
+def _tokenize_chunk(args: Tuple[List[str], Mapping[str, str], Any]) -> List[Tuple[str, ...]]:
+    utterances, syn_map, segmenter = args
+    if ext_tokenize_and_map is None:
+        return [tuple(utt.split()) for utt in utterances]
+    # Corpus huấn luyện không đi qua LRU tách từ để không đẩy câu hỏi thực tế ra khỏi cache
+    return [tuple(ext_tokenize_and_map(utt, syn_map, cache=False, segmenter=segmenter)) for utt in utterances]
+
+
+def _tokenize_utterances(
+        utterances: List[str], syn_map: Mapping[str, str], workers: int = 0, segmenter=None
+) -> List[Tuple[str, ...]]:
+    if workers <= 1 or len(utterances) < PARALLEL_TOKENIZE_MIN_ROWS:
+        return _tokenize_chunk((utterances, syn_map, segmenter))
+
+    # Chia nhiều chunk hơn số worker để cân tải; map() giữ nguyên thứ tự chunk
+    size = max(1, -(-len(utterances) // (workers * 4)))
+    chunks = [(utterances[i:i + size], syn_map, segmenter) for i in range(0, len(utterances), size)]
+    try:
+        # spawn thay vì fork: fork từ tiến trình nhiều luồng (hot reload, NER pool) có thể sao chép lock đang bị giữ
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = list(pool.map(_tokenize_chunk, chunks))
+    except (OSError, BrokenProcessPool) as e:
+        logger.warning("Tách từ song song thất bại, chuyển sang tuần tự: %s", e)
+        return _tokenize_chunk((utterances, syn_map, segmenter))
+    return [toks for chunk in results for toks in chunk]
+
+
 def _load_synonyms(path: str) -> Dict[str, str]:
     mapping: Dict[str, str] = {}
     if not os.path.isfile(path):
@@ -63,51 +130,412 @@ def _load_synonyms(path: str) -> Dict[str, str]:
     return mapping
 
 
+class NLUSnapshot:
+    # Bộ cấu trúc NLU dựng từ một phiên bản dữ liệu; request đọc một snapshot từ đầu đến cuối
+    def __init__(
+            self,
+            version: int,
+            data_key: str,
+            syn_map: SynonymTrie,
+            intent_detector: Optional["IntentDetector"],
+            entity_extractor: Optional["EntityExtractor"],
+            intent_samples: Dict[str, WeightedSamples],
+            segmenter: Optional["TrieSegmenter"] = None,
+    ) -> None:
+        self.version = version
+        self.data_key = data_key
+        self.syn_map = syn_map
+        self.segmenter = segmenter
+        self.intent_detector = intent_detector
+        self.entity_extractor = entity_extractor
+        self.intent_samples = intent_samples
+        self.loaded_at = time.time()
+
+
 class NLPPipeline:
     def __init__(self, data_dir: str = DATA_DIR, intent_threshold: float = DEFAULT_INTENT_THRESHOLD) -> None:
         self.data_dir = data_dir
         self.intent_threshold = intent_threshold
-        self.syn_map = _load_synonyms(os.path.join(data_dir, "synonym.csv"))
-        self.intent_samples = self._load_intent_samples(os.path.join(data_dir, "intent.csv"))
+        self.pipeline_mode = self._resolve_pipeline_mode(get_pipeline_mode())
+        timeout_ms = get_ner_timeout_ms()
+        self.ner_timeout: Optional[float] = timeout_ms / 1000 if timeout_ms > 0 else None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[DataWatcher] = None
 
+        self._snapshot = self._build_snapshot(1)
 
-        self._intent_detector: Optional[IntentDetector] = (
-            IntentDetector(self.intent_samples, self.intent_threshold)
-            if IntentDetector is not None else None
+    @property
+    def snapshot(self) -> NLUSnapshot:
+        return self._snapshot
+
+    @property
+    def syn_map(self) -> SynonymTrie:
+        return self._snapshot.syn_map
+
+    @property
+    def segmenter(self) -> Optional["TrieSegmenter"]:
+        return self._snapshot.segmenter
+
+    @property
+    def intent_samples(self) -> Dict[str, WeightedSamples]:
+        return self._snapshot.intent_samples
+
+    @property
+    def _intent_detector(self) -> Optional["IntentDetector"]:
+        return self._snapshot.intent_detector
+
+    @property
+    def _entity_extractor(self) -> Optional["EntityExtractor"]:
+        return self._snapshot.entity_extractor
+
+    @staticmethod
+    def _resolve_pipeline_mode(mode: str) -> str:
+        if mode not in PIPELINE_MODES:
+            logger.warning("PIPELINE_MODE không hợp lệ: %s, dùng '%s'", mode, PIPELINE_SEQUENTIAL)
+            return PIPELINE_SEQUENTIAL
+        return mode
+
+    def _stage_executor(self) -> ThreadPoolExecutor:
+        # Executor dùng chung cho mọi request, tạo khi cần lần đầu
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(1, get_pipeline_workers()), thread_name_prefix="nlp-stage"
+                )
+            return self._executor
+
+    def _ner_executor(self) -> Optional[ThreadPoolExecutor]:
+        # NER chỉ chờ có hạn khi chạy ngoài luồng request: qua NER pool hoặc executor dùng chung
+        extractor = self._entity_extractor
+        if extractor is None or extractor.ner_pool is not None:
+            return None
+        if self.pipeline_mode == PIPELINE_CONCURRENT or self.ner_timeout is not None:
+            return self._stage_executor()
+        return None
+
+    def _intent_sources(self) -> List[str]:
+        sources = ["intent.csv", "synonym.csv"]
+        if TOKENIZER_BACKEND == BACKEND_TRIE:
+            sources += [LEXICON_FILE, "majors.csv", "entity.json"]
+        return sources
+
+    def data_files(self) -> List[str]:
+        names = self._intent_sources() + ["entity.json", *ENTITY_DATA_FILES]
+        return [os.path.join(self.data_dir, name) for name in dict.fromkeys(names)]
+
+    def intent_artifact_key(self) -> str:
+        return compute_data_key(
+            [os.path.join(self.data_dir, name) for name in self._intent_sources()],
+            extra=f"{TOKENIZER_BACKEND}|{SYNONYM_MATCHING}|{' '.join(sorted(VI_STOPWORDS))}"
+                  f"|{get_intent_centroid_top_k()}|{get_intent_centroid_min_weight()}",
         )
-        self._entity_extractor: Optional[EntityExtractor] = (
-            EntityExtractor(self.data_dir, os.path.join(data_dir, "entity.json"), self.syn_map)
-            if EntityExtractor is not None else None
+
+    def _new_intent_detector(self, samples: Dict[str, WeightedSamples], **kwargs) -> IntentDetector:
+        return IntentDetector(
+            samples,
+            intent_keyword_backoff={},
+            threshold=self.intent_threshold,
+            engine=get_intent_engine(),
+            mode=get_intent_mode(),
+            knn_k=get_intent_knn_k(),
+            centroid_top_k=get_intent_centroid_top_k(),
+            centroid_min_weight=get_intent_centroid_min_weight(),
+            **kwargs,
         )
 
-    def _load_intent_samples(self, path: str) -> Dict[str, List[List[str]]]:
-        intent_to_samples: Dict[str, List[List[str]]] = {}
+    def _build_intent_detector(
+            self, syn_map: SynonymTrie, segmenter: Optional["TrieSegmenter"] = None
+    ) -> Tuple[IntentDetector, Dict[str, WeightedSamples]]:
+        artifact_path = get_intent_artifact_path()
+        use_artifact = get_intent_artifact_enabled() and get_intent_mode() == MODE_CENTROID
+        key = self.intent_artifact_key() if use_artifact else ""
+
+        started = time.perf_counter()
+        compiled = load_artifact(artifact_path, key) if use_artifact else None
+        if compiled is not None:
+            try:
+                detector = self._new_intent_detector({}, compiled=compiled)
+            finally:
+                compiled.close()
+            logger.info("Nạp intent model từ %s trong %.1f ms", artifact_path,
+                        (time.perf_counter() - started) * 1000)
+            return detector, {}
+
+        samples = self.load_training_samples(syn_map, segmenter)
+        detector = self._new_intent_detector(samples)
+        logger.info("Huấn luyện intent model trong %.1f s", time.perf_counter() - started)
+
+        if use_artifact:
+            try:
+                self._write_intent_artifact(artifact_path, key, detector)
+                logger.info("Đã ghi intent model artifact: %s", artifact_path)
+            except OSError as e:
+                logger.warning("Không ghi được intent model artifact %s: %s", artifact_path, e)
+        return detector, samples
+
+    def _new_entity_extractor(self, syn_map: SynonymTrie, ner_pool=None) -> EntityExtractor:
+        return EntityExtractor(
+            self.data_dir,
+            os.path.join(self.data_dir, "entity.json"),
+            syn_map,
+            ner_mode=get_ner_mode(),
+            ner_intents=get_ner_intents(),
+            ner_workers=get_ner_workers(),
+            ner_batch_size=get_ner_batch_size(),
+            ner_cache_size=get_ner_cache_size(),
+            plan_mode=get_entity_plan_mode(),
+            ner_pool=ner_pool,
+        )
+
+    def _build_snapshot(
+            self, version: int, previous: Optional[NLUSnapshot] = None, changed: Optional[Set[str]] = None
+    ) -> NLUSnapshot:
+        # changed: tên file dữ liệu đã đổi; None = dựng lại tất cả
+        if previous is None or changed is None:
+            changed = set()
+            rebuild_all = True
+        else:
+            rebuild_all = "synonym.csv" in changed
+        rebuild_intent = rebuild_all or bool(changed & set(self._intent_sources()))
+        rebuild_entities = rebuild_all or bool(changed & {"entity.json", *ENTITY_DATA_FILES})
+
+        # Trie tách từ là một phần của snapshot: request đang chạy tách từ bằng trie cũ đến khi xong
+        segmenter = previous.segmenter if previous else None
+        if TOKENIZER_BACKEND == BACKEND_TRIE:
+            if previous is None:
+                segmenter = get_trie_segmenter(self.data_dir)
+            elif rebuild_all or changed & {LEXICON_FILE, "majors.csv", "entity.json"}:
+                segmenter = build_trie_segmenter(self.data_dir)
+
+        syn_map = (
+            previous.syn_map if previous is not None and not rebuild_all
+            else SynonymTrie(_load_synonyms(os.path.join(self.data_dir, "synonym.csv")))
+        )
+
+        detector, samples = (previous.intent_detector, previous.intent_samples) if previous else (None, {})
+        if rebuild_intent and IntentDetector is not None:
+            detector, samples = self._build_intent_detector(syn_map, segmenter)
+            samples = self._release_intent_samples(detector, samples)
+
+        extractor = previous.entity_extractor if previous else None
+        if rebuild_entities and EntityExtractor is not None:
+            # NER không phụ thuộc dữ liệu: dùng tiếp worker pool và cache kết quả của bản trước
+            extractor = self._new_entity_extractor(syn_map, extractor.ner_pool if extractor else None)
+
+        data_key = compute_data_key(self.data_files())[:12] if IntentDetector is not None else ""
+        return NLUSnapshot(version, data_key, syn_map, detector, extractor, samples, segmenter)
+
+    def reload(self, changed: Optional[Iterable[str]] = None) -> bool:
+        names = {os.path.basename(path) for path in changed} if changed is not None else None
+        with self._reload_lock:
+            old = self._snapshot
+            started = time.perf_counter()
+            try:
+                snapshot = self._build_snapshot(old.version + 1, old, names)
+            except Exception:
+                logger.exception("Hot reload NLU thất bại, tiếp tục dùng bản v%d", old.version)
+                return False
+            build_ms = (time.perf_counter() - started) * 1000
+
+            # Hoán đổi bằng một phép gán: request đang chạy giữ tham chiếu tới snapshot cũ đến khi xong
+            swapped = time.perf_counter()
+            self._snapshot = snapshot
+            swap_ms = (time.perf_counter() - swapped) * 1000
+
+        logger.info(
+            "Hot reload NLU v%d -> v%d (dữ liệu %s -> %s, file: %s): dựng %.1f ms, hoán đổi %.3f ms",
+            old.version, snapshot.version, old.data_key, snapshot.data_key,
+            ", ".join(sorted(names)) if names is not None else "tất cả", build_ms, swap_ms,
+        )
+        return True
+
+    def watch(self, interval: float) -> DataWatcher:
+        if self._watcher is None:
+            self._watcher = DataWatcher(self.data_files(), self.reload, interval).start()
+        return self._watcher
+
+    def stop_watching(self) -> None:
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def snapshot_info(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {"version": snapshot.version, "data_key": snapshot.data_key, "loaded_at": snapshot.loaded_at}
+
+    def compile_intent_model(self, artifact_path: Optional[str] = None) -> str:
+        artifact_path = artifact_path or get_intent_artifact_path()
+        detector = self._intent_detector
+        if detector is None or detector.mode != MODE_CENTROID or not self.intent_samples:
+            detector = IntentDetector(
+                self.intent_samples or self.load_training_samples(),
+                {},
+                centroid_top_k=get_intent_centroid_top_k(),
+                centroid_min_weight=get_intent_centroid_min_weight(),
+            )
+        key = self.intent_artifact_key()
+        self._write_intent_artifact(artifact_path, key, detector)
+        return key
+
+    @staticmethod
+    def _write_intent_artifact(artifact_path: str, key: str, detector: IntentDetector) -> None:
+        df, n_docs, sums = detector.training_state() or (None, 0, None)
+        write_artifact(artifact_path, key, detector.idf, detector.intent_centroids, df, n_docs, sums)
+
+    def add_intent_samples(self, intent: str, utterances: Sequence[str]) -> int:
+        with self._reload_lock:
+            old = self._snapshot
+            if old.intent_detector is None:
+                return 0
+            # Cập nhật trên bản sao rồi công bố snapshot mới như reload, không sửa snapshot đang chạy
+            if old.intent_detector.trainable:
+                detector = old.intent_detector.copy()
+            else:
+                detector = self._new_intent_detector(self.load_training_samples(old.syn_map, old.segmenter))
+            added = detector.add_samples(intent, utterances, old.syn_map, segmenter=old.segmenter)
+            if not added:
+                return 0
+            samples = self._release_intent_samples(detector, detector.intent_samples)
+            self._snapshot = NLUSnapshot(
+                old.version + 1, old.data_key, old.syn_map, detector, old.entity_extractor, samples, old.segmenter
+            )
+        return added
+
+    @staticmethod
+    def _release_intent_samples(
+            detector: Optional[IntentDetector], samples: Dict[str, WeightedSamples]
+    ) -> Dict[str, WeightedSamples]:
+        retention = get_intent_sample_retention()
+        if retention not in SAMPLE_RETENTIONS:
+            logger.warning("INTENT_SAMPLE_RETENTION không hợp lệ: %s, dùng '%s'", retention, SAMPLE_RETENTION_KEEP)
+            return samples
+        if retention == SAMPLE_RETENTION_KEEP or detector is None:
+            return samples
+        detector.release_samples(compact=retention == SAMPLE_RETENTION_COMPACT)
+        return {}
+
+    def load_training_samples(
+            self, syn_map: Optional[Mapping[str, str]] = None, segmenter: Optional["TrieSegmenter"] = None
+    ) -> Dict[str, WeightedSamples]:
+        return self._load_intent_samples(os.path.join(self.data_dir, "intent.csv"), syn_map, segmenter)
+
+    def _load_intent_samples(
+            self,
+            path: str,
+            syn_map: Optional[Mapping[str, str]] = None,
+            segmenter: Optional["TrieSegmenter"] = None,
+    ) -> Dict[str, WeightedSamples]:
+        if syn_map is None:
+            syn_map, segmenter = self.syn_map, self.segmenter
+        intent_to_samples: Dict[str, WeightedSamples] = {}
         if not os.path.isfile(path):
             return intent_to_samples
 
+        rows: List[Tuple[str, str]] = []
         with open(path, newline="", encoding="utf-8") as f:
             reader = csv.DictReader(f)
             for r in reader:
                 utt = _normalize_text(r.get("utterance") or "")
                 intent = (r.get("intent") or "").strip()
-                if not utt or not intent:
-                    continue
-                toks = ext_tokenize_and_map(utt, self.syn_map) if ext_tokenize_and_map else utt.split()
-                intent_to_samples.setdefault(intent, []).append(toks)
+                if utt and intent:
+                    rows.append((intent, utt))
+
+        utterances = list(dict.fromkeys(utt for _, utt in rows))
+        workers = get_intent_tokenize_workers()
+        started = time.perf_counter()
+        tokenized = dict(zip(utterances, _tokenize_utterances(utterances, syn_map, workers, segmenter)))
+        logger.info("Tách từ %d câu mẫu (%d worker) trong %.1f s", len(utterances), max(workers, 1),
+                    time.perf_counter() - started)
+
+        for intent, utt in rows:
+            toks = tokenized[utt]
+            samples = intent_to_samples.setdefault(intent, {})
+            samples[toks] = samples.get(toks, 0) + 1
         return intent_to_samples
 
-    def detect_intent(self, text: str) -> Tuple[str, float]:
-        if self._intent_detector is None:
+    def warmup(self) -> Dict[str, float]:
+        started = time.perf_counter()
+        ner = self._entity_extractor is not None and self._entity_extractor.ner_mode != NER_NEVER
+        warmup_underthesea(tokenizer=TOKENIZER_BACKEND == BACKEND_UNDERTHESEA, ner=ner)
+        timings = load_timings()
+        timings["warmup_total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return timings
+
+    def message(self, text: MessageLike, snapshot: Optional[NLUSnapshot] = None) -> NormalizedMessage:
+        snapshot = snapshot or self._snapshot
+        segmenter = snapshot.segmenter
+        msg = as_message(text, snapshot.syn_map, segmenter)
+        # Message tạo trước một lần hot reload mang trie đồng nghĩa cũ, hoặc tách từ bằng trie khác
+        stale_synonyms = isinstance(msg.synonym_map, SynonymTrie) and msg.synonym_map is not snapshot.syn_map
+        if stale_synonyms or (segmenter is not None and msg.segmenter is not segmenter):
+            msg = NormalizedMessage(msg.raw, snapshot.syn_map, segmenter)
+        return msg
+
+    def detect_intent(self, text: MessageLike, snapshot: Optional[NLUSnapshot] = None) -> Tuple[str, float]:
+        snapshot = snapshot or self._snapshot
+        if snapshot.intent_detector is None:
             return "fallback", 0.0
-        return self._intent_detector.detect(text, self.syn_map, _normalize_text)
+        return snapshot.intent_detector.detect(
+            text, snapshot.syn_map, _normalize_text, segmenter=snapshot.segmenter
+        )
 
-    def extract_entities(self, text: str) -> List[Dict[str, Any]]:
-        if self._entity_extractor is None:
+    def extract_entities(
+            self,
+            text: MessageLike,
+            intent: Optional[str] = None,
+            ner_future: Optional[Future] = None,
+            snapshot: Optional[NLUSnapshot] = None,
+    ) -> List[Dict[str, Any]]:
+        snapshot = snapshot or self._snapshot
+        if snapshot.entity_extractor is None:
             return []
-        return self._entity_extractor.extract(text)
+        return snapshot.entity_extractor.extract(
+            self.message(text, snapshot), intent,
+            ner_future=ner_future, ner_timeout=self.ner_timeout, executor=self._ner_executor(),
+        )
+
+    def ner_stats(self) -> Dict[str, Any]:
+        if self._entity_extractor is None:
+            return {}
+        return self._entity_extractor.ner_stats()
+
+    def detect_intents(
+            self, texts: Sequence[str], snapshot: Optional[NLUSnapshot] = None
+    ) -> List[Tuple[str, float]]:
+        snapshot = snapshot or self._snapshot
+        if snapshot.intent_detector is None:
+            return [("fallback", 0.0) for _ in texts]
+        return snapshot.intent_detector.detect_many(
+            texts, snapshot.syn_map, _normalize_text, segmenter=snapshot.segmenter
+        )
+
+    def _start_ner(self, msg: NormalizedMessage, snapshot: NLUSnapshot) -> Optional[Future]:
+        # Chỉ chạy NER trước khi có intent khi chế độ NER không phụ thuộc kết quả các bước khác
+        extractor = snapshot.entity_extractor
+        if extractor is None or extractor.ner_mode != NER_ALWAYS:
+            return None
+        return extractor.submit_ner(msg, self._ner_executor())
 
-    def analyze(self, text: str) -> Dict[str, Any]:
-        intent, score = self.detect_intent(text)
-        entities = self.extract_entities(text)
+    def analyze(self, text: MessageLike) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        msg = self.message(text, snapshot)
+        ner_future = self._start_ner(msg, snapshot) if self.pipeline_mode == PIPELINE_CONCURRENT else None
+        intent, score = self.detect_intent(msg, snapshot)
+        entities = self.extract_entities(msg, intent, ner_future, snapshot)
 
         return {"intent": intent, "score": score, "entities": entities}
+
+    def analyze_batch(self, texts: Sequence[str]) -> List[Dict[str, Any]]:
+        snapshot = self._snapshot
+        intents = self.detect_intents(texts, snapshot)
+
+        entities_by_text: Dict[str, List[Dict[str, Any]]] = {}
+        results: List[Dict[str, Any]] = []
+        for text, (intent, score) in zip(texts, intents):
+            if text not in entities_by_text:
+                entities_by_text[text] = self.extract_entities(text, intent, snapshot=snapshot)
+            entities = [dict(e) for e in entities_by_text[text]]
+            results.append({"intent": intent, "score": score, "entities": entities})
+        return results
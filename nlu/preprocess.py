@@ -1,14 +1,37 @@
-import re
-from typing import Dict, List, Set
+import logging
+import os
+import threading
+from typing import Dict, List, Mapping, Optional, Set, Tuple
 
-import unicodedata
+from config import DATA_DIR, get_segment_cache_size, get_tokenizer_backend
+from .lru import LRUCache
+from .synonyms import SynonymMatch, SynonymTrie
+from .textnorm import normalize_text
+from .tokenizer import (
+    BACKEND_TRIE,
+    BACKEND_UNDERTHESEA,
+    BACKEND_WHITESPACE,
+    TOKENIZER_BACKENDS,
+    TrieSegmenter,
+    build_trie_segmenter,
+)
+from .underthesea_loader import get_word_tokenize, underthesea_available
 
-try:
-    from underthesea import word_tokenize
-except ImportError:
+logger = logging.getLogger(__name__)
 
-    def word_tokenize(text: str):
-        return text.split()
+_UNDERTHESEA_AVAILABLE = underthesea_available()
+
+
+def _resolve_backend(backend: str) -> str:
+    if backend not in TOKENIZER_BACKENDS:
+        logger.warning("Tokenizer backend không hợp lệ: %s, dùng '%s'", backend, BACKEND_UNDERTHESEA)
+        backend = BACKEND_UNDERTHESEA
+    if backend == BACKEND_UNDERTHESEA and not _UNDERTHESEA_AVAILABLE:
+        return BACKEND_WHITESPACE
+    return backend
+
+
+TOKENIZER_BACKEND = _resolve_backend(get_tokenizer_backend())
 
 VI_STOPWORDS: Set[str] = {
     "là",
@@ -45,36 +68,84 @@ VI_STOPWORDS: Set[str] = {
 }
 
 
-def normalize_text(text) -> str:
-    if not isinstance(text, str):
-        text = str(text) if text is not None else ""
+SEGMENT_CACHE = LRUCache(get_segment_cache_size())
 
-    text = text.lower().strip()
+_trie_segmenters: Dict[str, TrieSegmenter] = {}
+_trie_lock = threading.Lock()
 
-    text = unicodedata.normalize("NFC", text)
 
-    text = re.sub(
-        r"[^\w\sáàảãạăắằẳẵặâấầẩẫậéèẻẽẹêếềểễệíìỉĩịóòỏõọôốồổỗộơớờởỡợúùủũụưứừửữựýỳỷỹỵđ]",
-        " ",
-        text,
-    )
+def get_trie_segmenter(data_dir: str = DATA_DIR) -> TrieSegmenter:
+    # Mỗi thư mục dữ liệu một trie: pipeline dựng từ data_dir riêng không dùng lẫn từ điển
+    key = os.path.abspath(data_dir)
+    segmenter = _trie_segmenters.get(key)
+    if segmenter is None:
+        with _trie_lock:
+            segmenter = _trie_segmenters.get(key)
+            if segmenter is None:
+                segmenter = build_trie_segmenter(data_dir)
+                _trie_segmenters[key] = segmenter
+                logger.info("Tokenizer trie (%s): %d từ ghép", data_dir, len(segmenter))
+    return segmenter
 
-    text = re.sub(r"\s+", " ", text).strip()
 
-    return text
-
-
-def tokenize_and_map(text: str, synonym_map: Dict[str, str]) -> List[str]:
-    norm = normalize_text(text)
+def _segment_uncached(norm: str, segmenter: Optional[TrieSegmenter] = None) -> Tuple[str, ...]:
+    if TOKENIZER_BACKEND == BACKEND_TRIE:
+        return tuple((segmenter or get_trie_segmenter()).segment(norm))
+    if TOKENIZER_BACKEND == BACKEND_WHITESPACE:
+        return tuple(norm.split())
 
+    # word_tokenize trả về list nên .split() luôn rơi vào nhánh except: token thực tế vẫn
+    # là âm tiết. Giữ nguyên để không đổi intent model đã huấn luyện; dùng backend
+    # "whitespace" để có cùng kết quả mà không tốn lời gọi underthesea
+    word_tokenize = get_word_tokenize()
+    if word_tokenize is None:
+        return tuple(norm.split())
     try:
         raw = word_tokenize(norm)
-        toks = raw.split()
+        return tuple(raw.split())
     except (ValueError, TypeError, AttributeError):
-        toks = norm.split()
+        return tuple(norm.split())
+
+
+def segment(norm: str, cache: bool = True, segmenter: Optional[TrieSegmenter] = None) -> List[str]:
+    if TOKENIZER_BACKEND == BACKEND_TRIE:
+        segmenter = segmenter or get_trie_segmenter()
+    if not cache:
+        return list(_segment_uncached(norm, segmenter))
+    # Cache khóa theo cả trie: hai từ điển khác nhau không dùng chung kết quả tách từ
+    key = (segmenter, norm) if segmenter is not None else norm
+    return list(SEGMENT_CACHE.get_or_compute(key, lambda: _segment_uncached(norm, segmenter)))
+
+
+def rewrite_synonyms(toks: List[str], synonym_map: Mapping[str, str]) -> Tuple[List[str], List[SynonymMatch]]:
+    if isinstance(synonym_map, SynonymTrie):
+        return synonym_map.rewrite_with_matches(toks)
+
+    # Map thường: chỉ thay được alias một token
+    rewritten: List[str] = []
+    matched: List[SynonymMatch] = []
+    for i, tok in enumerate(toks):
+        canonical = synonym_map.get(tok)
+        if canonical is None:
+            rewritten.append(tok)
+        else:
+            rewritten.append(canonical)
+            matched.append((i, i + 1, canonical))
+    return rewritten, matched
+
+
+def drop_stopwords(toks: List[str]) -> List[str]:
+    return [t for t in toks if t not in VI_STOPWORDS]
+
 
-    mapped = [synonym_map.get(tok, tok) for tok in toks]
+def map_tokens(toks: List[str], synonym_map: Mapping[str, str]) -> List[str]:
+    return drop_stopwords(rewrite_synonyms(toks, synonym_map)[0])
 
-    filtered = [t for t in mapped if t not in VI_STOPWORDS]
 
-    return filtered
+def tokenize_and_map(
+        text: str,
+        synonym_map: Mapping[str, str],
+        cache: bool = True,
+        segmenter: Optional[TrieSegmenter] = None,
+) -> List[str]:
+    return map_tokens(segment(normalize_text(text), cache, segmenter), synonym_map)
@@ -0,0 +1,74 @@
+import logging
+import os
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FileStamp = Optional[Tuple[int, int]]
+
+
+def _stamp(path: str) -> FileStamp:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class DataWatcher:
+    def __init__(
+            self,
+            paths: Iterable[str],
+            on_change: Callable[[List[str]], object],
+            interval: float = 5.0,
+    ) -> None:
+        self.paths = list(dict.fromkeys(paths))
+        self.on_change = on_change
+        self.interval = max(0.1, float(interval))
+        self._stamps = self._snapshot()
+        # Thay đổi vừa thấy, chỉ xử lý khi lượt kiểm tra sau vẫn y như vậy (file đã ghi xong)
+        self._pending: Optional[Dict[str, FileStamp]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _snapshot(self) -> Dict[str, FileStamp]:
+        return {path: _stamp(path) for path in self.paths}
+
+    def poll(self) -> List[str]:
+        current = self._snapshot()
+        if current == self._stamps:
+            self._pending = None
+            return []
+        if current != self._pending:
+            self._pending = current
+            return []
+
+        changed = [path for path in self.paths if current[path] != self._stamps[path]]
+        try:
+            ok = self.on_change(changed) is not False
+        except Exception:  # luồng theo dõi không được chết vì một lần nạp lỗi
+            logger.exception("Xử lý thay đổi dữ liệu thất bại: %s", changed)
+            ok = False
+        # Chỉ ghi nhận stamp mới khi nạp thành công; lỗi thì giữ stamp cũ để lượt sau thử lại
+        if ok:
+            self._stamps, self._pending = current, None
+        return changed
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def start(self) -> "DataWatcher":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="nlu-reload", daemon=True)
+            self._thread.start()
+            logger.info("Theo dõi %d file dữ liệu NLU, kiểm tra mỗi %.1f s", len(self.paths), self.interval)
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,86 @@
+from typing import Dict, Iterator, List, Mapping, Sequence
+
+try:
+    import numpy as np
+    from scipy import sparse as sp
+except ImportError:
+    np = None  # type: ignore
+    sp = None  # type: ignore
+
+
+def sparse_available() -> bool:
+    return np is not None and sp is not None
+
+
+class SparseCentroidIndex(Mapping):
+    def __init__(self, idf: Mapping[str, float], centroids: Mapping[str, Mapping[str, float]]) -> None:
+        if not sparse_available():
+            raise ImportError("SparseCentroidIndex cần numpy và scipy")
+
+        self.intents: List[str] = list(centroids.keys())
+        self._rows = {intent: i for i, intent in enumerate(self.intents)}
+        self.terms: List[str] = sorted(idf)
+        self.vocab: Dict[str, int] = {t: i for i, t in enumerate(self.terms)}
+        self.idf = np.zeros(len(self.vocab), dtype=np.float32)
+        for t, i in self.vocab.items():
+            self.idf[i] = idf[t]
+
+        indptr = [0]
+        indices: List[int] = []
+        data: List[float] = []
+        for intent in self.intents:
+            row = sorted(
+                (self.vocab[t], w) for t, w in centroids[intent].items() if t in self.vocab
+            )
+            indices.extend(i for i, _ in row)
+            data.extend(w for _, w in row)
+            indptr.append(len(indices))
+
+        self.matrix = sp.csr_matrix(
+            (
+                np.asarray(data, dtype=np.float32),
+                np.asarray(indices, dtype=np.int32),
+                np.asarray(indptr, dtype=np.int32),
+            ),
+            shape=(len(self.intents), len(self.vocab)),
+        )
+
+    def __getitem__(self, intent: str) -> Dict[str, float]:
+        # Centroid dạng dict chỉ dựng khi cần (ghi artifact, báo cáo); ma trận CSR là bản lưu duy nhất
+        row = self._rows[intent]
+        start, end = self.matrix.indptr[row], self.matrix.indptr[row + 1]
+        terms = self.terms
+        return {
+            terms[i]: w
+            for i, w in zip(self.matrix.indices[start:end].tolist(), self.matrix.data[start:end].tolist())
+        }
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.intents)
+
+    def __len__(self) -> int:
+        return len(self.intents)
+
+    def query_vector(self, toks: Sequence[str]):
+        q = np.zeros(len(self.vocab), dtype=np.float32)
+        for t in toks:
+            i = self.vocab.get(t)
+            if i is not None:
+                q[i] += self.idf[i]
+
+        norm = float(np.sqrt(np.dot(q, q)))
+        if norm > 0.0:
+            q /= norm
+        return q
+
+    def scores(self, toks: Sequence[str]):
+        return np.minimum(self.matrix.dot(self.query_vector(toks)), 1.0)
+
+    def scores_many(self, token_lists: Sequence[Sequence[str]]):
+        queries = np.empty((len(self.vocab), len(token_lists)), dtype=np.float32)
+        for col, toks in enumerate(token_lists):
+            queries[:, col] = self.query_vector(toks)
+        return np.minimum(self.matrix.dot(queries), 1.0)
+
+    def nbytes(self) -> int:
+        return self.matrix.data.nbytes + self.matrix.indices.nbytes + self.matrix.indptr.nbytes
@@ -0,0 +1,71 @@
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple, Union
+
+# (token bắt đầu, token kết thúc, dạng chuẩn) theo chỉ số token đầu vào
+SynonymMatch = Tuple[int, int, str]
+
+# Ghi vào khóa artifact: đổi cách thay đồng nghĩa thì token huấn luyện cũng đổi
+SYNONYM_MATCHING = "longest-phrase"
+
+_END = ""
+
+# Nút trie: âm tiết -> nút con; khóa _END giữ dạng chuẩn của alias kết thúc tại nút
+SynonymNode = Dict[str, Union["SynonymNode", str]]
+
+
+class SynonymTrie(Mapping[str, str]):
+    def __init__(self, synonym_map: Optional[Mapping[str, str]] = None) -> None:
+        self.synonym_map: Dict[str, str] = dict(synonym_map or {})
+        self.root: SynonymNode = {}
+        for alias, canonical in self.synonym_map.items():
+            syllables = alias.split()
+            if not syllables:
+                continue
+            node = self.root
+            for syl in syllables:
+                child = node.get(syl)
+                if not isinstance(child, dict):
+                    child = node[syl] = {}
+                node = child
+            node[_END] = canonical
+
+    def __getitem__(self, alias: str) -> str:
+        return self.synonym_map[alias]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.synonym_map)
+
+    def __len__(self) -> int:
+        return len(self.synonym_map)
+
+    def _match(self, tokens: List[str], start: int) -> Tuple[int, Optional[str]]:
+        # Đi theo trie qua từng âm tiết; alias chỉ được khớp trọn token (token trie có thể là từ ghép)
+        node, end, canonical = self.root, start, None
+        for j in range(start, len(tokens)):
+            tok = tokens[j]
+            for syl in tok.split() if " " in tok else (tok,):
+                child = node.get(syl)
+                if not isinstance(child, dict):
+                    return end, canonical
+                node = child
+            value = node.get(_END)
+            if isinstance(value, str):
+                end, canonical = j + 1, value
+        return end, canonical
+
+    def rewrite_with_matches(self, tokens: List[str]) -> Tuple[List[str], List[SynonymMatch]]:
+        rewritten: List[str] = []
+        matched: List[SynonymMatch] = []
+        i, n = 0, len(tokens)
+        while i < n:
+            end, canonical = self._match(tokens, i)
+            if canonical is None:
+                rewritten.append(tokens[i])
+                i += 1
+            else:
+                rewritten.append(canonical)
+                matched.append((i, end, canonical))
+                i = end
+        return rewritten, matched
+
+    def rewrite(self, tokens: List[str]) -> List[str]:
+        return self.rewrite_with_matches(tokens)[0]
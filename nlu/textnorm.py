@@ -0,0 +1,55 @@
+import re
+
+import unicodedata
+
+# \W gộp cả dấu câu lẫn khoảng trắng: thay mỗi cụm bằng một dấu cách trong một lần sub
+_NON_WORD_RE = re.compile(r"\W+")
+# Ký tự nằm ngoài vùng bảng dịch đã phủ, cần đi đường NFD chậm
+_UNCOVERED_RE = re.compile("[^\x00-\u024f\u1e00-\u1eff]")
+
+
+def _build_fold_table() -> list:
+    # Bảng dạng list theo code point (tra nhanh hơn dict trong str.translate);
+    # ký tự vượt quá độ dài bảng được giữ nguyên
+    table: list = list(range(0x1F00))
+    for cp in list(range(0x00C0, 0x0250)) + list(range(0x1E00, 0x1F00)):
+        ch = chr(cp)
+        folded = "".join(c for c in unicodedata.normalize("NFD", ch) if unicodedata.category(c) != "Mn")
+        if folded != ch:
+            table[cp] = folded
+    for cp in range(0x0300, 0x0370):
+        if unicodedata.category(chr(cp)) == "Mn":
+            table[cp] = None
+    return table
+
+
+FOLD_TABLE = _build_fold_table()
+
+
+def _strip_marks_slow(text: str) -> str:
+    norm = unicodedata.normalize("NFD", text)
+    return "".join(ch for ch in norm if unicodedata.category(ch) != "Mn")
+
+
+def normalize_text(text) -> str:
+    if not isinstance(text, str):
+        text = str(text) if text is not None else ""
+
+    text = text.lower()
+    if not text.isascii():
+        text = unicodedata.normalize("NFC", text)
+    return _NON_WORD_RE.sub(" ", text).strip()
+
+
+def strip_diacritics(text: str) -> str:
+    if text.isascii():
+        return text
+    folded = text.translate(FOLD_TABLE)
+    if folded.isascii() or not _UNCOVERED_RE.search(folded):
+        return folded
+    return _strip_marks_slow(folded)
+
+
+def fold_ascii(text: str) -> str:
+    return strip_diacritics(text).lower().strip()
+
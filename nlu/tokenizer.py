@@ -0,0 +1,117 @@
+import csv
+import json
+import os
+from typing import Dict, Iterable, Iterator, List
+
+from .textnorm import normalize_text, strip_diacritics
+
+BACKEND_UNDERTHESEA = "underthesea"
+BACKEND_WHITESPACE = "whitespace"
+BACKEND_TRIE = "trie"
+TOKENIZER_BACKENDS = (BACKEND_UNDERTHESEA, BACKEND_WHITESPACE, BACKEND_TRIE)
+
+LEXICON_FILE = "vi_lexicon.txt"
+MAX_COMPOUND_SYLLABLES = 4
+
+_END = ""
+
+# Nút trie: âm tiết -> nút con; khóa _END đánh dấu kết thúc một từ ghép
+TrieNode = Dict[str, "TrieNode"]
+
+
+class TrieSegmenter:
+    def __init__(self, phrases: Iterable[str] = ()) -> None:
+        self.root: TrieNode = {}
+        self.size = 0
+        for phrase in phrases:
+            self.add(phrase)
+
+    def add(self, phrase: str) -> None:
+        syllables = phrase.split()
+        if len(syllables) < 2:
+            return
+        node = self.root
+        for syl in syllables:
+            node = node.setdefault(syl, {})
+        if _END not in node:
+            node[_END] = {}
+            self.size += 1
+
+    def __len__(self) -> int:
+        return self.size
+
+    def segment(self, norm: str) -> List[str]:
+        syllables = norm.split()
+        n = len(syllables)
+        words: List[str] = []
+        i = 0
+        while i < n:
+            # Khớp dài nhất: đi theo trie từ âm tiết i, nhớ vị trí kết thúc từ ghép xa nhất
+            node, end, j = self.root, i + 1, i
+            while j < n:
+                child = node.get(syllables[j])
+                if child is None:
+                    break
+                node = child
+                j += 1
+                if _END in node:
+                    end = j
+            words.append(" ".join(syllables[i:end]) if end > i + 1 else syllables[i])
+            i = end
+        return words
+
+
+def _lexicon_lines(path: str) -> Iterator[str]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+
+def _entity_pattern_phrases(path: str) -> Iterator[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    for item in data:
+        pat = item.get("pattern")
+        if isinstance(pat, str):
+            yield pat
+        elif isinstance(pat, list):
+            parts = [tok.get("LOWER") or tok.get("TEXT") for tok in pat if isinstance(tok, dict)]
+            words = [p for p in parts if isinstance(p, str)]
+            if words and len(words) == len(parts):
+                yield " ".join(words)
+
+
+def _csv_column_phrases(path: str, columns: Iterable[str]) -> Iterator[str]:
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            for col in columns:
+                value = row.get(col)
+                if value and not value.lstrip().startswith("#"):
+                    yield value
+
+
+def load_lexicon_phrases(data_dir: str) -> List[str]:
+    sources = [
+        (os.path.join(data_dir, LEXICON_FILE), _lexicon_lines),
+        (os.path.join(data_dir, "synonym.csv"), lambda p: _csv_column_phrases(p, ("canonical", "alias"))),
+        (os.path.join(data_dir, "majors.csv"), lambda p: _csv_column_phrases(p, ("major_name",))),
+        (os.path.join(data_dir, "entity.json"), _entity_pattern_phrases),
+    ]
+
+    phrases: Dict[str, None] = {}
+    for path, reader in sources:
+        if not os.path.isfile(path):
+            continue
+        for raw in reader(path):
+            norm = normalize_text(raw)
+            if 2 <= len(norm.split()) <= MAX_COMPOUND_SYLLABLES:
+                phrases[norm] = None
+                # Người dùng hay gõ không dấu: thêm cả dạng đã bỏ dấu
+                phrases[strip_diacritics(norm)] = None
+    return list(phrases)
+
+
+def build_trie_segmenter(data_dir: str) -> TrieSegmenter:
+    return TrieSegmenter(load_lexicon_phrases(data_dir))
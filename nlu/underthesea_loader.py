@@ -0,0 +1,81 @@
+import importlib
+import importlib.util
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.RLock()
+_loaded: Dict[str, Optional[Callable[..., Any]]] = {}
+_timings_ms: Dict[str, float] = {}
+
+
+def underthesea_available() -> bool:
+    # Chỉ tìm spec, không import gói (import mất ~2 s do kéo theo nltk)
+    try:
+        return importlib.util.find_spec("underthesea") is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def _import_function(name: str) -> Optional[Callable[..., Any]]:
+    # Đường nhanh không lấy lock: _loaded chỉ được ghi một lần sau khi import xong
+    if name in _loaded:
+        return _loaded[name]
+
+    with _lock:
+        if name in _loaded:
+            return _loaded[name]
+
+        started = time.perf_counter()
+        try:
+            fn = getattr(importlib.import_module("underthesea"), name)
+        except (ImportError, AttributeError) as e:
+            logger.warning("Không nạp được underthesea.%s: %s", name, e)
+            fn = None
+        # Hàm đầu tiên được nạp chịu luôn chi phí import gói underthesea
+        _timings_ms[f"{name}_import_ms"] = (time.perf_counter() - started) * 1000
+        _loaded[name] = fn
+        return fn
+
+
+def _load_model(name: str, probe: str) -> Optional[Callable[..., Any]]:
+    fn = _import_function(name)
+    key = f"{name}_model_load_ms"
+    if fn is None or key in _timings_ms:
+        return fn
+
+    with _lock:
+        if key not in _timings_ms:
+            # Lần gọi đầu nạp model từ đĩa; chạy một câu mẫu để tách chi phí này khỏi request đầu tiên
+            started = time.perf_counter()
+            try:
+                fn(probe)
+            except (ValueError, RuntimeError, OSError) as e:
+                logger.warning("Không khởi động được underthesea.%s: %s", name, e)
+            _timings_ms[key] = (time.perf_counter() - started) * 1000
+    return fn
+
+
+def get_word_tokenize() -> Optional[Callable[..., Any]]:
+    return _load_model("word_tokenize", "xin chào")
+
+
+def get_ner() -> Optional[Callable[..., Any]]:
+    return _load_model("ner", "Trường Đại học Xây dựng Hà Nội")
+
+
+def warmup(tokenizer: bool = True, ner: bool = True) -> Dict[str, float]:
+    if not underthesea_available():
+        return {}
+    if tokenizer:
+        get_word_tokenize()
+    if ner:
+        get_ner()
+    return load_timings()
+
+
+def load_timings() -> Dict[str, float]:
+    return {k: round(v, 1) for k, v in _timings_ms.items()}
@@ -0,0 +1,51 @@
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+STOP_ID = -1
+
+
+class Vocabulary:
+    def __init__(self, terms: Iterable[str] = (), stopwords: Iterable[str] = ()) -> None:
+        self.terms: List[str] = []
+        self.term_ids: Dict[str, int] = {}
+        self.stopwords = frozenset(stopwords)
+        # Bảng tra khi mã hóa câu hỏi: stopword -> STOP_ID, từ đã biết -> id, một lần hash cho mỗi token
+        self.codes: Dict[str, int] = dict.fromkeys(self.stopwords, STOP_ID)
+        for term in terms:
+            self.intern(term)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def intern(self, term: str) -> int:
+        tid = self.term_ids.get(term)
+        if tid is None:
+            tid = self.term_ids[term] = len(self.terms)
+            self.terms.append(term)
+            if term not in self.stopwords:
+                self.codes[term] = tid
+        return tid
+
+    def intern_all(self, tokens: Sequence[str]) -> Tuple[int, ...]:
+        return tuple(self.intern(t) for t in tokens)
+
+    def encode(self, tokens: Sequence[str]) -> Tuple[List[int], int]:
+        # Trả về id các từ đã biết và số token không phải stopword (mẫu số TF)
+        codes = self.codes
+        ids: List[int] = []
+        total = 0
+        for tok in tokens:
+            code = codes.get(tok)
+            if code is None:
+                total += 1
+            elif code != STOP_ID:
+                total += 1
+                ids.append(code)
+        return ids, total
+
+    def copy(self) -> "Vocabulary":
+        clone = Vocabulary.__new__(Vocabulary)
+        clone.terms = list(self.terms)
+        clone.term_ids = dict(self.term_ids)
+        clone.stopwords = self.stopwords
+        clone.codes = dict(self.codes)
+        return clone
@@ -1,5 +1,6 @@
 from typing import Any, Dict
 
+from nlu.message import MessageLike, as_message
 from services.processors import (
     list_majors,
     list_tuition,
@@ -16,8 +17,8 @@ def _message_with_contact(*parts: str) -> str:
     return add_contact_suggestion(content)
 
 
-def handle_fallback_query(message: str, context: Dict[str, Any]) -> Dict[str, Any]:
-    message_lower = message.lower()
+def handle_fallback_query(message: MessageLike, context: Dict[str, Any]) -> Dict[str, Any]:
+    message_lower = as_message(message).lower
 
     if any(word in message_lower for word in ["ngành", "môn", "học"]):
         results = list_majors()
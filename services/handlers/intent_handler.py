@@ -1,5 +1,6 @@
 from typing import Any, Dict, List
 
+from nlu.message import MessageLike, as_message
 from services.processors import (
     infer_major_from_message,
     find_standard_score,
@@ -44,8 +45,9 @@ def _build_data_response(
     return {"type": response_type, "data": results, "message": message}
 
 
-def handle_intent_query(analysis: Dict[str, Any], context: Dict[str, Any], original_message: str = "") -> Dict[
+def handle_intent_query(analysis: Dict[str, Any], context: Dict[str, Any], original_message: MessageLike = "") -> Dict[
     str, Any]:
+    original_message = as_message(original_message)
     intent = analysis.get("intent", "fallback")
     entities = analysis.get("entities", [])
 
@@ -57,7 +59,7 @@ def handle_intent_query(analysis: Dict[str, Any], context: Dict[str, Any], origi
         elif label in ["NAM_HOC", "NAM_TUYEN_SINH"]:
             year_info = text
 
-    msg_lower = original_message.lower() if original_message else ""
+    msg_lower = original_message.lower
     is_general_query = any(
         kw in msg_lower
         for kw in ["tất cả", "tat ca", "các ngành", "cac nganh", "chung", "toàn bộ", "toan bo"]
@@ -297,8 +299,9 @@ def _handle_to_hop_mon(major_info, original_message=""):
     import re
 
     combo_pattern = r"\b([A-Z]\d{2}|[A-Z]{2}\d|SP\d|VS\d|TT)\b"
+    original_message = as_message(original_message)
     combo_matches = re.findall(combo_pattern,
-                               original_message.upper()) if original_message else []
+                               original_message.upper) if original_message else []
 
     if combo_matches:
         results = []
@@ -316,7 +319,7 @@ def _handle_to_hop_mon(major_info, original_message=""):
 
     if not major_info:
         if original_message and any(
-                kw in original_message.lower() for kw in
+                kw in original_message.lower for kw in
                 ["tất cả", "tat ca", "danh sách", "danh sach", "các tổ hợp", "cac to hop"]
         ):
             results = get_combination_codes()
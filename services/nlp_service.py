@@ -1,7 +1,10 @@
-from typing import Dict, Any
+import time
+from typing import Dict, Any, List
 
-from config import get_intent_threshold, get_context_history_limit
+from config import get_intent_threshold, get_context_history_limit, get_nlu_reload_interval
 from nlu.pipeline import NLPPipeline
+from nlu.preprocess import SEGMENT_CACHE
+from nlu.underthesea_loader import load_timings
 
 
 class ContextStore:
@@ -37,20 +40,47 @@ class NLPService:
         self.pipeline = NLPPipeline()
         self.context_store = ContextStore()
         self.intent_threshold = get_intent_threshold()
+        reload_interval = get_nlu_reload_interval()
+        if reload_interval > 0:
+            self.pipeline.watch(reload_interval)
 
     def analyze_message(self, message: str) -> Dict[str, Any]:
         return self.pipeline.analyze(message)
 
+    def analyze_messages(self, messages: List[str]) -> List[Dict[str, Any]]:
+        return self.pipeline.analyze_batch(messages)
+
+    def add_intent_samples(self, intent: str, utterances: List[str]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        added = self.pipeline.add_intent_samples(intent, utterances)
+        return {
+            "intent": intent,
+            "added": added,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    def warmup(self) -> Dict[str, float]:
+        return self.pipeline.warmup()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "segment_cache": SEGMENT_CACHE.stats(),
+            "model_load_ms": load_timings(),
+            "ner": self.pipeline.ner_stats(),
+            "nlu_snapshot": self.pipeline.snapshot_info(),
+        }
+
     def handle_message(self, message: str, current_context: Dict[str, Any]) -> Dict[str, Any]:
         from services import csv_service as csvs
 
-        analysis = self.pipeline.analyze(message)
+        msg = self.pipeline.message(message)
+        analysis = self.pipeline.analyze(msg)
 
         if analysis["intent"] == "fallback" or analysis["score"] < self.intent_threshold:
-            response = csvs.handle_fallback_query(message, current_context)
+            response = csvs.handle_fallback_query(msg, current_context)
             analysis["intent"] = "fallback_response"
         else:
-            response = csvs.handle_intent_query(analysis, current_context, message)
+            response = csvs.handle_intent_query(analysis, current_context, msg)
 
         return {"analysis": analysis, "response": response}
 
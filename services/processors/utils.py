@@ -2,22 +2,24 @@ import os
 import re
 from typing import Any, Dict, List, Optional
 
-import unicodedata
-
 from config import DATA_DIR
+from nlu.message import MessageLike, as_message
+from nlu.textnorm import fold_ascii, strip_diacritics as _strip_diacritics
+
+_YEAR_RE = re.compile(r"\b(19|20)\d{2}\b")
+_DIGITS_RE = re.compile(r"\d+")
 
 
 def strip_diacritics(text: str) -> str:
     if not isinstance(text, str):
         return text
-    norm = unicodedata.normalize("NFD", text)
-    return "".join(ch for ch in norm if unicodedata.category(ch) != "Mn")
+    return _strip_diacritics(text)
 
 
 def normalize_text(text: str) -> str:
     if not isinstance(text, str):
         return ""
-    return strip_diacritics(text).lower().strip()
+    return fold_ascii(text)
 
 
 def canonicalize_vi_ascii(text: str) -> str:
@@ -34,13 +36,13 @@ def clean_program_name(name: str) -> str:
     return parts[-1] if len(parts) >= 2 else name.strip()
 
 
-def infer_major_from_message(message: str) -> Optional[str]:
+def infer_major_from_message(message: MessageLike) -> Optional[str]:
     from .cache import read_csv
 
     if not message:
         return None
 
-    msg_norm = normalize_text(message)
+    msg_norm = as_message(message).folded
     if not msg_norm:
         return None
 
@@ -53,8 +55,8 @@ def infer_major_from_message(message: str) -> Optional[str]:
     ]:
         base = base.replace(repl[0], repl[1])
         variants.add(base)
-    variants.add(re.sub(r"\b(19|20)\d{2}\b", " ", msg_norm))
-    variants.add(re.sub(r"\d+", " ", msg_norm))
+    variants.add(_YEAR_RE.sub(" ", msg_norm))
+    variants.add(_DIGITS_RE.sub(" ", msg_norm))
     variants = {" ".join(v.split()) for v in variants if v}
 
     candidates: List[str] = []
@@ -20,6 +20,12 @@ def nlp_service():
     return get_nlp_service()
 
 
+@pytest.fixture(scope="session")
+def intent_training_samples():
+    """Tokenized intent.csv samples (the service may have loaded a compiled model instead)"""
+    return get_nlp_service().pipeline.load_training_samples()
+
+
 @pytest.fixture
 def sample_messages():
     """Sample messages for testing"""
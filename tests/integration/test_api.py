@@ -20,6 +20,14 @@ class TestHealthEndpoint:
         assert data["success"] is True
         assert "message" in data
 
+    def test_health_reports_segment_cache(self, test_client):
+        """Test GET /health exposes segmentation cache counters"""
+        response = test_client.get("/health")
+
+        assert response.status_code == 200
+        stats = response.json()["nlp_stats"]["segment_cache"]
+        assert {"hits", "misses", "evictions", "size", "maxsize"} <= set(stats)
+
 
 @pytest.mark.integration
 @pytest.mark.api
@@ -3,8 +3,12 @@ Unit tests for Entity Extraction
 
 Tests the entity extraction component of the NLP pipeline.
 """
+import os
+
 import pytest
 
+from nlu.preprocess import normalize_text
+
 
 @pytest.mark.unit
 @pytest.mark.nlp
@@ -229,3 +233,490 @@ class TestEntityEdgeCases:
             result = nlp_service.analyze_message(msg)
             # Should handle Unicode gracefully
             assert "entities" in result
+
+    def test_multi_word_synonym_dictionary_match(self, nlp_service):
+        """Test that a multi-word alias yields the dictionary entry of its canonical form"""
+        extractor = nlp_service.pipeline._entity_extractor
+        entities = extractor.extract("Điểm chuẩn ngành công nghệ kiến trúc")
+        found = {(e["label"], e["text"]) for e in entities if e["source"] == "dictionary"}
+        assert ("TEN_NGANH", "kiến trúc công nghệ") in found
+
+    def test_synonym_phrase_spanning_rewritten_tokens(self, nlp_service):
+        """Test that dictionary phrases are matched across the whole synonym-rewritten message"""
+        extractor = nlp_service.pipeline._entity_extractor
+        text = "khối thi của ngành Logistics và quản lí chuỗi cung ứng"
+        found = {(e["label"], e["text"]) for e in extractor.extract(text) if e["source"] == "dictionary"}
+        assert ("TEN_NGANH", "logistics và quản lí chuỗi cung ứng") in found
+        assert ("TEN_NGANH", "logistics và quản lý chuỗi cung ứng") in found
+        assert ("CHUYEN_NGANH", "logistics và quản lý chuỗi cung ứng") in found
+
+    def test_shared_message_matches_plain_text(self, nlp_service):
+        """Test that reusing the message's synonym pass gives the same entities"""
+        pipeline = nlp_service.pipeline
+        for text in ["Điểm chuẩn CNTT 2024", "học phí ngành xây dựng", "ngành công nghệ kiến trúc"]:
+            assert pipeline.extract_entities(pipeline.message(text)) == pipeline.extract_entities(text)
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestAhoCorasick:
+    """Test the multi-pattern automaton used for pattern and dictionary matching"""
+
+    def test_matches_substring_scan(self):
+        """Test overlapping and nested patterns give the same hits as `in`"""
+        from nlu.aho_corasick import AhoCorasick
+        patterns = ["he", "she", "his", "hers", "", "kiến trúc", "trúc", "kiến trúc công nghệ"]
+        matcher = AhoCorasick(patterns)
+        for text in ["ushers", "ahishers", "ngành kiến trúc công nghệ", "kiến trú", ""]:
+            expected = [i for i, p in enumerate(patterns) if p and p in text]
+            assert matcher.matched_ids(text) == expected, f"Mismatch for: {text!r}"
+
+    def test_iter_matches_reports_end_offsets(self):
+        """Test that each hit carries the offset where it ends"""
+        from nlu.aho_corasick import AhoCorasick
+        matcher = AhoCorasick(["ab", "b", "abc"])
+        assert list(matcher.iter_matches("zabc")) == [(3, 0), (3, 1), (4, 2)]
+
+    def test_extractor_matches_naive_scan(self, nlp_service):
+        """Test dictionary and pattern hits equal a per-phrase substring test"""
+        extractor = nlp_service.pipeline._entity_extractor
+        for text in ["điểm chuẩn ngành kiến trúc 2024", "học phí cntt tổ hợp a00", "xin chào"]:
+            norm = normalize_text(text)
+            assert [extractor.entity_patterns[i] for i in extractor.pattern_matcher.matched_ids(norm)] == \
+                [(label, pat) for label, pat in extractor.entity_patterns if pat in norm]
+            assert [extractor.dict_phrases[i] for i in extractor.dict_matcher.matched_ids(norm)] == \
+                [(label, phrase) for label, phrase in extractor.dict_phrases if phrase in norm]
+
+    def test_token_matches_respect_word_boundaries(self):
+        """Test that hits inside a longer word are rejected"""
+        from nlu.aho_corasick import AhoCorasick
+        matcher = AhoCorasick(["tt", "2024", "kiến trúc"])
+        assert list(matcher.iter_token_matches("cntt 20244 kiến trúc")) == [(11, 20, 2)]
+        assert list(matcher.iter_token_matches("tt 2024")) == [(0, 2, 0), (3, 7, 1)]
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestEntitySpans:
+    """Test character/token offsets and longest-span overlap resolution"""
+
+    def test_offsets_point_into_normalized_message(self, nlp_service):
+        """Test that start/end and token offsets slice the matched text"""
+        text = "Điểm chuẩn ngành Kiến trúc năm 2024"
+        norm = normalize_text(text)
+        entities = nlp_service.pipeline.extract_entities(text)
+        spanned = [e for e in entities if e["source"] in ("pattern", "dictionary")]
+        assert spanned
+        for e in spanned:
+            assert norm[e["start"]:e["end"]] == e["text"]
+            assert " ".join(norm.split()[e["token_start"]:e["token_end"]]) == e["text"]
+
+    def test_no_matches_inside_words(self, nlp_service):
+        """Test that codes and years are not matched inside longer tokens"""
+        entities = nlp_service.pipeline.extract_entities("CNTT năm 20244")
+        texts = {e["text"] for e in entities if e["source"] in ("pattern", "dictionary")}
+        assert "tt" not in texts
+        assert "2024" not in texts
+
+    def test_longest_span_wins(self, nlp_service):
+        """Test that a synonym span covering a shorter dictionary hit is returned last"""
+        text = "ngành công nghệ kiến trúc"
+        entities = nlp_service.pipeline.extract_entities(text)
+        majors = [e for e in entities if e["label"] in ("TEN_NGANH", "CHUYEN_NGANH")]
+        assert majors[-1]["text"] == "kiến trúc công nghệ"
+        # Cụm lấy qua đồng nghĩa mang span của alias trong câu
+        assert text[majors[-1]["start"]:majors[-1]["end"]] == "công nghệ kiến trúc"
+
+    def test_resolve_overlaps_keeps_labels_of_same_span(self):
+        """Test that only strictly overlapping shorter spans are dropped"""
+        from nlu.entities import _resolve_overlaps
+        norm = "ngành công nghệ kiến trúc năm 2024"
+        entities = [
+            {"label": "MA_XET_TUYEN", "text": "công nghệ", "start": 6, "end": 15},
+            {"label": "PHUONG_THUC_XET_TUYEN", "text": "công nghệ", "start": 6, "end": 15},
+            {"label": "TEN_NGANH", "text": "kiến trúc công nghệ", "start": 6, "end": 25},
+            {"label": "NAM_HOC", "text": "2024", "start": 30, "end": 34},
+        ]
+        assert [e["label"] for e in _resolve_overlaps(entities, norm)] == ["TEN_NGANH", "NAM_HOC"]
+
+    def test_resolve_overlaps_keeps_nested_major_names(self):
+        """Test that a literal major name inside a longer span survives, synonym hits do not"""
+        from nlu.entities import _resolve_overlaps
+        norm = "ngành kiến trúc kde"
+        entities = [
+            {"label": "TEN_NGANH", "text": "kiến trúc", "start": 6, "end": 15},
+            {"label": "TEN_NGANH", "text": "kiến trúc kde", "start": 6, "end": 19},
+            {"label": "CHUYEN_NGANH", "text": "kiến trúc", "start": 6, "end": 15},
+            {"label": "TEN_NGANH", "text": "kỹ thuật kiến trúc", "start": 6, "end": 15},
+        ]
+        assert [e["text"] for e in _resolve_overlaps(entities, norm)] == ["kiến trúc", "kiến trúc kde", "kiến trúc"]
+
+    @pytest.mark.parametrize("text,major,year", [
+        ("Điểm chuẩn ngành Kiến trúc (KDE) năm 2024", "kiến trúc", "2024"),
+        ("Điểm chuẩn ngành Kinh tế xây dựng (KTE)", "kinh tế xây dựng", None),
+        ("Điểm chuẩn ngành Xây dựng Cầu đường (CDE)", "xây dựng cầu đường", None),
+        ("Điểm chuẩn ngành Logistics và quản lí chuỗi cung ứng", "logistics và quản lý chuỗi cung ứng", None),
+        ("Điểm chuẩn ngành Khoa học máy tính (Chương trình đào tạo liên kết với Đại học Mississippi - Hoa Kỳ)",
+         "khoa học máy tính", None),
+    ])
+    def test_handler_major_slot_uses_short_name(self, nlp_service, text, major, year):
+        """Test that the handler still looks up the short major name for coded programs"""
+        from services.csv_service import handle_intent_query
+        analysis = {"intent": "hoi_diem_chuan", "entities": nlp_service.pipeline.extract_entities(text)}
+        response = handle_intent_query(analysis, {}, text)
+        assert response["data"]
+        assert f"điểm chuẩn của ngành {major} năm {year or 'các năm gần đây'}" in response["message"]
+
+
+@pytest.fixture
+def gated_extractor(nlp_service, monkeypatch):
+    """EntityExtractor sharing the pipeline dictionaries with a stubbed NER stage"""
+    import nlu.entities as entities_module
+    calls = []
+
+    def fake_ner(text):
+        calls.append(text)
+        return [{"label": "ORG", "text": "Kiến trúc", "source": "ner"},
+                {"label": "LOC", "text": "Hà Nội", "source": "ner"}]
+
+    monkeypatch.setattr(entities_module, "_extract_by_ner", fake_ner)
+    pipeline = nlp_service.pipeline
+
+    def build(mode, intents=(), **kwargs):
+        return entities_module.EntityExtractor(
+            pipeline.data_dir, os.path.join(pipeline.data_dir, "entity.json"), pipeline.syn_map,
+            ner_mode=mode, ner_intents=intents, **kwargs,
+        )
+    build.calls = calls
+    return build
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestNerGating:
+    """Test configurable NER gating and its counters"""
+
+    def test_never_skips_ner(self, gated_extractor):
+        """Test that NER is not called in 'never' mode"""
+        extractor = gated_extractor("never")
+        entities = extractor.extract("xin chào Hà Nội")
+        assert gated_extractor.calls == []
+        assert all(e["source"] != "ner" for e in entities)
+        assert extractor.ner_stats()["skipped"] == 1
+
+    def test_no_major_runs_only_without_major(self, gated_extractor):
+        """Test that a dictionary major suppresses NER in 'no_major' mode"""
+        extractor = gated_extractor("no_major")
+        extractor.extract("điểm chuẩn ngành kiến trúc")
+        assert gated_extractor.calls == []
+        extractor.extract("trường ở Hà Nội à")
+        assert len(gated_extractor.calls) == 1
+
+        stats = extractor.ner_stats()
+        assert (stats["requests"], stats["runs"], stats["skipped"]) == (2, 1, 1)
+        assert stats["run_rate"] == 0.5
+
+    def test_intent_whitelist(self, gated_extractor):
+        """Test that NER runs only for whitelisted intents in 'intents' mode"""
+        extractor = gated_extractor("intents", ["hoi_nganh_hoc"])
+        extractor.extract("trường ở Hà Nội", intent="hoi_hoc_phi")
+        extractor.extract("trường ở Hà Nội")
+        assert gated_extractor.calls == []
+        extractor.extract("trường ở Hà Nội", intent="hoi_nganh_hoc")
+        assert len(gated_extractor.calls) == 1
+
+    def test_contribution_counts_only_new_spans(self, gated_extractor):
+        """Test that NER hits overlapping dictionary entities are not counted as contributions"""
+        extractor = gated_extractor("always")
+        extractor.extract("ngành kiến trúc ở Hà Nội")
+        stats = extractor.ner_stats()
+        assert stats["entities"] == 2
+        assert stats["contributed"] == 1
+
+    def test_unknown_mode_falls_back_to_always(self, gated_extractor):
+        """Test that an unknown mode keeps NER enabled"""
+        assert gated_extractor("sometimes").ner_mode == "always"
+
+    def test_pipeline_exposes_ner_stats(self, nlp_service):
+        """Test that NER counters are reported with the service stats"""
+        nlp_service.analyze_message("Điểm chuẩn ngành Kiến trúc")
+        stats = nlp_service.get_stats()["ner"]
+        assert stats["requests"] >= 1
+        assert stats["mode"] in ("always", "no_major", "intents", "never")
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestNerWorkerPool:
+    """Tests for the off-request NER worker pool"""
+
+    def test_results_are_cached_by_key(self):
+        """Test repeated keys are served from cache without calling NER again"""
+        from nlu.ner_pool import NerWorkerPool
+        calls = []
+        pool = NerWorkerPool(lambda t: calls.append(t) or [{"label": "LOC", "text": t}], workers=1)
+        try:
+            first = pool.extract("ha noi", "Hà Nội", timeout=5)
+            second = pool.extract("ha noi", "Hà  Nội", timeout=5)
+        finally:
+            pool.shutdown(timeout=5)
+        assert first == second == [{"label": "LOC", "text": "Hà Nội"}]
+        assert calls == ["Hà Nội"]
+        stats = pool.stats()
+        assert stats["cache_hits"] == 1
+        assert stats["cache"]["size"] == 1
+
+    def test_concurrent_requests_are_batched_and_coalesced(self):
+        """Test queued texts drain in one batch and duplicate keys share a single call"""
+        import threading
+        from nlu.ner_pool import NerWorkerPool
+        gate = threading.Event()
+        calls = []
+
+        def slow_ner(text):
+            gate.wait(5)
+            calls.append(text)
+            return []
+
+        pool = NerWorkerPool(slow_ner, workers=1, batch_size=8, cache_size=0)
+        try:
+            blocker = pool.submit("blocker", "blocker")
+            futures = [pool.submit(f"k{i % 3}", f"text {i % 3}") for i in range(6)]
+            assert pool.stats()["queue_depth"] >= 3
+            gate.set()
+            for f in [blocker] + futures:
+                f.result(timeout=5)
+        finally:
+            pool.shutdown(timeout=5)
+        stats = pool.stats()
+        assert sorted(calls) == ["blocker", "text 0", "text 1", "text 2"]
+        assert stats["coalesced"] == 3
+        assert stats["max_queue_depth"] >= 3
+        assert stats["batches"] <= 2
+        assert stats["latency_ms"]["max"] > 0
+
+    def test_errors_propagate_to_caller(self):
+        """Test a failing NER call raises in the caller and keeps the worker alive"""
+        from nlu.ner_pool import NerWorkerPool
+
+        def flaky(text):
+            if text == "bad":
+                raise ValueError("boom")
+            return [{"label": "ORG", "text": text}]
+
+        pool = NerWorkerPool(flaky, workers=1)
+        try:
+            with pytest.raises(ValueError):
+                pool.extract("bad", "bad", timeout=5)
+            assert pool.extract("good", "good", timeout=5) == [{"label": "ORG", "text": "good"}]
+        finally:
+            pool.shutdown(timeout=5)
+        assert pool.stats()["errors"] == 1
+        assert pool.stats()["in_flight"] == 0
+
+    def test_abandoned_requests_are_dropped(self):
+        """Test queued texts whose callers all cancelled never reach NER"""
+        import threading
+        from nlu.ner_pool import NerWorkerPool
+        gate = threading.Event()
+        calls = []
+
+        def slow_ner(text):
+            gate.wait(5)
+            calls.append(text)
+            return []
+
+        pool = NerWorkerPool(slow_ner, workers=1, cache_size=0)
+        try:
+            blocker = pool.submit("blocker", "blocker")
+            abandoned = [pool.submit("late", "late") for _ in range(2)]
+            kept_key = [pool.submit("shared", "shared"), pool.submit("shared", "shared")]
+            assert all(f.cancel() for f in abandoned)
+            assert kept_key[0].cancel()
+            gate.set()
+            blocker.result(timeout=5)
+            assert kept_key[1].result(timeout=5) == []
+        finally:
+            pool.shutdown(timeout=5)
+        assert calls == ["blocker", "shared"]
+        stats = pool.stats()
+        assert stats["dropped"] == 1
+        assert stats["in_flight"] == 0
+
+    def test_pool_restarts_after_shutdown(self):
+        """Test the pool can be reused after its workers were stopped"""
+        from nlu.ner_pool import NerWorkerPool
+        pool = NerWorkerPool(lambda t: [], workers=2)
+        pool.extract("a", "a", timeout=5)
+        pool.shutdown(timeout=5)
+        assert pool.extract("b", "b", timeout=5) == []
+        pool.shutdown(timeout=5)
+
+    def test_extractor_uses_pool_when_configured(self, gated_extractor):
+        """Test EntityExtractor routes NER through the pool and reports its stats"""
+        extractor = gated_extractor("always", ner_workers=1)
+        try:
+            first = extractor.extract("Ngành kiến trúc ở Hà Nội")
+            second = extractor.extract("ngành  kiến trúc ở hà nội")
+        finally:
+            extractor.ner_pool.shutdown(timeout=5)
+        assert len(gated_extractor.calls) == 1
+        assert [e for e in first if e.get("source") == "ner"]
+        assert [e["label"] for e in first] == [e["label"] for e in second]
+        pool_stats = extractor.ner_stats()["pool"]
+        assert pool_stats["cache_hits"] == 1
+        assert extractor.ner_stats()["runs"] == 2
+
+    def test_no_pool_when_disabled(self, gated_extractor):
+        """Test zero workers or never mode keep NER inline without a pool"""
+        assert gated_extractor("always", ner_workers=0).ner_pool is None
+        assert gated_extractor("never", ner_workers=2).ner_pool is None
+        assert gated_extractor("always").ner_stats()["pool"] is None
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestEntityLabelTable:
+    """Tests for label fix-ups resolved when patterns and dictionaries are loaded"""
+
+    def test_pattern_labels_are_final(self, nlp_service):
+        """Test loaded patterns already carry aliased and score-specific labels"""
+        from nlu.entities import ENTITY_LABEL_ALIAS
+        patterns = dict((pat, label) for label, pat in nlp_service.pipeline._entity_extractor.entity_patterns)
+        assert patterns["điểm sàn"] == "DIEM_SAN"
+        assert not set(patterns.values()) & set(ENTITY_LABEL_ALIAS)
+
+    def test_canonical_label_rules(self):
+        """Test alias resolution and the điểm chuẩn/điểm sàn overrides"""
+        from nlu.entities import _canonical_label, _pattern_label
+        assert _canonical_label("NAM_TUYEN_SINH", "2024") == "NAM_HOC"
+        assert _canonical_label("ORG", "điểm chuẩn ktxd") == "DIEM_CHUAN"
+        assert _canonical_label("LOC", "hà nội") == "LOC"
+        assert _pattern_label("NAM", "điểm sàn năm 2024") == "DIEM_SAN"
+        assert _pattern_label("NAM", "điểm sàn và điểm chuẩn") == "DIEM_CHUAN"
+
+    def test_extract_returns_table_labels(self, nlp_service):
+        """Test extracted labels match the precomputed table without alias lookups"""
+        extractor = nlp_service.pipeline._entity_extractor
+        table = set(extractor.entity_patterns) | set(extractor.dict_phrases)
+        entities = extractor.extract("điểm sàn năm 2024 ngành kiến trúc")
+        assert entities
+        for ent in entities:
+            if ent["source"] != "ner":
+                assert (ent["label"], ent["text"]) in table
+
+
+@pytest.fixture
+def planned_extractor(nlp_service):
+    """EntityExtractor with intent-directed plans and NER disabled"""
+    from nlu.entities import EntityExtractor
+    pipeline = nlp_service.pipeline
+    return EntityExtractor(
+        pipeline.data_dir, os.path.join(pipeline.data_dir, "entity.json"), pipeline.syn_map,
+        ner_mode="never", plan_mode="intent",
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestEntityPlans:
+    """Tests for intent-directed entity extraction plans"""
+
+    def test_plan_limits_labels(self, planned_extractor):
+        """Test a planned intent only returns the labels its handler consumes"""
+        from nlu.entities import ENTITY_PLANS
+        text = "điểm chuẩn ngành kiến trúc năm 2024 tổ hợp A00"
+        entities = planned_extractor.extract(text, "hoi_diem_chuan")
+        labels = {e["label"] for e in entities}
+        assert "TEN_NGANH" in labels and "NAM_HOC" in labels
+        assert labels <= ENTITY_PLANS["hoi_diem_chuan"]
+        assert "TO_HOP_MON" in {e["label"] for e in planned_extractor.extract(text)}
+
+    def test_fallback_uses_full_extraction(self, planned_extractor):
+        """Test fallback and unplanned intents keep every dictionary"""
+        text = "email liên hệ và tổ hợp A00 ngành kiến trúc"
+        full = planned_extractor.extract(text)
+        assert planned_extractor.extract(text, "fallback") == full
+        assert planned_extractor.extract(text, "chao_hoi") == full
+        assert planned_extractor.plan_for("fallback") is planned_extractor.full_plan
+
+    def test_plan_keeps_major_and_year_slots(self, planned_extractor):
+        """Test planned extraction finds the same major and year as full extraction"""
+        text = "học phí ngành công nghệ thông tin năm 2025"
+        def slots(entities):
+            return sorted((e["label"], e["text"]) for e in entities
+                          if e["label"] in ("MA_NGANH", "TEN_NGANH", "CHUYEN_NGANH", "NAM_HOC"))
+        assert slots(planned_extractor.extract(text, "hoi_hoc_phi")) == slots(planned_extractor.extract(text))
+
+    def test_plans_are_smaller_and_shared(self, planned_extractor):
+        """Test plans scan a subset of phrases and intents with equal labels share one plan"""
+        full = planned_extractor.full_plan
+        plan = planned_extractor.plan_for("hoi_diem_chuan")
+        assert 0 < len(plan) < len(full)
+        assert plan is planned_extractor.plan_for("hoi_nganh_hoc")
+        assert all(planned_extractor.dict_phrases[i][0] in plan.labels for i in plan.dict_ids)
+
+    def test_full_mode_ignores_intent(self, nlp_service):
+        """Test the default full mode and invalid modes build no plans"""
+        from nlu.entities import EntityExtractor
+        pipeline = nlp_service.pipeline
+        for mode in ("full", "bogus"):
+            extractor = EntityExtractor(
+                pipeline.data_dir, os.path.join(pipeline.data_dir, "entity.json"), pipeline.syn_map,
+                ner_mode="never", plan_mode=mode,
+            )
+            assert extractor.plan_mode == "full"
+            assert extractor.plans == {}
+            assert extractor.plan_for("hoi_diem_chuan") is extractor.full_plan
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestConcurrentStages:
+    """Tests for running NER alongside intent detection with a deadline"""
+
+    def test_ner_timeout_degrades_to_dictionary(self, gated_extractor):
+        """Test a NER future missing its deadline yields pattern/dictionary entities only"""
+        from concurrent.futures import Future
+        extractor = gated_extractor("always")
+        text = "Ngành kiến trúc ở Hà Nội"
+        future = Future()
+        entities = extractor.extract(text, ner_future=future, ner_timeout=0.01)
+        assert future.cancelled()
+        assert entities
+        assert all(e["source"] != "ner" for e in entities)
+        stats = extractor.ner_stats()
+        assert stats["timeouts"] == 1 and stats["runs"] == 1
+
+    def test_submitted_future_is_used(self, gated_extractor):
+        """Test a NER future started before intent detection feeds the result"""
+        from concurrent.futures import ThreadPoolExecutor
+        extractor = gated_extractor("always")
+        with ThreadPoolExecutor(1) as executor:
+            future = extractor.submit_ner("Ngành kiến trúc ở Hà Nội", executor)
+            entities = extractor.extract("Ngành kiến trúc ở Hà Nội", ner_future=future, ner_timeout=5)
+        assert len(gated_extractor.calls) == 1
+        assert any(e["source"] == "ner" for e in entities)
+        assert extractor.ner_stats()["timeouts"] == 0
+
+    def test_submit_ner_without_executor(self, gated_extractor):
+        """Test NER cannot be submitted without a pool or executor, or when disabled"""
+        from concurrent.futures import ThreadPoolExecutor
+        assert gated_extractor("always").submit_ner("ngành kiến trúc") is None
+        with ThreadPoolExecutor(1) as executor:
+            assert gated_extractor("never").submit_ner("ngành kiến trúc", executor) is None
+
+    def test_concurrent_analyze_matches_sequential(self, nlp_service, monkeypatch):
+        """Test concurrent analyze returns the same result as sequential analyze"""
+        from nlu.pipeline import PIPELINE_CONCURRENT
+        pipeline = nlp_service.pipeline
+        texts = ["điểm chuẩn ngành kiến trúc năm 2024", "học phí cntt", "xin chào"]
+        expected = [pipeline.analyze(t) for t in texts]
+        monkeypatch.setattr(pipeline, "pipeline_mode", PIPELINE_CONCURRENT)
+        assert [pipeline.analyze(t) for t in texts] == expected
+
+    def test_invalid_pipeline_mode(self):
+        """Test unknown pipeline modes fall back to sequential"""
+        from nlu.pipeline import NLPPipeline, PIPELINE_SEQUENTIAL
+        assert NLPPipeline._resolve_pipeline_mode("parallel") == PIPELINE_SEQUENTIAL
+        assert NLPPipeline._resolve_pipeline_mode("concurrent") == "concurrent"
@@ -73,6 +73,11 @@ class TestIntentClassification:
             assert 0.0 <= result["score"] <= 1.0, \
                 f"Invalid confidence score for message: {msg}"
 
+    def test_detector_uses_pipeline_threshold(self, nlp_service):
+        """Test that the pipeline's configured threshold reaches the intent detector"""
+        pipeline = nlp_service.pipeline
+        assert pipeline._intent_detector.threshold == pipeline.intent_threshold
+
     def test_empty_message(self, nlp_service):
         """Test handling of empty messages"""
         messages = ["", "   "]
@@ -82,3 +87,708 @@ class TestIntentClassification:
                 f"Empty message should fallback: '{msg}'"
             assert result["score"] == 0.0, \
                 f"Empty message should have 0 confidence"
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestIntentEngines:
+    """Test that alternative scoring engines agree with the dict engine"""
+
+    MESSAGES = [
+        "Điểm chuẩn ngành Kiến trúc năm 2024",
+        "Học phí một năm là bao nhiêu?",
+        "Trường có học bổng không?",
+        "Tổ hợp môn A00 gồm những môn nào",
+        "asdfghjkl",
+        "",
+    ]
+
+    @pytest.fixture(autouse=True)
+    def _samples(self, intent_training_samples):
+        self.samples = intent_training_samples
+
+    def _build(self, nlp_service, engine):
+        from nlu.intent import IntentDetector
+        return IntentDetector(self.samples, {}, engine=engine)
+
+    def test_sparse_engine_matches_dict(self, nlp_service):
+        """Test sparse CSR engine returns the same intents and scores"""
+        pytest.importorskip("scipy")
+        syn_map = nlp_service.pipeline.syn_map
+        dict_det = self._build(nlp_service, "dict")
+        sparse_det = self._build(nlp_service, "sparse")
+        assert sparse_det.engine == "sparse"
+
+        for msg in self.MESSAGES:
+            expected = dict_det.detect(msg, syn_map, None)
+            got = sparse_det.detect(msg, syn_map, None)
+            assert got[0] == expected[0], f"Intent mismatch for: {msg}"
+            assert got[1] == pytest.approx(expected[1], abs=1e-5)
+
+    def test_sparse_engine_keeps_only_the_matrix(self, nlp_service):
+        """Test sparse centroids are read from the CSR matrix instead of separate dicts"""
+        pytest.importorskip("scipy")
+        dict_det = self._build(nlp_service, "dict")
+        sparse_det = self._build(nlp_service, "sparse")
+        assert sparse_det.intent_centroids is sparse_det._sparse_index
+        assert list(sparse_det.intent_centroids) == list(dict_det.intent_centroids)
+        for intent, centroid in dict_det.intent_centroids.items():
+            assert sparse_det.intent_centroids[intent] == pytest.approx(centroid, abs=1e-6)
+
+    def test_postings_engine_matches_dict(self, nlp_service):
+        """Test inverted-index engine returns exactly the dict engine scores"""
+        syn_map = nlp_service.pipeline.syn_map
+        dict_det = self._build(nlp_service, "dict")
+        postings_det = self._build(nlp_service, "postings")
+
+        for msg in self.MESSAGES:
+            assert postings_det.detect(msg, syn_map, None) == dict_det.detect(msg, syn_map, None), \
+                f"Mismatch for: {msg}"
+
+    def test_postings_cover_centroids(self, nlp_service):
+        """Test that every centroid weight appears in the postings"""
+        det = self._build(nlp_service, "postings")
+        total = sum(len(c) for c in det.intent_centroids.values())
+        assert sum(len(p) for p in det.postings.values()) == total
+
+    def test_unknown_engine_falls_back_to_default(self, nlp_service):
+        """Test that an unknown engine name degrades to the postings engine"""
+        det = self._build(nlp_service, "does-not-exist")
+        assert det.engine == "postings"
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestCompactCentroids:
+    """Test array-backed centroid storage and centroid pruning"""
+
+    def test_compact_engine_matches_dict(self, nlp_service, intent_training_samples):
+        """Test that float32 array centroids score like the dict engine"""
+        from nlu.intent import IntentDetector
+        syn_map = nlp_service.pipeline.syn_map
+        dict_det = IntentDetector(intent_training_samples, {}, engine="dict")
+        compact_det = IntentDetector(intent_training_samples, {}, engine="compact")
+
+        for msg in TestIntentEngines.MESSAGES:
+            expected = dict_det.detect(msg, syn_map, None)
+            got = compact_det.detect(msg, syn_map, None)
+            assert got[0] == expected[0], f"Intent mismatch for: {msg}"
+            assert got[1] == pytest.approx(expected[1], abs=1e-5)
+
+    def test_compact_centroids_behave_like_dicts(self):
+        """Test the Mapping view over the term-id / weight arrays"""
+        from nlu.compact import CompactCentroids
+        centroids = {"a": {"x": 0.6, "y": 0.8}, "b": {"z": 1.0}}
+        compact = CompactCentroids(centroids)
+
+        assert list(compact) == ["a", "b"]
+        assert compact["a"] == pytest.approx(centroids["a"])
+        assert compact.nnz() == 3
+        assert compact.nbytes() == 3 * 8
+        assert dict(compact.scores({"y": 1.0})) == pytest.approx({"a": 0.8, "b": 0.0})
+
+    def test_prune_centroid(self):
+        """Test top-K and minimum-weight pruning keep unit norm"""
+        import math
+        from nlu.compact import prune_centroid
+        centroid = {"a": 0.8, "b": 0.5, "c": 0.3, "d": 0.1}
+
+        assert prune_centroid(centroid) is centroid
+        top2 = prune_centroid(centroid, top_k=2)
+        assert set(top2) == {"a", "b"}
+        assert math.sqrt(sum(w * w for w in top2.values())) == pytest.approx(1.0)
+        assert set(prune_centroid(centroid, min_weight=0.2)) == {"a", "b", "c"}
+
+    def test_pruned_detector_shrinks_centroids(self, intent_training_samples):
+        """Test that pruning caps the number of terms per intent"""
+        from nlu.intent import IntentDetector
+        det = IntentDetector(intent_training_samples, {}, engine="compact", centroid_top_k=20)
+        assert all(len(c) <= 20 for c in det.intent_centroids.values())
+        assert det.detect("Học phí một năm là bao nhiêu?", {}, None)[0] != "fallback"
+
+
+@pytest.fixture(scope="module")
+def knn_detector(intent_training_samples):
+    """IntentDetector in knn mode built from the intent.csv training samples"""
+    from nlu.intent import IntentDetector
+    return IntentDetector(intent_training_samples, {}, mode="knn", knn_k=10)
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestKnnIntentMode:
+    """Test the k-nearest-neighbour intent mode"""
+
+    def test_knn_detects_common_intents(self, nlp_service, knn_detector):
+        """Test that knn mode classifies typical questions"""
+        syn_map = nlp_service.pipeline.syn_map
+        cases = [
+            ("Điểm chuẩn ngành Kiến trúc năm 2024", "hoi_diem_chuan"),
+            ("Học phí một năm là bao nhiêu?", "hoi_hoc_phi"),
+            ("Trường có học bổng không?", "hoi_hoc_bong"),
+        ]
+        for msg, expected in cases:
+            intent, score = knn_detector.detect(msg, syn_map, None)
+            assert intent == expected, f"Failed for: {msg}, got: {intent}"
+            assert 0.0 < score <= 1.0
+
+    def test_pruned_search_matches_exhaustive(self, nlp_service, knn_detector):
+        """Test that the pruned top-k equals an exhaustive cosine scan"""
+        from nlu.preprocess import tokenize_and_map
+        index = knn_detector._knn_index
+        for msg in ["Điểm chuẩn ngành Kiến trúc năm 2024", "phương thức xét tuyển ngành CNTT"]:
+            q_vec = knn_detector._tfidf_vec(tokenize_and_map(msg, nlp_service.pipeline.syn_map))
+            exhaustive = sorted(
+                (sum(w * doc.get(t, 0.0) for t, w in q_vec.items()) for doc in index.doc_vecs),
+                reverse=True,
+            )[:10]
+            pruned = [score for _, score in index.search(q_vec, 10)]
+            assert pruned == pytest.approx(exhaustive, abs=1e-9)
+
+    def test_knn_empty_message(self, nlp_service, knn_detector):
+        """Test that knn mode falls back on empty input"""
+        assert knn_detector.detect("", nlp_service.pipeline.syn_map, None) == ("fallback", 0.0)
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestIntentArtifact:
+    """Test the compiled intent model cache file"""
+
+    MESSAGES = TestIntentEngines.MESSAGES
+
+    @pytest.fixture
+    def detector(self, intent_training_samples):
+        from nlu.intent import IntentDetector
+        return IntentDetector(intent_training_samples, {})
+
+    def test_roundtrip_matches_trained_model(self, nlp_service, detector, tmp_path):
+        """Test that a detector loaded from the artifact scores exactly like the trained one"""
+        from nlu.artifact import load_artifact, write_artifact
+        from nlu.intent import IntentDetector
+
+        path = str(tmp_path / "intent_model.bin")
+        write_artifact(path, "key-1", detector.idf, detector.intent_centroids)
+        compiled = load_artifact(path, "key-1")
+        assert compiled is not None
+        try:
+            loaded = IntentDetector({}, {}, compiled=compiled)
+        finally:
+            compiled.close()
+
+        syn_map = nlp_service.pipeline.syn_map
+        for msg in self.MESSAGES:
+            expected = detector.detect(msg, syn_map, None)
+            got = loaded.detect(msg, syn_map, None)
+            assert got == expected, f"Score mismatch for: {msg}"
+
+    def test_stale_or_corrupt_artifact_is_ignored(self, detector, tmp_path):
+        """Test that a key mismatch or truncated file forces a rebuild"""
+        from nlu.artifact import load_artifact, write_artifact
+
+        path = tmp_path / "intent_model.bin"
+        write_artifact(str(path), "key-1", detector.idf, detector.intent_centroids)
+        assert load_artifact(str(path), "key-2") is None
+
+        path.write_bytes(path.read_bytes()[:-16])
+        assert load_artifact(str(path), "key-1") is None
+        assert load_artifact(str(tmp_path / "missing.bin"), "key-1") is None
+
+    def test_data_key_tracks_file_content(self, tmp_path):
+        """Test that the artifact key changes when training data changes"""
+        from nlu.artifact import compute_data_key
+
+        data = tmp_path / "intent.csv"
+        data.write_text("utterance,intent\nchào bạn,chao_hoi\n", encoding="utf-8")
+        key = compute_data_key([str(data)])
+        assert key == compute_data_key([str(data)])
+
+        data.write_text("utterance,intent\nchào bạn,tam_biet\n", encoding="utf-8")
+        assert key != compute_data_key([str(data)])
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestBatchAnalysis:
+    """Test batch entry points against the single-message path"""
+
+    MESSAGES = TestIntentEngines.MESSAGES + ["Điểm chuẩn ngành Kiến trúc năm 2024"]
+
+    @pytest.mark.parametrize("engine", ["dict", "postings", "sparse"])
+    def test_detect_many_matches_detect(self, nlp_service, intent_training_samples, engine):
+        """Test that detect_many returns exactly what detect returns"""
+        if engine == "sparse":
+            pytest.importorskip("scipy")
+        from nlu.intent import IntentDetector
+        det = IntentDetector(intent_training_samples, {}, engine=engine)
+        syn_map = nlp_service.pipeline.syn_map
+
+        expected = [det.detect(msg, syn_map, None) for msg in self.MESSAGES]
+        assert det.detect_many(self.MESSAGES, syn_map, None) == expected
+
+    def test_analyze_batch_matches_analyze(self, nlp_service):
+        """Test that analyze_messages returns the same analyses in order"""
+        expected = [nlp_service.analyze_message(msg) for msg in self.MESSAGES]
+        assert nlp_service.analyze_messages(self.MESSAGES) == expected
+
+    def test_analyze_batch_empty(self, nlp_service):
+        """Test that an empty batch returns an empty list"""
+        assert nlp_service.analyze_messages([]) == []
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestWeightedSamples:
+    """Test that duplicate training rows are folded into weighted samples"""
+
+    def test_duplicates_are_counted(self):
+        """Test that identical token sequences collapse into one counted sample"""
+        from nlu.intent import weigh_samples
+        weighted = weigh_samples([["học", "phí"], ["học_phí"], ["học", "phí"]])
+        assert weighted == {("học", "phí"): 2, ("học_phí",): 1}
+
+    def test_weighted_model_matches_expanded(self):
+        """Test that counts give the same IDF and centroids as repeated rows"""
+        from nlu.intent import IntentDetector
+        rows = {
+            "hoi_hoc_phi": [["học_phí", "bao_nhiêu"]] * 3 + [["chi_phí", "học"]],
+            "hoi_hoc_bong": [["học_bổng"], ["học_bổng", "điều_kiện"]] * 2,
+        }
+        expanded = IntentDetector(rows, {})
+        weighted = IntentDetector(
+            {intent: {tuple(t): samples.count(t) for t in samples} for intent, samples in rows.items()},
+            {},
+        )
+        assert weighted.idf == pytest.approx(expanded.idf)
+        for intent, centroid in expanded.intent_centroids.items():
+            assert weighted.intent_centroids[intent] == pytest.approx(centroid)
+
+    def test_loader_returns_weighted_samples(self, intent_training_samples):
+        """Test that the corpus loader dedupes rows while keeping their counts"""
+        import csv
+        import os
+        from config import DATA_DIR
+
+        with open(os.path.join(DATA_DIR, "intent.csv"), newline="", encoding="utf-8") as f:
+            n_rows = sum(1 for r in csv.DictReader(f) if r.get("utterance") and r.get("intent"))
+
+        n_unique = sum(len(s) for s in intent_training_samples.values())
+        assert n_unique < n_rows
+        assert sum(sum(s.values()) for s in intent_training_samples.values()) == n_rows
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestIncrementalUpdates:
+    """Test IntentDetector.add_samples without a full rebuild"""
+
+    UTTERANCES = {
+        "hoi_hoc_phi": ["học phí bao nhiêu", "học phí một năm", "chi phí học"],
+        "hoi_hoc_bong": ["học bổng", "điều kiện học bổng", "xét học bổng"],
+    }
+
+    def _samples(self):
+        from nlu.preprocess import tokenize_and_map
+        return {
+            intent: [tokenize_and_map(u, {}) for u in utterances]
+            for intent, utterances in self.UTTERANCES.items()
+        }
+
+    def test_add_samples_for_new_intent(self):
+        """Test that a new intent becomes detectable after adding samples"""
+        from nlu.intent import IntentDetector
+        det = IntentDetector(self._samples(), {})
+        assert det.detect("ký túc xá", {}, None)[0] == "fallback"
+
+        added = det.add_samples("hoi_ky_tuc_xa", ["ký túc xá", "ký túc xá giá bao nhiêu"])
+        assert added == 2
+        assert det.detect("ký túc xá", {}, None)[0] == "hoi_ky_tuc_xa"
+        assert det.detect("học bổng", {}, None)[0] == "hoi_hoc_bong"
+
+    def test_updated_model_matches_full_rebuild(self, intent_training_samples):
+        """Test that detection after add_samples agrees with a full rebuild"""
+        from nlu.intent import IntentDetector
+        det = IntentDetector(intent_training_samples, {})
+        det.add_samples("hoi_hoc_phi", ["học phí ngành kiến trúc năm nay"])
+        rebuilt = IntentDetector(det.intent_samples, {})
+
+        for msg in TestIntentEngines.MESSAGES:
+            intent, score = det.detect(msg, {}, None)
+            expected_intent, expected_score = rebuilt.detect(msg, {}, None)
+            assert intent == expected_intent
+            assert score == pytest.approx(expected_score, abs=1e-3)
+
+        det.retrain()
+        assert det.intent_centroids["hoi_hoc_phi"] == pytest.approx(
+            rebuilt.intent_centroids["hoi_hoc_phi"]
+        )
+
+    def test_compiled_detector_without_state_is_not_trainable(self, tmp_path):
+        """Test that a detector loaded from an artifact without training state refuses updates"""
+        from nlu.artifact import load_artifact, write_artifact
+        from nlu.intent import IntentDetector
+
+        det = IntentDetector(self._samples(), {})
+        path = str(tmp_path / "model.bin")
+        write_artifact(path, "k", det.idf, det.intent_centroids)
+        compiled = load_artifact(path, "k")
+        try:
+            loaded = IntentDetector({}, {}, compiled=compiled)
+        finally:
+            compiled.close()
+
+        assert not loaded.trainable
+        with pytest.raises(RuntimeError):
+            loaded.add_samples("hoi_hoc_phi", ["học phí"])
+
+    def test_compiled_detector_with_state_updates_incrementally(self, tmp_path):
+        """Test that an artifact carrying DF and centroid sums loads a trainable detector"""
+        from nlu.artifact import load_artifact, write_artifact
+        from nlu.intent import IntentDetector
+
+        det = IntentDetector(self._samples(), {})
+        path = str(tmp_path / "model.bin")
+        df, n_docs, sums = det.training_state()
+        write_artifact(path, "k", det.idf, det.intent_centroids, df, n_docs, sums)
+        compiled = load_artifact(path, "k")
+        try:
+            loaded = IntentDetector({}, {}, compiled=compiled)
+        finally:
+            compiled.close()
+
+        assert loaded.trainable
+        new = ["học phí ngành kiến trúc năm nay", "ký túc xá"]
+        assert loaded.add_samples("hoi_hoc_phi", new) == det.add_samples("hoi_hoc_phi", new)
+        for msg in ["học phí kiến trúc", "điểm chuẩn năm nay", "ký túc xá"]:
+            expected_intent, expected_score = det.detect(msg, {}, None)
+            intent, score = loaded.detect(msg, {}, None)
+            assert intent == expected_intent
+            assert score == pytest.approx(expected_score, abs=1e-5)
+
+    def test_pipeline_updates_artifact_model_without_retraining(self, reload_data_dir, monkeypatch):
+        """Test online samples on an artifact-loaded pipeline do not re-tokenize the corpus"""
+        from nlu.pipeline import NLPPipeline
+        monkeypatch.setenv("INTENT_ARTIFACT_ENABLED", "true")
+        monkeypatch.setenv("INTENT_ARTIFACT_PATH", str(reload_data_dir / ".cache" / "intent_model.bin"))
+        NLPPipeline(str(reload_data_dir))
+
+        pipeline = NLPPipeline(str(reload_data_dir))
+        assert pipeline.intent_samples == {}
+
+        def no_retrain(*args, **kwargs):
+            raise AssertionError("corpus re-tokenized")
+
+        monkeypatch.setattr(pipeline, "load_training_samples", no_retrain)
+        assert pipeline.add_intent_samples("hoi_ky_tuc_xa", ["ký túc xá còn chỗ"]) == 1
+        assert pipeline.detect_intent("ký túc xá")[0] == "hoi_ky_tuc_xa"
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestParallelTokenization:
+    """Test process-pool tokenization of the intent corpus"""
+
+    def test_parallel_matches_serial_order(self, nlp_service):
+        """Test that parallel tokenization returns the serial result in the same order"""
+        import csv
+        import os
+        from nlu.pipeline import PARALLEL_TOKENIZE_MIN_ROWS, _normalize_text, _tokenize_utterances
+
+        pipeline = nlp_service.pipeline
+        with open(os.path.join(pipeline.data_dir, "intent.csv"), newline="", encoding="utf-8") as f:
+            utterances = [_normalize_text(r.get("utterance") or "") for r in csv.DictReader(f)]
+        utterances = [u for u in utterances if u][:PARALLEL_TOKENIZE_MIN_ROWS + 100]
+
+        serial = _tokenize_utterances(utterances, pipeline.syn_map, workers=0)
+        parallel = _tokenize_utterances(utterances, pipeline.syn_map, workers=2)
+        assert parallel == serial
+        assert len(parallel) == len(utterances)
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestSampleRetention:
+    """Test releasing and compacting training samples after the model is built"""
+
+    def test_compact_samples_roundtrip(self, intent_training_samples):
+        """Test that compacted samples rehydrate to the original weighted samples"""
+        from nlu.compact import CompactSamples
+        compact = CompactSamples(intent_training_samples)
+        assert compact.to_weighted() == intent_training_samples
+        assert len(compact) == sum(sum(s.values()) for s in intent_training_samples.values())
+
+    def test_compacted_detector_rehydrates_on_update(self, intent_training_samples):
+        """Test that a compacted detector still accepts incremental updates"""
+        from nlu.intent import IntentDetector
+        det = IntentDetector(intent_training_samples, {})
+        centroids = {k: dict(v) for k, v in det.intent_centroids.items()}
+
+        det.release_samples(compact=True)
+        assert det.intent_samples == {}
+        assert det.trainable
+        assert det.intent_centroids == centroids
+
+        det.retrain()
+        assert det.intent_samples == intent_training_samples
+        assert det.intent_centroids == centroids
+
+        det.release_samples(compact=True)
+        assert det.add_samples("hoi_hoc_phi", ["học phí ngành kiến trúc"]) == 1
+        assert sum(det.intent_samples["hoi_hoc_phi"].values()) == \
+            sum(intent_training_samples["hoi_hoc_phi"].values()) + 1
+
+    def test_dropped_detector_is_not_trainable(self, intent_training_samples):
+        """Test that dropping samples keeps detection but disables updates"""
+        from nlu.intent import IntentDetector
+        det = IntentDetector(intent_training_samples, {})
+        expected = det.detect("Học phí một năm là bao nhiêu?", {}, None)
+
+        det.release_samples()
+        assert not det.trainable
+        assert det.detect("Học phí một năm là bao nhiêu?", {}, None) == expected
+        with pytest.raises(RuntimeError):
+            det.add_samples("hoi_hoc_phi", ["học phí"])
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestTokenIds:
+    """Test integer token-id interning for TF-IDF and centroid scoring"""
+
+    def test_encode_drops_stopwords_and_unknowns(self):
+        """Test that one lookup filters stopwords and keeps unknowns in the TF denominator"""
+        from nlu.vocab import Vocabulary
+        vocab = Vocabulary(["học", "phí"], {"là", "bao"})
+        ids, total = vocab.encode(["học", "phí", "là", "bao", "nhiêu", "học"])
+        assert ids == [0, 1, 0]
+        assert total == 4
+        assert vocab.intern("nhiêu") == 2
+        assert vocab.intern("học") == 0
+
+    def test_query_vector_matches_string_tfidf(self, intent_training_samples):
+        """Test that the id-based query vector equals TF-IDF computed over strings"""
+        import math
+        from nlu.intent import IntentDetector
+        from nlu.preprocess import tokenize_and_map
+        det = IntentDetector(intent_training_samples, {})
+
+        toks = tokenize_and_map("Học phí ngành kiến trúc một năm bao nhiêu tiền xyz", {})
+        counts = {t: toks.count(t) for t in toks}
+        vec = {t: c / len(toks) * det.idf[t] for t, c in counts.items() if t in det.idf}
+        norm = math.sqrt(sum(v * v for v in vec.values()))
+        assert det._tfidf_vec(toks) == {t: v / norm for t, v in vec.items()}
+
+    def test_stopwords_filtered_by_vocabulary(self, nlp_service, intent_training_samples):
+        """Test that unfiltered tokens score the same as stopword-filtered ones"""
+        from nlu.intent import IntentDetector
+        from nlu.preprocess import map_tokens
+        det = IntentDetector(intent_training_samples, {})
+        toks = "cho mình hỏi học phí là bao nhiêu ạ".split()
+        assert list(det._score_intents(toks)) == list(det._score_intents(map_tokens(toks, {})))
+
+    def test_add_samples_keeps_existing_ids(self, intent_training_samples):
+        """Test that updates append new ids without renumbering or mutating the live vocabulary"""
+        from nlu.intent import IntentDetector
+        det = IntentDetector(intent_training_samples, {})
+        before = det.vocab
+        ids = dict(before.term_ids)
+
+        det.add_samples("hoi_hoc_phi", ["học phí ngành zzzmới"])
+        assert det.vocab is not before
+        assert "zzzmới" not in before.term_ids
+        assert det.vocab.term_ids["zzzmới"] == len(ids)
+        assert all(det.vocab.term_ids[t] == i for t, i in ids.items())
+        assert len(det._idf_ids) == len(det.vocab)
+
+    def test_compact_engine_shares_vocabulary(self, intent_training_samples):
+        """Test that compact centroids are indexed by the detector's token ids"""
+        from nlu.intent import IntentDetector
+        det = IntentDetector(intent_training_samples, {}, engine="compact")
+        assert det.intent_centroids.term_ids is det.vocab.term_ids
+
+
+@pytest.fixture
+def reload_data_dir(tmp_path, monkeypatch):
+    """Small data directory for hot-reload tests, with artifacts and NER disabled"""
+    monkeypatch.setenv("INTENT_ARTIFACT_ENABLED", "false")
+    monkeypatch.setenv("NER_MODE", "never")
+    monkeypatch.setenv("NER_WORKERS", "0")
+    (tmp_path / "intent.csv").write_text(
+        "utterance,intent\n"
+        "điểm chuẩn ngành kiến trúc,hoi_diem_chuan\n"
+        "điểm chuẩn năm nay,hoi_diem_chuan\n"
+        "học phí bao nhiêu,hoi_hoc_phi\n"
+        "học phí một năm,hoi_hoc_phi\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "synonym.csv").write_text("entity,canonical,alias\nMAJOR,Kiến trúc,KT\n", encoding="utf-8")
+    (tmp_path / "majors.csv").write_text("major_code,major_name\n7580101,Kiến trúc\n", encoding="utf-8")
+    (tmp_path / "entity.json").write_text("[]", encoding="utf-8")
+    return tmp_path
+
+
+def _bump(path, text):
+    """Rewrite a data file so its mtime and size both change"""
+    import os
+    path.write_text(text, encoding="utf-8")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestHotReload:
+    """Tests for rebuilding NLU structures when data files change"""
+
+    def test_reload_swaps_only_affected_parts(self, reload_data_dir):
+        """Test majors.csv rebuilds entities only, synonym.csv rebuilds everything"""
+        from nlu.pipeline import NLPPipeline
+        pipeline = NLPPipeline(str(reload_data_dir))
+        old = pipeline.snapshot
+        assert not [e for e in pipeline.extract_entities("ngành xây dựng") if e["label"] == "TEN_NGANH"]
+
+        _bump(reload_data_dir / "majors.csv", "major_code,major_name\n7580101,Kiến trúc\n7580201,Xây dựng\n")
+        assert pipeline.reload([str(reload_data_dir / "majors.csv")])
+        new = pipeline.snapshot
+        assert new.version == old.version + 1 and new.data_key != old.data_key
+        assert new.intent_detector is old.intent_detector and new.syn_map is old.syn_map
+        assert new.entity_extractor is not old.entity_extractor
+        assert [e["text"] for e in pipeline.extract_entities("ngành xây dựng") if e["label"] == "TEN_NGANH"] \
+            == ["xây dựng"]
+
+        _bump(reload_data_dir / "synonym.csv", "entity,canonical,alias\nMAJOR,Xây dựng,XD\n")
+        assert pipeline.reload([str(reload_data_dir / "synonym.csv")])
+        latest = pipeline.snapshot
+        assert latest.syn_map is not new.syn_map and latest.intent_detector is not new.intent_detector
+        assert latest.entity_extractor.synonym_map is latest.syn_map
+        assert pipeline.message("ngành xd").synonym_rewrite[0] == ["ngành", "xây dựng"]
+
+    def test_running_request_keeps_old_snapshot(self, reload_data_dir):
+        """Test a request holding the previous snapshot still sees its data after a swap"""
+        from nlu.pipeline import NLPPipeline
+        pipeline = NLPPipeline(str(reload_data_dir))
+        old = pipeline.snapshot
+        msg = pipeline.message("ngành kt", old)
+        _bump(reload_data_dir / "synonym.csv", "entity,canonical,alias\nMAJOR,Xây dựng,KT\n")
+        assert pipeline.reload()
+
+        assert pipeline.snapshot is not old
+        assert old.syn_map.rewrite(["kt"]) == ["kiến trúc"]
+        assert pipeline.message(msg, old) is msg
+        assert msg.synonym_rewrite[0] == ["ngành", "kiến trúc"]
+        assert pipeline.detect_intent("điểm chuẩn", old)[0] == "hoi_diem_chuan"
+
+    def test_stale_message_is_rebound(self, reload_data_dir):
+        """Test a message created before a swap is re-bound to the current synonyms"""
+        from nlu.pipeline import NLPPipeline
+        pipeline = NLPPipeline(str(reload_data_dir))
+        msg = pipeline.message("ngành kt")
+        _bump(reload_data_dir / "synonym.csv", "entity,canonical,alias\nMAJOR,Xây dựng,KT\n")
+        assert pipeline.reload()
+        assert pipeline.message(msg).synonym_rewrite[0] == ["ngành", "xây dựng"]
+
+    def test_add_intent_samples_publishes_snapshot(self, reload_data_dir):
+        """Test online samples go into a new snapshot and leave the running one untouched"""
+        from nlu.pipeline import NLPPipeline
+        pipeline = NLPPipeline(str(reload_data_dir))
+        old = pipeline.snapshot
+        old_centroids = dict(old.intent_detector.intent_centroids)
+
+        assert pipeline.add_intent_samples("hoi_ky_tuc_xa", ["ký túc xá còn chỗ"]) == 1
+        new = pipeline.snapshot
+        assert new is not old and new.version == old.version + 1
+        assert new.intent_detector is not old.intent_detector
+        assert "hoi_ky_tuc_xa" in new.intent_detector.intent_centroids
+        assert dict(old.intent_detector.intent_centroids) == old_centroids
+        assert pipeline.detect_intent("ký túc xá", old)[0] == "fallback"
+        assert pipeline.detect_intent("ký túc xá")[0] == "hoi_ky_tuc_xa"
+
+    def test_failed_reload_keeps_snapshot(self, reload_data_dir, monkeypatch):
+        """Test a build error leaves the current snapshot in place"""
+        from nlu.pipeline import NLPPipeline
+        pipeline = NLPPipeline(str(reload_data_dir))
+        old = pipeline.snapshot
+
+        def broken(*args, **kwargs):
+            raise ValueError("bad data")
+
+        monkeypatch.setattr(pipeline, "_build_snapshot", broken)
+        assert pipeline.reload() is False
+        assert pipeline.snapshot is old
+
+    def test_segmenter_swaps_with_snapshot(self, reload_data_dir, monkeypatch):
+        """Test a lexicon change publishes a new trie only with its snapshot"""
+        import nlu.pipeline as pipeline_module
+        import nlu.preprocess as preprocess_module
+        monkeypatch.setattr(pipeline_module, "TOKENIZER_BACKEND", "trie")
+        monkeypatch.setattr(preprocess_module, "TOKENIZER_BACKEND", "trie")
+        pipeline = pipeline_module.NLPPipeline(str(reload_data_dir))
+        old = pipeline.snapshot
+        lexicon = reload_data_dir / "vi_lexicon.txt"
+
+        _bump(lexicon, "ngành mới\n")
+        assert pipeline.reload([str(lexicon)])
+        assert pipeline.message("ngành mới").tokens == ["ngành mới"]
+        assert pipeline.message("ngành mới", old).tokens == ["ngành", "mới"]
+
+        current = pipeline.snapshot
+        monkeypatch.setattr(pipeline, "_build_intent_detector", lambda *a, **kw: 1 / 0)
+        _bump(lexicon, "ngành mới\nmới năm\n")
+        assert pipeline.reload([str(lexicon)]) is False
+        assert pipeline.snapshot is current
+        assert pipeline.message("ngành mới năm").tokens == ["ngành mới", "năm"]
+
+    def test_watcher_waits_for_stable_files(self, tmp_path):
+        """Test the watcher reports a change once the file stops changing"""
+        from nlu.reload import DataWatcher
+        path = tmp_path / "intent.csv"
+        path.write_text("a", encoding="utf-8")
+        seen = []
+        watcher = DataWatcher([str(path)], seen.append, interval=60)
+
+        assert watcher.poll() == []
+        _bump(path, "ab")
+        assert watcher.poll() == []
+        assert watcher.poll() == [str(path)]
+        assert seen == [[str(path)]]
+        assert watcher.poll() == []
+
+    def test_watcher_survives_callback_errors(self, tmp_path):
+        """Test an exception in the reload callback does not stop later polls"""
+        from nlu.reload import DataWatcher
+        path = tmp_path / "synonym.csv"
+        path.write_text("a", encoding="utf-8")
+
+        def fail(changed):
+            raise RuntimeError("boom")
+
+        watcher = DataWatcher([str(path)], fail, interval=60)
+        path.unlink()
+        watcher.poll()
+        assert watcher.poll() == [str(path)]
+        watcher.start()
+        watcher.stop(timeout=5)
+
+    def test_watcher_retries_failed_reload(self, tmp_path):
+        """Test a failed or rejected reload is retried on the next poll"""
+        from nlu.reload import DataWatcher
+        path = tmp_path / "intent.csv"
+        path.write_text("a", encoding="utf-8")
+        results = [RuntimeError("boom"), False, True]
+        calls = []
+
+        def on_change(changed):
+            calls.append(changed)
+            result = results[len(calls) - 1]
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        watcher = DataWatcher([str(path)], on_change, interval=60)
+        _bump(path, "ab")
+        assert watcher.poll() == []
+        assert watcher.poll() == [str(path)]
+        assert watcher.poll() == [str(path)]
+        assert watcher.poll() == [str(path)]
+        assert watcher.poll() == []
+        assert calls == [[str(path)]] * 3
@@ -92,3 +92,274 @@ class TestPreprocessingEdgeCases:
 
         # All should be lowercase
         assert all(r.islower() or not r.isalpha() for r in results)
+
+
+def _legacy_normalize_text(text: str) -> str:
+    import re
+    import unicodedata
+    text = unicodedata.normalize("NFC", text.lower().strip())
+    text = re.sub(r"[^\w\sáàảãạăắằẳẵặâấầẩẫậéèẻẽẹêếềểễệíìỉĩịóòỏõọôốồổỗộơớờởỡợúùủũụưứừửữựýỳỷỹỵđ]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _legacy_strip_diacritics(text: str) -> str:
+    import unicodedata
+    norm = unicodedata.normalize("NFD", text)
+    return "".join(ch for ch in norm if unicodedata.category(ch) != "Mn")
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestSharedNormalizationCore:
+    """Test that the translate-table normalizers match the previous implementations"""
+
+    SAMPLES = [
+        "Điểm chuẩn ngành Kiến trúc năm 2024?",
+        "HỌC PHÍ   một năm là bao nhiêu!!!",
+        "Ký túc xá còn chỗ không ạ...",
+        "Tiếng Việt tổ hợp: Đé thi",
+        "CNTT 💻 / KTXD_2024",
+        "Ωμέγα naïve façade Ærøskøbing",
+        "",
+        "   \t\n",
+    ]
+
+    def test_normalize_text_matches_legacy(self):
+        """Test nlu normalize_text output is unchanged"""
+        for text in self.SAMPLES:
+            assert normalize_text(text) == _legacy_normalize_text(text), f"Mismatch for: {text!r}"
+
+    def test_strip_diacritics_matches_legacy(self):
+        """Test diacritic folding over the Latin, combining and Vietnamese blocks"""
+        from nlu.textnorm import strip_diacritics
+        chars = [chr(cp) for cp in range(0x20, 0x0370)] + [chr(cp) for cp in range(0x1E00, 0x1F10)]
+        for ch in chars:
+            assert strip_diacritics(ch) == _legacy_strip_diacritics(ch), f"Mismatch for U+{ord(ch):04X}"
+        for text in self.SAMPLES:
+            assert strip_diacritics(text) == _legacy_strip_diacritics(text), f"Mismatch for: {text!r}"
+
+    def test_processor_utils_use_shared_core(self):
+        """Test services.processors.utils keeps its contract on top of the shared core"""
+        from services.processors.utils import normalize_text as proc_normalize, strip_diacritics
+        assert strip_diacritics("Điểm Chuẩn") == "Điem Chuan"
+        assert proc_normalize("  Kiến Trúc  ") == "kien truc"
+        assert strip_diacritics(None) is None
+        assert proc_normalize(None) == ""
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestNormalizedMessage:
+    """Test the request-scoped NormalizedMessage"""
+
+    def test_views_match_standalone_functions(self):
+        """Test each lazy view equals the function it replaces"""
+        from nlu.message import NormalizedMessage
+        from nlu.preprocess import tokenize_and_map
+        from services.processors.utils import normalize_text as fold
+
+        syn_map = {"cntt": "công nghệ thông tin"}
+        text = "Điểm chuẩn ngành CNTT năm 2024?"
+        msg = NormalizedMessage(text, syn_map)
+        assert msg.lower == text.lower()
+        assert msg.upper == text.upper()
+        assert msg.normalized == normalize_text(text)
+        assert msg.folded == fold(text)
+        assert msg.mapped_tokens == tokenize_and_map(text, syn_map)
+
+    def test_views_are_computed_once(self, monkeypatch):
+        """Test that normalization runs once per message"""
+        import nlu.message as message_module
+        calls = []
+        real = message_module.normalize_text
+        monkeypatch.setattr(message_module, "normalize_text", lambda t: calls.append(t) or real(t))
+
+        msg = message_module.NormalizedMessage("Học phí ngành Kiến trúc")
+        for _ in range(3):
+            assert msg.normalized
+            assert msg.mapped_tokens
+        assert len(calls) == 1
+
+    def test_as_message_passthrough(self):
+        """Test as_message wraps strings and reuses existing messages"""
+        from nlu.message import NormalizedMessage, as_message
+        msg = NormalizedMessage("abc")
+        assert as_message(msg) is msg
+        assert as_message(None).raw == ""
+        assert not as_message("")
+
+    def test_pipeline_accepts_message(self, nlp_service):
+        """Test analyze gives the same result for a string and a NormalizedMessage"""
+        pipeline = nlp_service.pipeline
+        text = "Điểm chuẩn ngành Kiến trúc năm 2024"
+        assert pipeline.analyze(pipeline.message(text)) == pipeline.analyze(text)
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestSegmentCache:
+    """Test the bounded LRU around word segmentation"""
+
+    def test_lru_counts_hits_misses_evictions(self):
+        """Test counters and least-recently-used eviction"""
+        from nlu.lru import LRUCache
+        cache = LRUCache(2)
+        calls = []
+
+        def get(key):
+            return cache.get_or_compute(key, lambda: calls.append(key) or key.upper())
+
+        assert get("a") == "A"
+        assert get("b") == "B"
+        assert get("a") == "A"
+        assert get("c") == "C"
+        assert get("b") == "B"
+
+        stats = cache.stats()
+        assert calls == ["a", "b", "c", "b"]
+        assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 4, 2)
+        assert stats["size"] == 2
+
+    def test_zero_size_disables_cache(self):
+        """Test that maxsize 0 always recomputes"""
+        from nlu.lru import LRUCache
+        cache = LRUCache(0)
+        assert cache.get_or_compute("a", lambda: 1) == 1
+        assert len(cache) == 0
+
+    def test_tokenize_and_map_uses_cache(self):
+        """Test repeated questions hit the segmentation cache with identical tokens"""
+        from nlu.preprocess import SEGMENT_CACHE, tokenize_and_map
+        text = "Điểm chuẩn ngành Kiến trúc năm nay bao nhiêu"
+        first = tokenize_and_map(text, {})
+        hits = SEGMENT_CACHE.hits
+        assert tokenize_and_map(text, {}) == first
+        assert SEGMENT_CACHE.hits == hits + 1
+        assert tokenize_and_map(text, {}, cache=False) == first
+
+    def test_service_exposes_stats(self, nlp_service):
+        """Test NLPService.get_stats reports segmentation cache counters"""
+        stats = nlp_service.get_stats()["segment_cache"]
+        assert stats["maxsize"] >= 0
+        assert {"hits", "misses", "evictions", "hit_rate"} <= set(stats)
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestTrieTokenizer:
+    """Test the dictionary-driven longest-match segmenter"""
+
+    def test_longest_match(self):
+        """Test that the longest dictionary compound wins"""
+        from nlu.tokenizer import TrieSegmenter
+        seg = TrieSegmenter(["công nghệ", "công nghệ thông tin", "điểm chuẩn"])
+        assert seg.segment("điểm chuẩn ngành công nghệ thông tin") == [
+            "điểm chuẩn", "ngành", "công nghệ thông tin",
+        ]
+        assert seg.segment("công nghệ mới") == ["công nghệ", "mới"]
+        assert seg.segment("công") == ["công"]
+        assert seg.segment("") == []
+
+    def test_lexicon_sources(self, nlp_service):
+        """Test that compounds come from the lexicon, synonyms, majors and entity patterns"""
+        from nlu.tokenizer import MAX_COMPOUND_SYLLABLES, load_lexicon_phrases
+        phrases = set(load_lexicon_phrases(nlp_service.pipeline.data_dir))
+
+        assert "bao nhiêu" in phrases
+        assert "công nghệ thông tin" in phrases
+        assert "kiến trúc" in phrases
+        assert "chi tieu" in phrases
+        assert all(2 <= len(p.split()) <= MAX_COMPOUND_SYLLABLES for p in phrases)
+
+    def test_segmenter_per_data_dir(self, tmp_path, monkeypatch):
+        """Test each data directory gets its own trie and cached segments are not shared"""
+        from nlu import preprocess
+        from nlu.tokenizer import TrieSegmenter
+        monkeypatch.setattr(preprocess, "TOKENIZER_BACKEND", "trie")
+        (tmp_path / "vi_lexicon.txt").write_text("ngành mới\n", encoding="utf-8")
+        own = preprocess.get_trie_segmenter(str(tmp_path))
+        assert preprocess.get_trie_segmenter(str(tmp_path)) is own
+        assert own is not preprocess.get_trie_segmenter()
+
+        assert preprocess.segment("ngành mới", segmenter=own) == ["ngành mới"]
+        assert preprocess.segment("ngành mới", segmenter=TrieSegmenter([])) == ["ngành", "mới"]
+
+    def test_backend_resolution(self):
+        """Test that unknown backends fall back to the default"""
+        from nlu.preprocess import _resolve_backend
+        assert _resolve_backend("trie") == "trie"
+        assert _resolve_backend("whitespace") == "whitespace"
+        assert _resolve_backend("nope") in ("underthesea", "whitespace")
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestSynonymTrie:
+    """Test longest-match multi-word synonym rewriting"""
+
+    SYNONYMS = {
+        "cntt": "công nghệ thông tin",
+        "xây dựng": "kỹ thuật xây dựng",
+        "xây dựng dân dụng": "xây dựng dân dụng và công nghiệp",
+        "ô tô": "kỹ thuật ô tô",
+    }
+
+    def test_longest_match_single_pass(self):
+        """Test that the longest alias wins and rewriting is left to right"""
+        from nlu.synonyms import SynonymTrie
+        trie = SynonymTrie(self.SYNONYMS)
+        tokens = "ngành xây dựng dân dụng và cntt".split()
+        rewritten, matched = trie.rewrite_with_matches(tokens)
+        assert rewritten == ["ngành", "xây dựng dân dụng và công nghiệp", "và", "công nghệ thông tin"]
+        assert matched == [(1, 5, "xây dựng dân dụng và công nghiệp"), (6, 7, "công nghệ thông tin")]
+        assert trie.rewrite("xây dựng cầu".split()) == ["kỹ thuật xây dựng", "cầu"]
+        assert trie.rewrite("xây".split()) == ["xây"]
+
+    def test_matches_compound_tokens(self):
+        """Test aliases match across compound tokens from the trie tokenizer"""
+        from nlu.synonyms import SynonymTrie
+        trie = SynonymTrie(self.SYNONYMS)
+        assert trie.rewrite(["ngành", "ô tô"]) == ["ngành", "kỹ thuật ô tô"]
+        assert trie.rewrite(["xây dựng", "dân dụng"]) == ["xây dựng dân dụng và công nghiệp"]
+        # Alias không được cắt ngang một token
+        assert trie.rewrite(["ô", "tô điện"]) == ["ô", "tô điện"]
+
+    def test_single_token_aliases_match_dict_lookup(self):
+        """Test the trie agrees with the plain per-token lookup for one-word aliases"""
+        from nlu.preprocess import map_tokens
+        from nlu.synonyms import SynonymTrie
+        one_word = {k: v for k, v in self.SYNONYMS.items() if " " not in k}
+        tokens = "học phí cntt bao nhiêu".split()
+        assert map_tokens(tokens, SynonymTrie(one_word)) == map_tokens(tokens, one_word)
+
+    def test_pipeline_shares_trie_with_entities(self, nlp_service):
+        """Test that intent and entity stages use the same synonym trie"""
+        from nlu.synonyms import SynonymTrie
+        pipeline = nlp_service.pipeline
+        assert isinstance(pipeline.syn_map, SynonymTrie)
+        assert pipeline._entity_extractor.synonym_map is pipeline.syn_map
+        msg = pipeline.message("ngành công nghệ kiến trúc")
+        assert "kiến trúc công nghệ" in msg.mapped_tokens
+
+
+@pytest.mark.unit
+@pytest.mark.nlp
+class TestLazyUnderthesea:
+    """Test deferred underthesea / NER loading"""
+
+    def test_import_does_not_load_underthesea(self):
+        """Test that importing the NLU stack leaves underthesea unloaded"""
+        import subprocess
+        import sys
+        code = "import sys, nlu.pipeline, nlu.entities; print('underthesea' in sys.modules)"
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        assert out.stdout.strip() == "False"
+
+    def test_warmup_reports_import_and_load_times(self, nlp_service):
+        """Test that warmup reports import and model-load timings separately"""
+        pytest.importorskip("underthesea")
+        timings = nlp_service.warmup()
+        assert "ner_import_ms" in timings
+        assert "ner_model_load_ms" in timings
+        assert timings["warmup_total_ms"] >= 0
+        assert nlp_service.get_stats()["model_load_ms"]["ner_model_load_ms"] >= 0
@@ -0,0 +1,64 @@
+import argparse
+import csv
+import os
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DATA_DIR  # noqa: E402
+from nlu.aho_corasick import AhoCorasick  # noqa: E402
+from nlu.entities import EntityExtractor  # noqa: E402
+from nlu.textnorm import normalize_text  # noqa: E402
+
+
+def naive_matches(phrases: List[str], text: str) -> List[int]:
+    # Cách cũ: thử `in` với từng cụm
+    return [i for i, p in enumerate(phrases) if p and p in text]
+
+
+def best_time(fn, texts: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for t in texts:
+            fn(t)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="So sánh quét `in` từng cụm với Aho–Corasick cho entity từ điển")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--limit", type=int, default=2000, help="Số câu trong intent.csv dùng để đo")
+    parser.add_argument("--scales", default="1,4,16", help="Nhân bản từ điển bao nhiêu lần")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    extractor = EntityExtractor(args.data_dir, os.path.join(args.data_dir, "entity.json"))
+    base = [p for _, p in extractor.entity_patterns] + [p for _, p in extractor.dict_phrases]
+
+    with open(os.path.join(args.data_dir, "intent.csv"), newline="", encoding="utf-8") as f:
+        texts = [normalize_text(r.get("utterance") or "") for r in csv.DictReader(f)][:args.limit]
+    print(f"{len(texts)} câu, {len(base)} cụm gốc (pattern + từ điển)")
+
+    print(f"{'cụm':>8}{'dựng ms':>10}{'in µs/câu':>12}{'AC µs/câu':>12}{'x':>7}{'khác':>6}")
+    for scale in (int(s) for s in args.scales.split(",")):
+        # Từ điển lớn dần: thêm biến thể có hậu tố của các cụm gốc
+        phrases = base + [f"{p} {i}" for i in range(1, scale) for p in base]
+
+        started = time.perf_counter()
+        matcher = AhoCorasick(phrases)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        mismatches = sum(1 for t in texts if naive_matches(phrases, t) != matcher.matched_ids(t))
+        naive_s = best_time(lambda t: naive_matches(phrases, t), texts, args.repeat)
+        ac_s = best_time(matcher.matched_ids, texts, args.repeat)
+        per = 1e6 / max(len(texts), 1)
+        print(f"{len(phrases):>8}{build_ms:>10.1f}{naive_s * per:>12.1f}{ac_s * per:>12.1f}"
+              f"{naive_s / ac_s:>7.1f}{mismatches:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import csv
+import os
+import re
+import sys
+import time
+
+import unicodedata
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DATA_DIR  # noqa: E402
+from nlu.textnorm import fold_ascii, normalize_text, strip_diacritics  # noqa: E402
+
+
+# Bản cũ của nlu.preprocess.normalize_text và services.processors.utils, giữ để so sánh
+def legacy_normalize_text(text) -> str:
+    if not isinstance(text, str):
+        text = str(text) if text is not None else ""
+    text = text.lower().strip()
+    text = unicodedata.normalize("NFC", text)
+    text = re.sub(
+        r"[^\w\sáàảãạăắằẳẵặâấầẩẫậéèẻẽẹêếềểễệíìỉĩịóòỏõọôốồổỗộơớờởỡợúùủũụưứừửữựýỳỷỹỵđ]",
+        " ",
+        text,
+    )
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def legacy_strip_diacritics(text: str) -> str:
+    norm = unicodedata.normalize("NFD", text)
+    return "".join(ch for ch in norm if unicodedata.category(ch) != "Mn")
+
+
+def legacy_fold_ascii(text: str) -> str:
+    return legacy_strip_diacritics(text).lower().strip()
+
+
+def bench(fn, texts, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for t in texts:
+            fn(t)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark chuẩn hóa văn bản trên intent.csv")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(os.path.join(args.data_dir, "intent.csv"), newline="", encoding="utf-8") as f:
+        texts = [r.get("utterance") or "" for r in csv.DictReader(f)]
+    print(f"{len(texts)} câu trong intent.csv, lấy thời gian tốt nhất sau {args.repeat} lần")
+
+    pairs = [
+        ("normalize_text", legacy_normalize_text, normalize_text),
+        ("strip_diacritics", legacy_strip_diacritics, strip_diacritics),
+        ("fold_ascii", legacy_fold_ascii, fold_ascii),
+    ]
+    for name, old, new in pairs:
+        mismatches = sum(1 for t in texts if old(t) != new(t))
+        old_s, new_s = bench(old, texts, args.repeat), bench(new, texts, args.repeat)
+        print(f"{name:<18} cũ {old_s * 1000:8.1f} ms  mới {new_s * 1000:8.1f} ms  "
+              f"x{old_s / new_s:5.2f}  khác biệt: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
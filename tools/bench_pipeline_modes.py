@@ -0,0 +1,60 @@
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DATA_DIR  # noqa: E402
+
+
+def run(pipeline, texts: List[str], clients: int) -> float:
+    started = time.perf_counter()
+    if clients <= 1:
+        for t in texts:
+            pipeline.analyze(t)
+    else:
+        with ThreadPoolExecutor(clients) as ex:
+            list(ex.map(pipeline.analyze, texts))
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="So sánh thời gian analyze tuần tự và chạy song song các bước")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--limit", type=int, default=300, help="Số câu khác nhau trong intent.csv dùng để đo")
+    parser.add_argument("--clients", default="1,4", help="Số request đồng thời (ngăn cách bởi dấu phẩy)")
+    parser.add_argument("--ner-workers", type=int, default=0, help="NER_WORKERS (0 = dùng executor dùng chung)")
+    parser.add_argument("--ner-timeout-ms", type=int, default=0, help="NER_TIMEOUT_MS khi chạy song song")
+    args = parser.parse_args()
+
+    # Tắt cache NER để mỗi lượt đo đều phải chạy NER thật
+    os.environ.update({"NER_MODE": "always", "NER_CACHE_SIZE": "0", "NER_WORKERS": str(args.ner_workers)})
+    from nlu.pipeline import PIPELINE_CONCURRENT, PIPELINE_SEQUENTIAL, NLPPipeline
+
+    pipeline = NLPPipeline(args.data_dir)
+    pipeline.warmup()
+    with open(os.path.join(args.data_dir, "intent.csv"), newline="", encoding="utf-8") as f:
+        texts = list(dict.fromkeys(r.get("utterance") or "" for r in csv.DictReader(f)))[:args.limit]
+    # Lượt chạy mồi: nạp lazily các model và cache tách từ như server đã chạy một lúc
+    run(pipeline, texts, 1)
+    print(f"{len(texts)} câu, NER_WORKERS={args.ner_workers}, NER_TIMEOUT_MS={args.ner_timeout_ms}")
+
+    print(f"{'clients':>8}{'tuần tự ms':>12}{'song song ms':>14}{'x':>7}{'quá hạn':>9}")
+    for clients in (int(c) for c in args.clients.split(",")):
+        pipeline.pipeline_mode, pipeline.ner_timeout = PIPELINE_SEQUENTIAL, None
+        seq_s = run(pipeline, texts, clients)
+
+        pipeline.pipeline_mode = PIPELINE_CONCURRENT
+        pipeline.ner_timeout = args.ner_timeout_ms / 1000 if args.ner_timeout_ms > 0 else None
+        before = pipeline.ner_stats()["timeouts"]
+        con_s = run(pipeline, texts, clients)
+        timeouts = pipeline.ner_stats()["timeouts"] - before
+        print(f"{clients:>8}{seq_s * 1000:>12.1f}{con_s * 1000:>14.1f}{seq_s / con_s:>7.2f}{timeouts:>9}")
+
+
+if __name__ == "__main__":
+    main()
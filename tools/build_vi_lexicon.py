@@ -0,0 +1,62 @@
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DATA_DIR  # noqa: E402
+from nlu.textnorm import normalize_text, strip_diacritics  # noqa: E402
+from nlu.tokenizer import LEXICON_FILE, MAX_COMPOUND_SYLLABLES  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Trích từ ghép trong intent.csv bằng underthesea cho tokenizer trie")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--min-count", type=int, default=2)
+    parser.add_argument("--glue-variants", type=int, default=5)
+    parser.add_argument("--glue-max-count", type=int, default=25)
+    args = parser.parse_args()
+
+    try:
+        from underthesea import word_tokenize
+    except ImportError:
+        sys.exit("Cần cài underthesea để trích từ ghép")
+
+    with open(os.path.join(args.data_dir, "intent.csv"), newline="", encoding="utf-8") as f:
+        utterances = list(dict.fromkeys(normalize_text(r.get("utterance") or "") for r in csv.DictReader(f)))
+
+    started = time.perf_counter()
+    counts: Counter = Counter()
+    for utt in utterances:
+        for word in word_tokenize(utt):
+            word = normalize_text(word)
+            if 2 <= len(word.split()) <= MAX_COMPOUND_SYLLABLES:
+                counts[word] += 1
+
+    # Câu không dấu hay bị tách sai ("minh hoi"), chỉ giữ từ không dấu nếu trùng với
+    # dạng bỏ dấu của một từ ghép có dấu
+    accented = {w for w, c in counts.items() if c >= args.min_count and strip_diacritics(w) != w}
+    folded = {strip_diacritics(w) for w in accented}
+    candidates = accented | {w for w in counts if w in folded}
+
+    # underthesea hay dính âm tiết mở đầu cụm sau vào từ trước ("xf học", "nội thất xét"):
+    # bỏ từ ghép kéo dài một từ ghép khác, và bỏ các biến thể hiếm của một hậu tố bị dính nhiều lần
+    suffix_variants = Counter(w.rsplit(" ", 1)[1] for w in candidates)
+    lexicon = sorted(
+        w for w in candidates
+        if w.rsplit(" ", 1)[0] not in candidates
+        and not (suffix_variants[w.rsplit(" ", 1)[1]] >= args.glue_variants and counts[w] < args.glue_max_count)
+    )
+
+    path = os.path.join(args.data_dir, LEXICON_FILE)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# Sinh bởi tools/build_vi_lexicon.py từ intent.csv, không sửa tay\n")
+        f.write("\n".join(lexicon) + "\n")
+    print(f"Đã ghi {len(lexicon)} từ ghép vào {path} trong {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DATA_DIR  # noqa: E402
+from nlu.compact import CompactCentroids  # noqa: E402
+from nlu.intent import ENGINE_COMPACT, ENGINE_POSTINGS, IntentDetector  # noqa: E402
+from nlu.pipeline import NLPPipeline  # noqa: E402
+
+
+def dict_centroid_nbytes(centroids) -> int:
+    # Chỉ tính dict và các float; chuỗi term dùng chung với vocab nên bỏ qua
+    total = sys.getsizeof(centroids)
+    for centroid in centroids.values():
+        total += sys.getsizeof(centroid) + sum(sys.getsizeof(w) for w in centroid.values())
+    return total
+
+
+def evaluate(detector: IntentDetector, samples) -> tuple:
+    correct = total = 0
+    predictions = {}
+    for intent, weighted in samples.items():
+        for toks, count in weighted.items():
+            predicted, _ = detector._pick_best(detector._score_intents(list(toks)))
+            predictions[(intent, toks)] = predicted
+            total += count
+            correct += count if predicted == intent else 0
+    return correct / (total or 1), predictions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Báo cáo bộ nhớ / độ chính xác khi cắt tỉa centroid")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--top-k", type=int, nargs="*", default=[200, 100, 50, 25])
+    parser.add_argument("--min-weight", type=float, nargs="*", default=[0.005, 0.01, 0.02, 0.05])
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    samples = NLPPipeline(data_dir=args.data_dir).load_training_samples()
+    n_rows = sum(sum(w.values()) for w in samples.values())
+    print(f"Nạp {n_rows} câu mẫu trong {time.perf_counter() - started:.1f}s")
+
+    baseline = IntentDetector(samples, {}, engine=ENGINE_POSTINGS)
+    base_acc, base_pred = evaluate(baseline, samples)
+    base_bytes = dict_centroid_nbytes(baseline.intent_centroids)
+    base_nnz = sum(len(c) for c in baseline.intent_centroids.values())
+    print(f"{'cấu hình':<18}{'nnz':>8}{'bytes':>10}{'tiết kiệm':>11}{'accuracy':>10}{'delta':>9}{'đổi nhãn':>10}")
+    print(f"{'dict (gốc)':<18}{base_nnz:>8}{base_bytes:>10}{'':>11}{base_acc:>10.4f}{'':>9}{'':>10}")
+
+    configs = [("compact", 0, 0.0)]
+    configs += [(f"top_k={k}", k, 0.0) for k in args.top_k]
+    configs += [(f"min_w={w}", 0, w) for w in args.min_weight]
+    for label, top_k, min_weight in configs:
+        detector = IntentDetector(
+            samples, {}, engine=ENGINE_COMPACT, centroid_top_k=top_k, centroid_min_weight=min_weight
+        )
+        acc, pred = evaluate(detector, samples)
+        changed = sum(1 for key, p in pred.items() if base_pred[key] != p)
+        compact = detector.intent_centroids
+        # Engine compact luôn giữ centroid dạng CompactCentroids
+        assert isinstance(compact, CompactCentroids)
+        saved = 1.0 - compact.nbytes() / base_bytes
+        print(f"{label:<18}{compact.nnz():>8}{compact.nbytes():>10}{saved:>10.1%}"
+              f"{acc:>10.4f}{acc - base_acc:>+9.4f}{changed:>10}")
+
+
+if __name__ == "__main__":
+    main()
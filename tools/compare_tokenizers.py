@@ -0,0 +1,105 @@
+import argparse
+import csv
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Set, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DATA_DIR  # noqa: E402
+from nlu.intent import IntentDetector  # noqa: E402
+from nlu.pipeline import _load_synonyms  # noqa: E402
+from nlu.preprocess import map_tokens  # noqa: E402
+from nlu.synonyms import SynonymTrie  # noqa: E402
+from nlu.textnorm import normalize_text  # noqa: E402
+from nlu.tokenizer import build_trie_segmenter  # noqa: E402
+
+
+def spans(words: List[str]) -> Set[Tuple[int, int]]:
+    result, pos = set(), 0
+    for w in words:
+        n = len(w.split())
+        result.add((pos, pos + n))
+        pos += n
+    return result
+
+
+def time_per_call(fn: Callable[[str], List[str]], texts: List[str]) -> float:
+    started = time.perf_counter()
+    for t in texts:
+        fn(t)
+    return (time.perf_counter() - started) / max(len(texts), 1) * 1e6
+
+
+def intent_accuracy(rows: List[Tuple[str, str]], segmented: Dict[str, List[str]], syn_map) -> float:
+    samples: Dict[str, Dict[Tuple[str, ...], int]] = {}
+    for intent, utt in rows:
+        toks = tuple(map_tokens(segmented[utt], syn_map))
+        samples.setdefault(intent, {})
+        samples[intent][toks] = samples[intent].get(toks, 0) + 1
+
+    detector = IntentDetector(samples, {})
+    correct = 0
+    for intent, utt in rows:
+        predicted, _ = detector._pick_best(detector._score_intents(map_tokens(segmented[utt], syn_map)))
+        correct += predicted == intent
+    return correct / max(len(rows), 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="So sánh tokenizer trie / whitespace với underthesea trên intent.csv")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--limit", type=int, default=0, help="Chỉ dùng N câu đầu (0 = tất cả)")
+    args = parser.parse_args()
+
+    try:
+        from underthesea import word_tokenize
+    except ImportError:
+        sys.exit("Cần cài underthesea để làm chuẩn so sánh")
+
+    with open(os.path.join(args.data_dir, "intent.csv"), newline="", encoding="utf-8") as f:
+        rows = [
+            ((r.get("intent") or "").strip(), normalize_text(r.get("utterance") or ""))
+            for r in csv.DictReader(f)
+        ]
+    rows = [(i, u) for i, u in rows if i and u]
+    if args.limit:
+        rows = rows[:args.limit]
+    texts = list(dict.fromkeys(u for _, u in rows))
+    syn_map = SynonymTrie(_load_synonyms(os.path.join(args.data_dir, "synonym.csv")))
+
+    started = time.perf_counter()
+    trie = build_trie_segmenter(args.data_dir)
+    build_ms = (time.perf_counter() - started) * 1000
+    print(f"{len(texts)} câu khác nhau; trie {len(trie)} từ ghép, dựng trong {build_ms:.1f} ms")
+
+    backends: Dict[str, Callable[[str], List[str]]] = {
+        "underthesea": lambda t: [normalize_text(w) for w in word_tokenize(t)],
+        "trie": trie.segment,
+        "whitespace": str.split,
+    }
+    word_tokenize(texts[0])
+
+    segmented = {name: {t: fn(t) for t in texts} for name, fn in backends.items()}
+    reference = segmented["underthesea"]
+
+    print(f"{'backend':<13}{'µs/câu':>9}{'P':>8}{'R':>8}{'F1':>8}{'khớp câu':>10}{'intent acc':>12}")
+    for name, fn in backends.items():
+        latency = time_per_call(fn, texts)
+        tp = fp = fn_count = exact = 0
+        for t in texts:
+            got, ref = spans(segmented[name][t]), spans(reference[t])
+            tp += len(got & ref)
+            fp += len(got - ref)
+            fn_count += len(ref - got)
+            exact += got == ref
+        p = tp / max(tp + fp, 1)
+        r = tp / max(tp + fn_count, 1)
+        f1 = 2 * p * r / max(p + r, 1e-9)
+        acc = intent_accuracy(rows, segmented[name], syn_map)
+        print(f"{name:<13}{latency:>9.1f}{p:>8.4f}{r:>8.4f}{f1:>8.4f}{exact / len(texts):>10.2%}{acc:>12.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DATA_DIR, get_intent_artifact_path  # noqa: E402
+from nlu.pipeline import NLPPipeline  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Biên dịch intent model thành artifact nhị phân")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--output", default=get_intent_artifact_path())
+    args = parser.parse_args()
+
+    os.environ["INTENT_ARTIFACT_ENABLED"] = "false"
+    started = time.perf_counter()
+    pipeline = NLPPipeline(data_dir=args.data_dir)
+    key = pipeline.compile_intent_model(args.output)
+    print(f"Đã ghi {args.output} ({os.path.getsize(args.output)} bytes) "
+          f"key={key[:12]} trong {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()